@@ -1,22 +1,219 @@
-from src import data_generator
+import argparse
+import json
 import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+import pandas as pd
+from src import data_generator
+from src.data_writer import FORMATOS, ProgresoEscritura, escribir, formatear_bytes
+from src.punto_control import PuntoControl, preparar_salida, registrar_bloques, ruta_punto_control
+
+# Valores por defecto de la línea de comandos
+NUM_REGISTROS = 2000
+TAMANO_BLOQUE = 100_000
+OUTPUT_FILE = "data/arboles_bogota"
+EXTENSIONES = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+
+def construir_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Genera un inventario sintético de árboles urbanos de Bogotá.")
+    parser.add_argument("-n", "--registros", type=int, default=NUM_REGISTROS, help="Cantidad de árboles a generar")
+    parser.add_argument("-o", "--salida", help="Ruta del archivo (o directorio si se particiona) de salida")
+    parser.add_argument("-s", "--semilla", type=int, help="Semilla para obtener resultados reproducibles")
+    parser.add_argument("--motor", choices=["columnar", "registros"], default="columnar")
+    parser.add_argument("--modo", choices=["secuencial", "contador"], default="secuencial")
+    parser.add_argument("-f", "--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE, help="Filas por bloque (o por shard)")
+    parser.add_argument("-p", "--procesos", type=int, help="Procesos trabajadores (por defecto no se paraleliza)")
+    parser.add_argument("--compacto", action="store_true", help="Usar categóricas y tipos numéricos estrechos")
+    parser.add_argument("--ponderar-especies", action="store_true", help="Sortear especies según su abundancia")
+    parser.add_argument(
+        "--pool-coordenadas", action="store_true", help="Tomar las coordenadas de un pool precalculado en disco"
+    )
+    parser.add_argument("--particionar-por", nargs="+", help="Columnas de partición (solo Parquet y Feather)")
+    parser.add_argument("--compresion", help="Compresión de Parquet o Feather (por defecto zstd o lz4)")
+    parser.add_argument(
+        "--tamano-grupo-filas",
+        type=int,
+        help="Filas por row group de Parquet o por lote de Feather (por defecto, un bloque)",
+    )
+    parser.add_argument("--resumen", help="Además de imprimirlo, guardar el resumen JSON en esta ruta")
+    parser.add_argument(
+        "--punto-control", action="store_true", help="Guardar el estado tras cada bloque para poder continuar"
+    )
+    continuacion = parser.add_mutually_exclusive_group()
+    continuacion.add_argument("--reanudar", action="store_true", help="Continuar una corrida interrumpida")
+    continuacion.add_argument(
+        "--agregar", action="store_true", help="Agregar --registros árboles nuevos a una salida ya terminada"
+    )
+    parser.add_argument("-q", "--silencioso", action="store_true", help="No mostrar el progreso")
+    return parser
+
+
+def validar_argumentos(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.registros < 0:
+        parser.error("--registros no puede ser negativo.")
+    if args.tamano_bloque <= 0:
+        parser.error("--tamano-bloque debe ser positivo.")
+    if args.procesos is not None and args.procesos <= 0:
+        parser.error("--procesos debe ser positivo.")
+    if args.procesos is not None and args.motor != "columnar":
+        parser.error("La generación paralela solo está disponible con el motor columnar.")
+    if args.tamano_grupo_filas is not None and args.tamano_grupo_filas <= 0:
+        parser.error("--tamano-grupo-filas debe ser positivo.")
+    if args.formato == "csv" and (args.particionar_por or args.compresion or args.tamano_grupo_filas):
+        parser.error("--particionar-por, --compresion y --tamano-grupo-filas solo aplican a Parquet y Feather.")
+    if args.punto_control or args.reanudar or args.agregar:
+        if args.procesos is not None or args.motor != "columnar":
+            parser.error("Los puntos de control requieren el motor columnar sin --procesos.")
+        if args.formato != "csv" and not args.particionar_por:
+            parser.error("Los puntos de control requieren CSV o una salida Parquet/Feather con --particionar-por.")
+
+
+def preparar_punto_control(
+    parser: argparse.ArgumentParser, args: argparse.Namespace, salida: str
+) -> Optional[PuntoControl]:
+    """Punto de control de la corrida: uno nuevo con --punto-control, o el guardado con --reanudar y --agregar"""
+
+    configuracion = {
+        "formato": args.formato,
+        "modo": args.modo,
+        "compacto": args.compacto,
+        "ponderar_especies": args.ponderar_especies,
+        "pool_coordenadas": args.pool_coordenadas,
+        "particionar_por": args.particionar_por,
+        "tamano_bloque": args.tamano_bloque,
+    }
+    if not (args.reanudar or args.agregar):
+        return PuntoControl(**configuracion, objetivo=args.registros) if args.punto_control else None
+
+    try:
+        punto = PuntoControl.cargar(ruta_punto_control(salida))
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+
+    distintos = [opcion for opcion, valor in configuracion.items() if getattr(punto, opcion) != valor]
+    if distintos:
+        parser.error(f"Los argumentos no coinciden con el punto de control: {', '.join(distintos)}.")
+    if args.agregar:
+        if not punto.completo:
+            parser.error("La corrida guardada no terminó; complétela con --reanudar antes de usar --agregar.")
+        punto.objetivo += args.registros
+    return punto
+
+
+def reportar_progreso(total: int):
+    """Progreso en vivo por stderr: filas, filas/s, bytes escritos y tiempo restante estimado"""
+
+    def reportar(progreso: ProgresoEscritura) -> None:
+        restantes = progreso.segundos_restantes(total)
+        eta = f"{restantes:,.1f} s" if restantes is not None else "?"
+        print(
+            f"\r{progreso.filas:,}/{total:,} filas | {progreso.filas_por_segundo:,.0f} filas/s | "
+            f"{formatear_bytes(progreso.bytes_escritos)} | ETA {eta}   ",
+            end="" if progreso.filas < total else "\n",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    return reportar
+
+
+def cronometrar(bloques: Iterable[pd.DataFrame], tiempos: Dict[str, float], etapa: str) -> Iterator[pd.DataFrame]:
+    """Acumula en `tiempos[etapa]` el tiempo que se espera por cada bloque"""
+
+    iterador = iter(bloques)
+    while True:
+        inicio = time.perf_counter()
+        try:
+            bloque = next(iterador)
+        except StopIteration:
+            tiempos[etapa] += time.perf_counter() - inicio
+            return
+        tiempos[etapa] += time.perf_counter() - inicio
+        yield bloque
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = construir_parser()
+    args = parser.parse_args(argv)
+    validar_argumentos(parser, args)
+    salida = args.salida or OUTPUT_FILE + ("" if args.particionar_por else EXTENSIONES[args.formato])
+    punto = preparar_punto_control(parser, args, salida)
+
+    tiempos = {"inicializacion": 0.0, "generacion": 0.0, "escritura": 0.0}
+    inicio = time.perf_counter()
+
+    generator = data_generator.TreeDataGenerator(
+        semilla=args.semilla,
+        modo=args.modo,
+        ponderar_especies=args.ponderar_especies,
+        pool_coordenadas=args.pool_coordenadas,
+    )
+    if punto is not None and punto.generador:
+        generator.restaurar(punto.generador)
+    tiempos["inicializacion"] = time.perf_counter() - inicio
+
+    cantidad = punto.restantes if punto is not None else args.registros
+    if args.procesos is not None:
+        bloques = generator.generar_en_paralelo(cantidad, args.procesos, args.tamano_bloque, args.compacto)
+    else:
+        bloques = generator.generar_por_bloques(
+            cantidad, args.tamano_bloque, args.compacto, args.motor, id_inicial=generator.siguiente_id
+        )
+
+    opciones = {"reportar": None if args.silencioso else reportar_progreso(cantidad)}
+    if args.formato != "csv":
+        opciones.update(
+            particionar_por=args.particionar_por,
+            compresion=args.compresion,
+            tamano_grupo_filas=args.tamano_grupo_filas,
+        )
+
+    if punto is not None:
+        # La salida vuelve al último bloque confirmado y cada bloque nuevo se confirma tras escribirse
+        preparar_salida(punto, salida)
+        punto.generador = generator.estado()
+        punto.guardar(ruta_punto_control(salida))
+        opciones["reportar"] = registrar_bloques(
+            punto, ruta_punto_control(salida), generator.estado, opciones["reportar"]
+        )
+        opciones.update({"anexar": True} if args.formato == "csv" else {"primer_bloque": punto.bloques})
+
+    inicio_escritura = time.perf_counter()
+    progreso = escribir(cronometrar(bloques, tiempos, "generacion"), salida, args.formato, **opciones)
+    tiempos["escritura"] = time.perf_counter() - inicio_escritura - tiempos["generacion"]
+    tiempos["total"] = time.perf_counter() - inicio
+
+    resumen = {
+        "salida": salida,
+        "formato": args.formato,
+        "motor": args.motor,
+        "modo": args.modo,
+        "semilla": args.semilla,
+        "procesos": args.procesos,
+        "tamano_bloque": args.tamano_bloque,
+        "filas": progreso.filas,
+        "filas_totales": punto.filas if punto is not None else progreso.filas,
+        "punto_control": ruta_punto_control(salida) if punto is not None else None,
+        "bytes": progreso.bytes_escritos,
+        "filas_por_segundo": progreso.filas / tiempos["total"] if tiempos["total"] > 0 else 0.0,
+        "segundos": {etapa: round(segundos, 6) for etapa, segundos in tiempos.items()},
+        "perfil": generator.perfilador.resumen(),
+    }
+
+    texto = json.dumps(resumen, indent=2, ensure_ascii=False)
+    print(texto)
+    if args.resumen:
+        directorio = os.path.dirname(args.resumen)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(args.resumen, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+
+    return resumen
+
 
 if __name__ == "__main__":
-    # Configuración
-    NUM_REGISTROS = 2000
-    OUTPUT_FILE = "data/arboles_bogota.csv"
-
-    # Crear directorio si no existe
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-
-    # Generar datos
-    print("Generando datos...")
-    generator = data_generator.TreeDataGenerator()
-    df = generator.generar_dataset(NUM_REGISTROS)
-    print(df.head())
-
-    # Save to CSV
-    df.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
-    print("Datos generados exitosamente!")
-    print(f"Archivo generado: {OUTPUT_FILE}")
-    print(f"Registros creados: {len(df):,}")
+    main()
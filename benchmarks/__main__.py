@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+from typing import List, Optional
+from benchmarks.casos import GRUPOS, TAMANOS
+from benchmarks.suite import RUTA_LINEAS_BASE, UMBRAL_REGRESION, cargar, comparar, guardar
+
+
+def ejecutar(args: argparse.Namespace) -> int:
+    grupos = args.grupos or list(GRUPOS)
+    tamanos = TAMANOS["rapido" if args.rapido else "completo"]
+
+    resultados = []
+    for grupo in grupos:
+        for resultado in GRUPOS[grupo](tamanos, args.repeticiones):
+            print(f"{resultado.nombre:<45} {resultado.por_segundo:>16,.0f} {resultado.unidad}/s")
+            resultados.append(resultado)
+
+    guardar(resultados, args.salida)
+    print(f"\nResultados guardados en {args.salida}")
+    return 0
+
+
+def ejecutar_comparacion(args: argparse.Namespace) -> int:
+    comparaciones = comparar(cargar(args.base), cargar(args.actual))
+    regresiones = [c for c in comparaciones if c.es_regresion(args.umbral)]
+
+    for c in comparaciones:
+        marca = "REGRESION" if c.es_regresion(args.umbral) else ""
+        print(f"{c.nombre:<45} {c.base:>14,.0f} -> {c.actual:>14,.0f} {c.cambio:>+8.1%} {marca}")
+
+    print(f"\n{len(regresiones)} regresiones de más de {args.umbral:.0%} en {len(comparaciones)} casos")
+    return 1 if regresiones else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks del generador de árboles.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    correr = subparsers.add_parser("run", help="Ejecuta los benchmarks y guarda los resultados en JSON")
+    correr.add_argument("-g", "--grupos", nargs="+", choices=list(GRUPOS), help="Grupos a ejecutar (por defecto todos)")
+    correr.add_argument("-o", "--salida", default=os.path.join(RUTA_LINEAS_BASE, "actual.json"))
+    correr.add_argument("-r", "--repeticiones", type=int, default=3)
+    correr.add_argument("--rapido", action="store_true", help="Tamaños reducidos para una verificación rápida")
+    correr.set_defaults(funcion=ejecutar)
+
+    comparacion = subparsers.add_parser("compare", help="Compara dos archivos de resultados")
+    comparacion.add_argument("base", help="Línea base: resultados guardados antes con run -o")
+    comparacion.add_argument("actual", help="Resultados a evaluar")
+    comparacion.add_argument("-u", "--umbral", type=float, default=UMBRAL_REGRESION, help="Caída relativa tolerada")
+    comparacion.set_defaults(funcion=ejecutar_comparacion)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
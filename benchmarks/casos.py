@@ -0,0 +1,177 @@
+import os
+import random
+import shutil
+import tempfile
+from typing import Callable, Dict, List
+import numpy as np
+from benchmarks.suite import Resultado, medir
+from src import data_reference
+from src.data_analysis import AgregadosArboles, agregar
+from src.data_generator import INICIO_CONTADORES_LOCALIDAD, RUTA_GEOJSON, SIGAUGenerator, TreeDataGenerator
+from src.data_reference import RUTA_DATOS, DataReference, cargar_con_cache
+from src.generate_coord import LocalidadesGeo, cargar_localidades, generar_coordenada_en_localidad
+from src.validacion import validar_bloques
+
+SEMILLA = 20240601
+
+# Tamaños de cada caso en la corrida completa y en la rápida
+TAMANOS = {
+    "completo": {"dataset": [1_000, 10_000, 100_000], "registros": 2_000, "puntos": 20_000, "sigau": 100_000},
+    "rapido": {"dataset": [1_000, 10_000], "registros": 200, "puntos": 2_000, "sigau": 10_000},
+}
+
+# Fracciones de los contadores SIGAU de cada localidad (10^12 - INICIO_CONTADORES_LOCALIDAD) ya emitidas al medir
+OCUPACIONES_SIGAU = [0.0, 0.5, 0.99]
+
+
+def casos_generador(tamanos: dict, repeticiones: int) -> List[Resultado]:
+    resultados = []
+    for cantidad in tamanos["dataset"]:
+        generador = TreeDataGenerator(semilla=SEMILLA)
+        generador.generar_dataset(1_000)  # Calentamiento: geometrías y triangulaciones de todas las localidades
+        resultados.append(
+            medir(
+                f"generar_dataset[columnar,{cantidad}]",
+                lambda: generador.generar_dataset(cantidad),
+                cantidad,
+                "filas",
+                repeticiones,
+            )
+        )
+
+    cantidad = tamanos["registros"]
+    resultados.append(
+        medir(
+            f"generar_dataset[registros,{cantidad}]",
+            lambda: generador.generar_dataset(cantidad, motor="registros"),
+            cantidad,
+            "filas",
+            repeticiones,
+        )
+    )
+    return resultados
+
+
+def casos_coordenadas(tamanos: dict, repeticiones: int) -> List[Resultado]:
+    geo = cargar_localidades(RUTA_GEOJSON)
+    rng = np.random.default_rng(SEMILLA)
+    cantidad = tamanos["puntos"]
+
+    resultados = []
+    for nombre in sorted(geo.poligonos):
+        geo.muestrear(nombre, 10, rng)  # La triangulación se calcula fuera del tiempo medido
+        resultados.append(
+            medir(
+                f"muestrear[{nombre}]", lambda: geo.muestrear(nombre, cantidad, rng), cantidad, "puntos", repeticiones
+            )
+        )
+
+    # Camino escalar por rechazo, un punto por llamada
+    random.seed(SEMILLA)
+    escalares = max(cantidad // 20, 1)
+    resultados.append(
+        medir(
+            "generar_coordenada_en_localidad[BOSA]",
+            lambda: [generar_coordenada_en_localidad(RUTA_GEOJSON, "BOSA") for _ in range(escalares)],
+            escalares,
+            "puntos",
+            repeticiones,
+        )
+    )
+
+    # Geocodificación inversa de puntos uniformes en la caja de Bogotá (una parte cae fuera de toda localidad)
+    minx, miny, maxx, maxy = np.array([geo.limites[nombre] for nombre in geo.poligonos]).T
+    consultas = cantidad * 10
+    latitudes = rng.uniform(miny.min(), maxy.max(), consultas)
+    longitudes = rng.uniform(minx.min(), maxx.max(), consultas)
+    resultados.append(
+        medir("localizar", lambda: geo.localizar(latitudes, longitudes), consultas, "puntos", repeticiones)
+    )
+    return resultados
+
+
+def casos_sigau(tamanos: dict, repeticiones: int) -> List[Resultado]:
+    cantidad = tamanos["sigau"]
+    codigos = np.random.default_rng(SEMILLA).integers(1, 20, cantidad)
+
+    resultados = []
+    for ocupacion in OCUPACIONES_SIGAU:
+        generador = SIGAUGenerator(clave=SEMILLA)
+
+        def ocupar():
+            inicial = int(ocupacion * (10**12 - INICIO_CONTADORES_LOCALIDAD))
+            generador.contadores = {codigo: inicial for codigo in range(1, 20)}
+
+        resultados.append(
+            medir(
+                f"sigau_lote[ocupacion={ocupacion}]",
+                lambda: generador.generar_lote(codigos),
+                cantidad,
+                "codigos",
+                repeticiones,
+                ocupar,
+            )
+        )
+
+        escalares = codigos[: cantidad // 10].tolist()
+        resultados.append(
+            medir(
+                f"sigau_escalar[ocupacion={ocupacion}]",
+                lambda: [generador.generar(codigo) for codigo in escalares],
+                len(escalares),
+                "codigos",
+                repeticiones,
+                ocupar,
+            )
+        )
+    return resultados
+
+
+def casos_referencia(tamanos: dict, repeticiones: int) -> List[Resultado]:
+    ruta_especies = os.path.join(RUTA_DATOS, "info_especies.csv")
+    directorio_cache = tempfile.mkdtemp()
+    ruta_cache_original = data_reference.RUTA_CACHE
+
+    try:
+        data_reference.RUTA_CACHE = directorio_cache
+        cargar_con_cache(ruta_especies, DataReference.csv_a_diccionario)
+        return [
+            medir(
+                "referencia[csv_especies]",
+                lambda: DataReference.csv_a_diccionario(ruta_especies),
+                1,
+                "cargas",
+                repeticiones,
+            ),
+            medir(
+                "referencia[cache_especies]",
+                lambda: cargar_con_cache(ruta_especies, DataReference.csv_a_diccionario),
+                1,
+                "cargas",
+                repeticiones,
+            ),
+            medir("referencia[geojson]", lambda: LocalidadesGeo(RUTA_GEOJSON), 1, "cargas", repeticiones),
+        ]
+    finally:
+        data_reference.RUTA_CACHE = ruta_cache_original
+        shutil.rmtree(directorio_cache, ignore_errors=True)
+
+
+def casos_analisis(tamanos: dict, repeticiones: int) -> List[Resultado]:
+    cantidad = tamanos["dataset"][-1]
+    df = TreeDataGenerator(semilla=SEMILLA).generar_dataset(cantidad)
+    bloques = [df.iloc[inicio : inicio + 10_000] for inicio in range(0, cantidad, 10_000)]
+    return [
+        medir(f"analisis[{cantidad}]", lambda: AgregadosArboles.desde_bloque(df), cantidad, "filas", repeticiones),
+        medir(f"analisis_por_bloques[{cantidad}]", lambda: agregar(bloques), cantidad, "filas", repeticiones),
+        medir(f"validacion[{cantidad}]", lambda: validar_bloques(bloques), cantidad, "filas", repeticiones),
+    ]
+
+
+GRUPOS: Dict[str, Callable[[dict, int], List[Resultado]]] = {
+    "generador": casos_generador,
+    "coordenadas": casos_coordenadas,
+    "sigau": casos_sigau,
+    "referencia": casos_referencia,
+    "analisis": casos_analisis,
+}
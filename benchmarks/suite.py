@@ -0,0 +1,96 @@
+import json
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Directorio donde se guardan las líneas base por defecto
+RUTA_LINEAS_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lineas_base")
+
+# Caída relativa de rendimiento a partir de la cual se reporta una regresión
+UMBRAL_REGRESION = 0.10
+
+
+@dataclass
+class Resultado:
+    """Rendimiento de un caso: `unidades` procesadas por segundo, con el mejor de varios intentos"""
+
+    nombre: str
+    unidad: str
+    por_segundo: float
+    segundos: float
+    repeticiones: int
+
+
+@dataclass
+class Comparacion:
+    nombre: str
+    base: float
+    actual: float
+
+    @property
+    def cambio(self) -> float:
+        """Cambio relativo de rendimiento (positivo es más rápido)"""
+
+        return self.actual / self.base - 1 if self.base > 0 else 0.0
+
+    def es_regresion(self, umbral: float = UMBRAL_REGRESION) -> bool:
+        return self.cambio < -umbral
+
+
+def medir(
+    nombre: str,
+    funcion: Callable[[], object],
+    unidades: int,
+    unidad: str,
+    repeticiones: int = 3,
+    preparar: Optional[Callable[[], object]] = None,
+) -> Resultado:
+    """
+    Ejecuta `funcion` `repeticiones` veces y se queda con el intento más rápido, que es el menos afectado por
+    el ruido de otros procesos. `preparar` se llama antes de cada intento, fuera del tiempo medido.
+    """
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+
+    return Resultado(nombre, unidad, unidades / mejor if mejor > 0 else float("inf"), mejor, repeticiones)
+
+
+def a_json(resultados: List[Resultado]) -> dict:
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "resultados": {resultado.nombre: asdict(resultado) for resultado in resultados},
+    }
+
+
+def guardar(resultados: List[Resultado], ruta: str) -> None:
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(a_json(resultados), archivo, indent=2, ensure_ascii=False)
+        archivo.write("\n")
+
+
+def cargar(ruta: str) -> Dict[str, float]:
+    """Rendimiento por caso de un archivo de resultados"""
+
+    with open(ruta, encoding="utf-8") as archivo:
+        datos = json.load(archivo)
+    return {nombre: resultado["por_segundo"] for nombre, resultado in datos["resultados"].items()}
+
+
+def comparar(base: Dict[str, float], actual: Dict[str, float]) -> List[Comparacion]:
+    """Compara los casos presentes en ambas corridas"""
+
+    return [Comparacion(nombre, base[nombre], actual[nombre]) for nombre in base if nombre in actual]
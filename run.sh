@@ -1,2 +1,4 @@
 #!/bin/bash
-python3 -m app 3,6,-1,-2,-4,10,-1000,0,23,8,7 6
\ No newline at end of file
+# Ejemplo: 100.000 árboles reproducibles en Parquet, generados con 4 procesos.
+# Ver todas las opciones con: python3 -m app --help
+python3 -m app --registros 100000 --semilla 42 --formato parquet --procesos 4 --resumen data/resumen.json "$@"
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pickle
+from typing import Any, Optional
+from src.data_reference import RUTA_CACHE
+
+RUTA_CACHE_RESULTADOS = os.path.join(RUTA_CACHE, "resultados")
+
+# Tamaño máximo de la caché en disco; al superarlo se borran primero las entradas usadas hace más tiempo
+LIMITE_CACHE = int(os.environ.get("ALDA_CACHE_RESULTADOS_MB", "1024")) * 2**20
+
+_BLOQUE_LECTURA = 2**20
+
+
+def hash_archivo(ruta: str, hasta: Optional[int] = None) -> "hashlib._Hash":
+    """SHA-256 (objeto hashlib) del contenido del archivo, o de sus primeros `hasta` bytes, leído por bloques"""
+
+    sha = hashlib.sha256()
+    restantes = os.path.getsize(ruta) if hasta is None else hasta
+    with open(ruta, "rb") as archivo:
+        while restantes > 0:
+            bloque = archivo.read(min(_BLOQUE_LECTURA, restantes))
+            if not bloque:
+                break
+            sha.update(bloque)
+            restantes -= len(bloque)
+    return sha
+
+
+def clave(*partes: str) -> str:
+    """Clave de contenido: hash de las partes que determinan un resultado"""
+
+    return hashlib.sha256("\0".join(partes).encode()).hexdigest()
+
+
+class CacheResultados:
+    """
+    Resultados serializados con pickle en disco, direccionados por una clave de contenido.
+    Leer una entrada actualiza su fecha de modificación, que se usa para desalojar las menos recientes
+    cuando la caché supera `limite_bytes`. Los errores de escritura se ignoran: la caché es opcional.
+    """
+
+    def __init__(self, directorio: str = RUTA_CACHE_RESULTADOS, limite_bytes: int = LIMITE_CACHE):
+        self.directorio = directorio
+        self.limite_bytes = limite_bytes
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.pickle")
+
+    def obtener(self, clave: str) -> Optional[Any]:
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, "rb") as archivo:
+                valor = pickle.load(archivo)
+            os.utime(ruta)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return valor
+
+    def guardar(self, clave: str, valor: Any) -> None:
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            temporal = f"{self._ruta(clave)}.{os.getpid()}.tmp"
+            with open(temporal, "wb") as archivo:
+                pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, self._ruta(clave))
+            self.desalojar()
+        except OSError:
+            pass
+
+    def tamano(self) -> int:
+        return sum(os.path.getsize(ruta) for ruta, _ in self._entradas())
+
+    def desalojar(self) -> None:
+        """Borra las entradas menos recientes hasta que la caché quede dentro del límite"""
+
+        entradas = sorted(self._entradas(), key=lambda entrada: entrada[1].st_mtime_ns)
+        total = sum(estado.st_size for _, estado in entradas)
+        for ruta, estado in entradas:
+            if total <= self.limite_bytes:
+                break
+            try:
+                os.remove(ruta)
+                total -= estado.st_size
+            except OSError:
+                pass
+
+    def _entradas(self):
+        try:
+            nombres = os.listdir(self.directorio)
+        except OSError:
+            return []
+
+        entradas = []
+        for nombre in nombres:
+            if nombre.endswith(".pickle"):
+                ruta = os.path.join(self.directorio, nombre)
+                try:
+                    entradas.append((ruta, os.stat(ruta)))
+                except OSError:
+                    pass
+        return entradas
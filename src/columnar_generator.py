@@ -0,0 +1,333 @@
+import math
+import zlib
+from dataclasses import dataclass, fields, replace
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+import numpy as np
+import pandas as pd
+from src.perfilador import Perfilador, perfilador_o_inactivo
+from src.samplers import Muestreadores
+from src.schema import TIPOS_NUMERICOS, tipos_compactos
+
+if TYPE_CHECKING:
+    from src.data_generator import DataConfig, SIGAUGenerator
+    from src.generate_coord import LocalidadesGeo
+
+# Orden de las 31 columnas del dataset, igual al de TreeDataGenerator.generar_arbol
+COLUMNAS = [
+    "ID",
+    "Anio",
+    "IVP",
+    "Salario Minimo",
+    "Concepto",
+    "TipoCT",
+    "Consecutivo",
+    "SIGAU",
+    "Especie",
+    "Tratamiento",
+    "Espacio",
+    "Emplazamiento",
+    "Estrato",
+    "Localidad",
+    "Latitud",
+    "Longitud",
+    "PAP",
+    "DAP",
+    "Altura Total",
+    "Altura Comercial",
+    "Diam. Copa Polar",
+    "Diam. Copa Ecuatorial",
+    "Perimetro basal",
+    "Estado fuste",
+    "Estado Copa",
+    "Estado Raiz",
+    "Estado FitoSanitario",
+    "Estado General",
+    "Riesgo",
+    "Interes patrimonial",
+    "Autorizado",
+]
+
+
+def enteros_a_texto(valores: np.ndarray, ancho: int) -> np.ndarray:
+    """Formatea enteros no negativos como texto de ancho fijo con ceros a la izquierda"""
+
+    potencias = 10 ** np.arange(ancho - 1, -1, -1, dtype=np.int64)
+    digitos = (np.asarray(valores, dtype=np.int64)[:, None] // potencias % 10 + ord("0")).astype(np.uint8)
+    return digitos.view(f"S{ancho}").ravel().astype(f"U{ancho}")
+
+
+@dataclass
+class TablasColumnares:
+    """Datos de referencia de DataConfig convertidos en arreglos indexables por posición"""
+
+    # Especies: nombre y límites de medidas, indexados por la especie sorteada
+    especies: np.ndarray
+    min_pap: np.ndarray
+    max_pap: np.ndarray
+    min_alturatotal: np.ndarray
+    max_alturatotal: np.ndarray
+    min_diamcopamayor: np.ndarray
+    max_diamcopamayor: np.ndarray
+    min_diamcopamenor: np.ndarray
+    max_diamcopamenor: np.ndarray
+
+    # Tratamientos: estados (fuste, copa, raíz, fito) y sus derivados, indexados por tratamiento
+    tratamientos: np.ndarray
+    estados: np.ndarray
+    estado_general: np.ndarray
+    riesgo: np.ndarray
+
+    # Valores anuales indexados por año
+    anios: np.ndarray
+    ivp: np.ndarray
+    salario_minimo: np.ndarray
+
+    codigos_localidad: np.ndarray
+    localidades: np.ndarray
+    tipos_ct: np.ndarray
+    espacios: np.ndarray
+    emplazamientos: np.ndarray
+    autorizados: np.ndarray
+    interes_patrimonial: np.ndarray
+
+    # Tablas de alias para sortear los índices de cada campo categórico
+    muestreadores: Muestreadores
+
+    # Tipos de las columnas en el esquema compacto (ver src.schema)
+    tipos_compactos: Dict[str, Any]
+
+    @classmethod
+    def desde_config(cls, config: "DataConfig", ponderar_especies: bool = False) -> "TablasColumnares":
+        muestreadores = Muestreadores.desde_config(config, ponderar_especies)
+        especies = list(config.especies.values())
+
+        def columna(campo: str) -> np.ndarray:
+            return np.array([especie[campo] for especie in especies], dtype=np.float64)
+
+        estados = np.array(
+            [[t["est_fuste"], t["est_copa"], t["est_raiz"], t["est_fito"]] for t in config.tratamientos.values()],
+            dtype=np.int64,
+        )
+        promedios = [math.floor(fila.sum() / 4) for fila in estados]
+
+        anios = sorted(config.valores_anuales)
+
+        return cls(
+            especies=np.array([especie["nombre_comun"] for especie in especies], dtype=object),
+            min_pap=columna("min_pap"),
+            max_pap=columna("max_pap"),
+            min_alturatotal=columna("min_alturatotal"),
+            max_alturatotal=columna("max_alturatotal"),
+            min_diamcopamayor=columna("min_diamcopamayor"),
+            max_diamcopamayor=columna("max_diamcopamayor"),
+            min_diamcopamenor=columna("min_diamcopamenor"),
+            max_diamcopamenor=columna("max_diamcopamenor"),
+            tratamientos=np.array(list(config.tratamientos), dtype=object),
+            estados=estados,
+            estado_general=np.array([config.estados_generales[p] for p in promedios], dtype=object),
+            riesgo=np.array([config.riesgos[p] for p in promedios], dtype=object),
+            anios=np.array(anios, dtype=np.int64),
+            ivp=np.array([config.valores_anuales[a]["ivp"] for a in anios], dtype=np.float64),
+            salario_minimo=np.array([config.valores_anuales[a]["salario_minimo"] for a in anios], dtype=np.int64),
+            codigos_localidad=np.array(list(config.localidades), dtype=np.int64),
+            localidades=np.array(list(config.localidades.values()), dtype=object),
+            tipos_ct=np.array(config.tipos_ct, dtype=object),
+            espacios=np.array(config.espacios, dtype=object),
+            emplazamientos=np.array(config.emplazamientos, dtype=object),
+            autorizados=np.array(list(config.autorizados), dtype=object),
+            interes_patrimonial=np.array(muestreadores.valores_interes_patrimonial, dtype=object),
+            muestreadores=muestreadores,
+            tipos_compactos=tipos_compactos(config),
+        )
+
+    def arreglos_numericos(self) -> Dict[str, np.ndarray]:
+        """Campos que son arreglos numéricos (límites de especies, estados, valores anuales, códigos)"""
+
+        return {
+            campo.name: valor
+            for campo in fields(self)
+            if isinstance(valor := getattr(self, campo.name), np.ndarray) and not valor.dtype.hasobject
+        }
+
+    def con_arreglos(self, arreglos: Dict[str, np.ndarray]) -> "TablasColumnares":
+        """Copia de las tablas con esos campos reemplazados, por ejemplo por vistas de memoria compartida"""
+
+        return replace(self, **arreglos)
+
+
+class FuenteSecuencial:
+    """Aleatoriedad de un bloque consumida en secuencia desde un np.random.Generator"""
+
+    def __init__(self, rng: np.random.Generator, id_inicial: int, cantidad: int):
+        self.rng = rng
+        self.ids = np.arange(id_inicial, id_inicial + cantidad, dtype=np.int64)
+
+    def uniformes(self, campo: str) -> np.ndarray:
+        return self.rng.random(len(self.ids))
+
+    def enteros(self, campo: str, bajo: int, alto: int) -> np.ndarray:
+        return self.rng.integers(bajo, alto, len(self.ids))
+
+    def coordenadas(
+        self,
+        localidades_geo: "LocalidadesGeo",
+        codigos: np.ndarray,
+        localidades: Dict[int, str],
+        perfilador: Optional[Perfilador] = None,
+    ):
+        return localidades_geo.muestrear_por_codigo(codigos, localidades, self.rng, perfilador=perfilador)
+
+
+class FuenteContador:
+    """
+    Aleatoriedad basada en contador: cada valor del árbol i sale de un hash de (clave, campo, i).
+    Cualquier fila o rango de IDs se puede regenerar sin producir las filas anteriores.
+    """
+
+    def __init__(self, clave: int, ids: np.ndarray):
+        self.clave = np.uint64(clave)
+        self.ids = np.asarray(ids, dtype=np.int64)
+
+    def _bits(self, campo: str) -> np.ndarray:
+        clave_campo = mezclar64(np.array([self.clave ^ np.uint64(zlib.crc32(campo.encode()))], dtype=np.uint64))
+        return mezclar64(self.ids.astype(np.uint64) ^ clave_campo)
+
+    def uniformes(self, campo: str) -> np.ndarray:
+        # Los 53 bits altos dan un doble uniforme en [0, 1)
+        return (self._bits(campo) >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+    def enteros(self, campo: str, bajo: int, alto: int) -> np.ndarray:
+        return bajo + (self.uniformes(campo) * (alto - bajo)).astype(np.int64)
+
+    def coordenadas(
+        self,
+        localidades_geo: "LocalidadesGeo",
+        codigos: np.ndarray,
+        localidades: Dict[int, str],
+        perfilador: Optional[Perfilador] = None,
+    ):
+        uniformes = np.stack([self.uniformes(f"coordenada_{i}") for i in range(3)])
+        return localidades_geo.muestrear_por_codigo(codigos, localidades, uniformes=uniformes, perfilador=perfilador)
+
+
+def mezclar64(x: np.ndarray) -> np.ndarray:
+    """Finalizador de splitmix64: mezcla cada entero de 64 bits en uno pseudoaleatorio"""
+
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def generar_columnas(
+    tablas: TablasColumnares,
+    fuente: Union[FuenteSecuencial, FuenteContador],
+    localidades_geo: "LocalidadesGeo",
+    sigau_gen: "SIGAUGenerator",
+    compacto: bool = False,
+    perfilador: Optional[Perfilador] = None,
+) -> pd.DataFrame:
+    """
+    Genera un árbol por cada ID de la fuente, columna por columna con operaciones vectorizadas de NumPy.
+    El SIGAU de cada árbol codifica su ID, que es único en todo el dataset.
+    Con `compacto` el resultado usa el esquema de src.schema: categóricas armadas desde los índices
+    sorteados, sin pasar por texto, y tipos numéricos estrechos.
+    `perfilador` acumula el tiempo de cada etapa del bloque.
+    """
+    perfilador = perfilador_o_inactivo(perfilador)
+    muestreadores = tablas.muestreadores
+
+    def texto(columna: str, valores: np.ndarray, indices: np.ndarray):
+        if not compacto:
+            return valores[indices]
+        tipo = tablas.tipos_compactos[columna]
+        return pd.Categorical.from_codes(tipo.categories.get_indexer(valores)[indices], dtype=tipo)
+
+    def sortear(campo: str) -> np.ndarray:
+        return getattr(muestreadores, campo).desde_uniformes(fuente.uniformes(campo))
+
+    # Índices sorteados sobre cada tabla de referencia
+    with perfilador.etapa("sorteo_categorias"):
+        idx_anio = sortear("anios")
+        idx_especie = sortear("especies")
+        idx_tratamiento = sortear("tratamientos")
+        idx_localidad = sortear("localidades")
+        consecutivo = fuente.enteros("consecutivo", 0, 100000)
+
+    def entre(campo: str, bajo: np.ndarray, alto: np.ndarray) -> np.ndarray:
+        return np.round(bajo + (alto - bajo) * fuente.uniformes(campo), 2)
+
+    # Medidas de la especie: uniformes entre los límites de cada especie sorteada
+    with perfilador.etapa("medidas_especie"):
+        pap = entre("pap", tablas.min_pap[idx_especie], tablas.max_pap[idx_especie])
+        altura_total = entre("altura_total", tablas.min_alturatotal[idx_especie], tablas.max_alturatotal[idx_especie])
+        altura_comercial = entre("altura_comercial", 0, altura_total)
+        diam_copa_mayor = entre(
+            "diam_copa_mayor", tablas.min_diamcopamayor[idx_especie], tablas.max_diamcopamayor[idx_especie]
+        )
+        diam_copa_menor = entre(
+            "diam_copa_menor", tablas.min_diamcopamenor[idx_especie], tablas.max_diamcopamenor[idx_especie]
+        )
+
+    codigos_localidad = tablas.codigos_localidad[idx_localidad]
+    with perfilador.etapa("coordenadas"):
+        latitudes, longitudes = fuente.coordenadas(
+            localidades_geo,
+            codigos_localidad,
+            dict(zip(tablas.codigos_localidad.tolist(), tablas.localidades)),
+            perfilador if perfilador.activo else None,
+        )
+
+    with perfilador.etapa("sigau"):
+        sigau = sigau_gen.codificar_ids(codigos_localidad, fuente.ids)
+    perfilador.contar("sigau_emitidos", len(sigau))
+
+    anios = tablas.anios[idx_anio]
+    texto_consecutivo = enteros_a_texto(consecutivo, 5)
+    estados = tablas.estados[idx_tratamiento]
+
+    # Textos, categóricas y sorteos de los campos que no intervienen en otros cálculos
+    with perfilador.etapa("dataframe"):
+        columnas = {
+            "ID": fuente.ids,
+            "Anio": anios,
+            "IVP": tablas.ivp[idx_anio],
+            "Salario Minimo": tablas.salario_minimo[idx_anio],
+            "Concepto": np.char.add(np.char.add(anios.astype("U4"), "EE"), texto_consecutivo),
+            "TipoCT": texto("TipoCT", tablas.tipos_ct, sortear("tipos_ct")),
+            "Consecutivo": np.char.add("SSFFS-", texto_consecutivo),
+            "SIGAU": sigau,
+            "Especie": texto("Especie", tablas.especies, idx_especie),
+            "Tratamiento": texto("Tratamiento", tablas.tratamientos, idx_tratamiento),
+            "Espacio": texto("Espacio", tablas.espacios, sortear("espacios")),
+            "Emplazamiento": texto("Emplazamiento", tablas.emplazamientos, sortear("emplazamientos")),
+            "Estrato": fuente.enteros("estrato", 1, 7),
+            "Localidad": texto("Localidad", tablas.localidades, idx_localidad),
+            "Latitud": latitudes,
+            "Longitud": longitudes,
+            "PAP": pap,
+            "DAP": np.round(pap * math.pi, 2),
+            "Altura Total": altura_total,
+            "Altura Comercial": altura_comercial,
+            "Diam. Copa Polar": diam_copa_mayor,
+            "Diam. Copa Ecuatorial": diam_copa_menor,
+            "Perimetro basal": np.round(pap * math.pi * 1.1, 2),
+            "Estado fuste": estados[:, 0],
+            "Estado Copa": estados[:, 1],
+            "Estado Raiz": estados[:, 2],
+            "Estado FitoSanitario": estados[:, 3],
+            "Estado General": texto("Estado General", tablas.estado_general, idx_tratamiento),
+            "Riesgo": texto("Riesgo", tablas.riesgo, idx_tratamiento),
+            "Interes patrimonial": texto(
+                "Interes patrimonial", tablas.interes_patrimonial, sortear("interes_patrimonial")
+            ),
+            "Autorizado": texto("Autorizado", tablas.autorizados, sortear("autorizados")),
+        }
+
+        df = pd.DataFrame(columnas, columns=COLUMNAS)
+        if compacto:
+            df = df.astype(TIPOS_NUMERICOS)
+
+    perfilador.contar("filas", len(df))
+    return df
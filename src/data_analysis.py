@@ -1,40 +1,402 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import reduce
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.io as pio
-import statsmodels.api as sm
-
-pio.renderers.default = "browser"
-
-# Configuración inicial
-pd.set_option("display.max_columns", None)
-plt.style.use("ggplot")
-
-# Cargar los datos
-try:
-    df = pd.read_csv("data/arboles_bogota.csv")
-except FileNotFoundError:
-    raise FileNotFoundError("El archivo 'data/arboles_bogota.csv' no se encontró.")
-
-# Validar que el DataFrame no esté vacío
-if df.empty:
-    raise ValueError("El archivo CSV está vacío.")
-
-## 1. Análisis General
-print(f"Total de registros: {len(df)}")
-print(f"Columnas disponibles: {list(df.columns)}")
-print("\nResumen estadístico:")
-print(df.describe(include="all").T)
-
-## 2. Visualizaciones
-
-# 2.1 Distribución por Localidad
-if "Localidad" in df.columns:
-    localidad_counts = df["Localidad"].value_counts().reset_index()
+from src.cache_resultados import CacheResultados, clave, hash_archivo
+from src.estadisticas import EstadisticasNumericas
+from src.mapa import NIVELES_ZOOM, PRESUPUESTO_PUNTOS, BinesPorZoom, MuestraAleatoria, datos_mapa
+
+RUTA_DATOS = "data/arboles_bogota.csv"
+
+# Filas por bloque al leer y tamaño de la muestra usada por las gráficas que necesitan puntos individuales
+TAMANO_BLOQUE = 500_000
+TAMANO_MUESTRA = PRESUPUESTO_PUNTOS
+
+ESTADOS = ["Estado fuste", "Estado Copa", "Estado Raiz", "Estado FitoSanitario"]
+MEDIDAS = ["PAP", "DAP", "Altura Total", "Altura Comercial", "Diam. Copa Polar", "Diam. Copa Ecuatorial"]
+
+# Columnas cuyo conteo de valores se acumula
+COLUMNAS_CONTEO = ["Localidad", "Especie", *ESTADOS, "Estrato", "Tratamiento", "Interes patrimonial", "Riesgo"]
+
+# Columnas numéricas resumidas (todas las numéricas del dataset salvo el ID)
+COLUMNAS_NUMERICAS = [
+    "Anio",
+    "IVP",
+    "Salario Minimo",
+    "Estrato",
+    "Latitud",
+    "Longitud",
+    *MEDIDAS,
+    "Perimetro basal",
+    *ESTADOS,
+]
+
+# Definición de las agregaciones, parte de la clave de la caché de resultados.
+# Cambiar la versión si cambia lo que calcula AgregadosArboles.desde_bloque.
+DEFINICION_AGREGADOS = f"AgregadosArboles/1|{COLUMNAS_CONTEO}|{COLUMNAS_NUMERICAS}"
+DEFINICION_ANALISIS = (
+    f"{DEFINICION_AGREGADOS}|BinesPorZoom/1:hex,Localidad,{NIVELES_ZOOM}|MuestraAleatoria/2:{TAMANO_MUESTRA}"
+)
+
+Resultado = TypeVar("Resultado")
+
+
+def _vacia() -> pd.Series:
+    return pd.Series(dtype="int64")
+
+
+@dataclass
+class AgregadosArboles:
+    """
+    Agregaciones fusionables del dataset: conteos por columna, suma y cantidad de alturas por especie,
+    tabla cruzada especie × riesgo y estadísticas de las columnas numéricas (ver EstadisticasNumericas).
+    Fusionar los agregados de dos bloques da lo mismo que agregar los dos bloques juntos.
+    """
+
+    filas: int = 0
+    conteos: Dict[str, pd.Series] = field(default_factory=dict)
+    suma_altura_especie: pd.Series = field(default_factory=lambda: pd.Series(dtype="float64"))
+    conteo_altura_especie: pd.Series = field(default_factory=_vacia)
+    riesgo_especie: pd.DataFrame = field(default_factory=pd.DataFrame)
+    estadisticas: EstadisticasNumericas = field(default_factory=lambda: EstadisticasNumericas([]))
+
+    @classmethod
+    def desde_bloque(cls, df: pd.DataFrame) -> "AgregadosArboles":
+        # observed=True descarta las categorías sin filas cuando el bloque viene con columnas categóricas
+        conteos = {
+            columna: df.groupby(columna, observed=True).size() for columna in COLUMNAS_CONTEO if columna in df.columns
+        }
+
+        agregados = cls(filas=len(df), conteos=conteos)
+        if {"Especie", "Altura Total"}.issubset(df.columns):
+            alturas = df.groupby("Especie", observed=True)["Altura Total"]
+            agregados.suma_altura_especie = alturas.sum()
+            agregados.conteo_altura_especie = alturas.count()
+        if {"Especie", "Riesgo"}.issubset(df.columns):
+            agregados.riesgo_especie = df.groupby(["Especie", "Riesgo"], observed=True).size().unstack(fill_value=0)
+
+        columnas = [columna for columna in COLUMNAS_NUMERICAS if columna in df.columns]
+        agregados.estadisticas = EstadisticasNumericas(columnas).agregar(df)
+        return agregados
+
+    def fusionar(self, otro: "AgregadosArboles") -> "AgregadosArboles":
+        """Agregados de la unión de los datos de `self` y `otro`"""
+
+        def sumar(a, b):
+            return a.add(b, fill_value=0).fillna(0).astype("int64")
+
+        conteos = dict(self.conteos)
+        for columna, conteo in otro.conteos.items():
+            conteos[columna] = sumar(conteos[columna], conteo) if columna in conteos else conteo
+
+        return AgregadosArboles(
+            filas=self.filas + otro.filas,
+            conteos=conteos,
+            suma_altura_especie=self.suma_altura_especie.add(otro.suma_altura_especie, fill_value=0),
+            conteo_altura_especie=sumar(self.conteo_altura_especie, otro.conteo_altura_especie),
+            riesgo_especie=sumar(self.riesgo_especie, otro.riesgo_especie),
+            estadisticas=self.estadisticas.fusionar(otro.estadisticas),
+        )
+
+    def conteo(self, columna: str, normalizar: bool = False) -> pd.Series:
+        """Cantidad de árboles por valor de la columna, de mayor a menor (como value_counts)"""
+
+        conteo = self.conteos.get(columna, _vacia()).sort_values(ascending=False, kind="stable")
+        conteo.index.name = columna
+        return (conteo / self.filas).rename("proportion") if normalizar else conteo.rename("count")
+
+    def altura_media_por_especie(self) -> pd.Series:
+        return (self.suma_altura_especie / self.conteo_altura_especie).rename("Altura Total")
+
+    def resumen_numerico(self) -> pd.DataFrame:
+        """Conteo, media, desviación, mínimo, cuartiles aproximados y máximo de cada columna numérica"""
+
+        return self.estadisticas.resumen()
+
+
+def agregar(bloques: Iterable[pd.DataFrame]) -> AgregadosArboles:
+    """Agrega una secuencia de bloques manteniendo en memoria solo el bloque actual"""
+
+    agregados = AgregadosArboles()
+    for bloque in bloques:
+        agregados = agregados.fusionar(AgregadosArboles.desde_bloque(bloque))
+    return agregados
+
+
+def _formato_columnar(ruta: str) -> Optional[str]:
+    """Formato de pyarrow.dataset para un archivo o directorio Parquet/Feather; None si es CSV"""
+
+    if os.path.isdir(ruta):
+        for _, _, archivos in os.walk(ruta):
+            for archivo in archivos:
+                formato = _formato_columnar(archivo)
+                if formato is not None:
+                    return formato
+        raise ValueError(f"El directorio '{ruta}' no contiene archivos Parquet ni Feather.")
+
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".parquet":
+        return "parquet"
+    if extension in (".feather", ".arrow", ".ipc"):
+        return "ipc"
+    return None
+
+
+def leer_por_bloques(
+    ruta: str, tamano_bloque: int = TAMANO_BLOQUE, columnas: Optional[Sequence[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Lee un CSV, un archivo Parquet/Feather o un directorio particionado en DataFrames de a lo sumo
+    `tamano_bloque` filas. Con `columnas` solo se leen esas columnas.
+    """
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"El archivo '{ruta}' no se encontró.")
+
+    formato = _formato_columnar(ruta)
+    if formato is None:
+        yield from pd.read_csv(ruta, chunksize=tamano_bloque, usecols=columnas, dtype={"SIGAU": str})
+        return
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(ruta, format=formato, partitioning="hive")
+    yield from _unir_lotes(dataset.to_batches(columns=list(columnas) if columnas else None), tamano_bloque)
+
+
+def _unir_lotes(lotes: Iterable, tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    """
+    Junta los lotes de pyarrow en DataFrames de `tamano_bloque` filas (el último puede ser menor).
+    Un dataset particionado entrega lotes pequeños, uno por grupo de filas de cada archivo, y convertir cada uno
+    a pandas por separado cuesta más que procesarlo.
+    """
+    import pyarrow as pa
+
+    pendientes, filas = [], 0
+    for lote in lotes:
+        while lote.num_rows:
+            parte = lote.slice(0, tamano_bloque - filas)
+            lote = lote.slice(parte.num_rows)
+            pendientes.append(parte)
+            filas += parte.num_rows
+            if filas == tamano_bloque:
+                yield pa.Table.from_batches(pendientes).to_pandas()
+                pendientes, filas = [], 0
+    if filas:
+        yield pa.Table.from_batches(pendientes).to_pandas()
+
+
+def agregar_archivo(ruta: str, tamano_bloque: int = TAMANO_BLOQUE) -> AgregadosArboles:
+    return agregar(leer_por_bloques(ruta, tamano_bloque))
+
+
+def agregar_archivos(
+    rutas: List[str], procesos: Optional[int] = None, tamano_bloque: int = TAMANO_BLOQUE
+) -> AgregadosArboles:
+    """Agrega cada archivo (o parte) en un proceso distinto y fusiona los resultados"""
+
+    if procesos == 1 or len(rutas) <= 1:
+        parciales = [agregar_archivo(ruta, tamano_bloque) for ruta in rutas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            parciales = list(pool.map(agregar_archivo, rutas, [tamano_bloque] * len(rutas)))
+
+    return reduce(AgregadosArboles.fusionar, parciales, AgregadosArboles())
+
+
+def listar_partes(ruta: str) -> List[str]:
+    """Archivos de datos de un archivo o de un directorio (particionado o con partes), en orden estable"""
+
+    if not os.path.isdir(ruta):
+        return [ruta]
+
+    extensiones = (".csv", ".parquet", ".feather", ".arrow", ".ipc")
+    return sorted(
+        os.path.join(directorio, archivo)
+        for directorio, _, archivos in os.walk(ruta)
+        for archivo in archivos
+        if archivo.lower().endswith(extensiones)
+    )
+
+
+def leer_parte(
+    ruta: str, parte: str, tamano_bloque: int, desde_byte: int = 0, columnas: Optional[Sequence[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Bloques de una parte de `ruta`; en un CSV, `desde_byte` salta las filas anteriores a ese byte.
+    Con `columnas` solo se leen esas columnas.
+    """
+    formato = _formato_columnar(parte)
+    if formato is None:
+        opciones = {"chunksize": tamano_bloque, "usecols": columnas, "dtype": {"SIGAU": str}}
+        if desde_byte == 0:
+            yield from pd.read_csv(parte, **opciones)
+            return
+        encabezado = pd.read_csv(parte, nrows=0).columns
+        with open(parte, "rb") as archivo:
+            archivo.seek(desde_byte)
+            yield from pd.read_csv(archivo, names=encabezado, header=None, **opciones)
+        return
+
+    import pyarrow.dataset as ds
+
+    # partition_base_dir conserva las columnas codificadas en la ruta (Localidad=BOSA/...) al leer un solo archivo
+    base = ruta if os.path.isdir(ruta) else None
+    dataset = ds.dataset([parte], format=formato, partitioning="hive", partition_base_dir=base)
+    yield from _unir_lotes(dataset.to_batches(columns=list(columnas) if columnas else None), tamano_bloque)
+
+
+def _agregado_anterior(
+    parte: str,
+    anterior: Optional[dict],
+    definicion: str,
+    cache: CacheResultados,
+) -> Optional[Tuple[object, int]]:
+    """
+    Si la parte es un CSV al que solo se le agregaron filas desde `anterior` (su estado conocido), devuelve el
+    resultado en caché del contenido anterior y el byte desde el que empiezan las filas nuevas.
+    """
+    if anterior is None or _formato_columnar(parte) is not None or os.path.getsize(parte) <= anterior["tamano"]:
+        return None
+
+    with open(parte, "rb") as archivo:
+        archivo.seek(anterior["tamano"] - 1)
+        if archivo.read(1) != b"\n":
+            return None
+    if hash_archivo(parte, anterior["tamano"]).hexdigest() != anterior["sha256"]:
+        return None
+
+    base = cache.obtener(clave(definicion, anterior["sha256"]))
+    return None if base is None else (base, anterior["tamano"])
+
+
+def con_cache(
+    ruta: str,
+    definicion: str,
+    agregar_bloques: Callable[[Iterable[pd.DataFrame]], Resultado],
+    fusionar: Callable[[Resultado, Resultado], Resultado],
+    cache: Optional[CacheResultados] = None,
+    tamano_bloque: int = TAMANO_BLOQUE,
+) -> Resultado:
+    """
+    Calcula `agregar_bloques` sobre el archivo o directorio `ruta` usando una caché direccionada por contenido.
+    Cada parte se identifica por el hash SHA-256 de su contenido y su resultado se guarda por separado, así que:
+    - si nada cambió, el resultado combinado sale de la caché sin leer los datos;
+    - si se agregan partes nuevas, solo se agregan esas y se fusionan con las ya guardadas;
+    - si a un CSV solo se le agregaron filas, solo se leen las filas nuevas.
+    `definicion` identifica el cálculo: dos definiciones distintas nunca comparten resultados.
+    """
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"El archivo '{ruta}' no se encontró.")
+
+    partes = listar_partes(ruta)
+    if not partes:
+        raise ValueError(f"El directorio '{ruta}' no contiene archivos de datos.")
+
+    cache = cache if cache is not None else CacheResultados()
+    hashes, anteriores = [], []
+    for parte in partes:
+        # El hash de cada archivo se recalcula solo si cambiaron su fecha de modificación o su tamaño
+        estado = os.stat(parte)
+        clave_estado = clave("estado", os.path.abspath(parte))
+        anterior = cache.obtener(clave_estado)
+        if anterior is not None and (anterior["mtime_ns"], anterior["tamano"]) == (estado.st_mtime_ns, estado.st_size):
+            sha = anterior["sha256"]
+        else:
+            sha = hash_archivo(parte).hexdigest()
+            cache.guardar(clave_estado, {"mtime_ns": estado.st_mtime_ns, "tamano": estado.st_size, "sha256": sha})
+        hashes.append(sha)
+        anteriores.append(anterior)
+
+    clave_total = clave(definicion, *(f"{os.path.relpath(p, ruta)}:{sha}" for p, sha in zip(partes, hashes)))
+    total = cache.obtener(clave_total)
+    if total is not None:
+        return total
+
+    parciales = []
+    for parte, sha, anterior in zip(partes, hashes, anteriores):
+        clave_parcial = clave(definicion, sha)
+        parcial = cache.obtener(clave_parcial)
+        if parcial is None:
+            previo = _agregado_anterior(parte, anterior, definicion, cache)
+            if previo is not None:
+                base, desde_byte = previo
+                parcial = fusionar(base, agregar_bloques(leer_parte(ruta, parte, tamano_bloque, desde_byte)))
+            else:
+                parcial = agregar_bloques(leer_parte(ruta, parte, tamano_bloque))
+            cache.guardar(clave_parcial, parcial)
+        parciales.append(parcial)
+
+    total = reduce(fusionar, parciales)
+    cache.guardar(clave_total, total)
+    return total
+
+
+def agregar_archivo_con_cache(
+    ruta: str, cache: Optional[CacheResultados] = None, tamano_bloque: int = TAMANO_BLOQUE
+) -> AgregadosArboles:
+    """Como agregar_archivo, pero con la caché de resultados de `con_cache`"""
+
+    return con_cache(ruta, DEFINICION_AGREGADOS, agregar, AgregadosArboles.fusionar, cache, tamano_bloque)
+
+
+def agregar_analisis(bloques: Iterable[pd.DataFrame]) -> Tuple[AgregadosArboles, BinesPorZoom, MuestraAleatoria]:
+    """
+    Agregados, celdas del mapa por nivel de zoom y muestra uniforme, calculados en una sola lectura.
+    La muestra de cada llamada (cada parte, o las filas agregadas a una parte) usa claves independientes, para que
+    las muestras fusionadas sigan siendo uniformes; la caché conserva la de cada contenido.
+    """
+    agregados = AgregadosArboles()
+    bines = BinesPorZoom(por="Localidad")
+    muestra = MuestraAleatoria(TAMANO_MUESTRA)
+    for bloque in bloques:
+        agregados = agregados.fusionar(AgregadosArboles.desde_bloque(bloque))
+        bines.agregar(bloque)
+        muestra.agregar(bloque)
+    return agregados, bines, muestra
+
+
+def fusionar_analisis(a: tuple, b: tuple) -> tuple:
+    return tuple(x.fusionar(y) for x, y in zip(a, b))
+
+
+def main(ruta: str = RUTA_DATOS) -> None:
+    """Imprime el resumen del dataset y muestra las gráficas; las agregaciones recorren el archivo por bloques"""
+
+    # Las librerías de gráficas solo se importan al ejecutar el análisis completo
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    import matplotlib.pyplot as plt
+    from plotly.subplots import make_subplots
+
+    pio.renderers.default = "browser"
+
+    # Configuración inicial
+    pd.set_option("display.max_columns", None)
+    plt.style.use("ggplot")
+
+    # Una sola lectura por bloques (o ninguna si el dataset no cambió): agregados, celdas del mapa y una muestra
+    # uniforme para las gráficas que necesitan puntos individuales
+    agregados, bines, muestreo = con_cache(ruta, DEFINICION_ANALISIS, agregar_analisis, fusionar_analisis)
+
+    # Validar que el dataset no esté vacío
+    if agregados.filas == 0:
+        raise ValueError("El archivo de datos está vacío.")
+    muestra = muestreo.datos()
+
+    ## 1. Análisis General
+    print(f"Total de registros: {agregados.filas}")
+    print(f"Columnas disponibles: {list(muestra.columns)}")
+    print("\nResumen estadístico:")
+    print(agregados.resumen_numerico())
+
+    ## 2. Visualizaciones
+
+    # 2.1 Distribución por Localidad
+    localidad_counts = agregados.conteo("Localidad").reset_index()
     localidad_counts.columns = ["Localidad", "Cantidad"]
 
     fig1 = px.bar(
@@ -48,105 +410,116 @@ if "Localidad" in df.columns:
     fig1.update_layout(xaxis_tickangle=-45)
     fig1.show()
 
-# 2.2 Top 20 Especies
-if "Especie" in df.columns:
-    top_especies = df["Especie"].value_counts().nlargest(20).reset_index()
+    # 2.2 Top 20 Especies
+    top_especies = agregados.conteo("Especie").nlargest(20).reset_index()
     top_especies.columns = ["Especie", "Cantidad"]
 
     fig2 = px.bar(top_especies, x="Especie", y="Cantidad", title="Top 20 Especies Más Comunes", color="Especie")
     fig2.update_layout(xaxis_tickangle=-45)
     fig2.show()
 
-# 2.3 Estado de los Árboles
-estado_campos = ["Estado fuste", "Estado Copa", "Estado Raiz", "Estado FitoSanitario"]
-estado_validos = [col for col in estado_campos if col in df.columns]
+    # 2.3 Estado de los Árboles
+    estado_validos = [col for col in ESTADOS if col in agregados.conteos]
 
-fig3 = make_subplots(rows=2, cols=2, subplot_titles=estado_validos)
+    fig3 = make_subplots(rows=2, cols=2, subplot_titles=estado_validos)
 
-for i, estado in enumerate(estado_validos, 1):
-    counts = df[estado].value_counts().reset_index()
-    counts.columns = [estado, "Cantidad"]
+    for i, estado in enumerate(estado_validos, 1):
+        counts = agregados.conteo(estado).reset_index()
+        counts.columns = [estado, "Cantidad"]
 
-    fig3.add_trace(
-        go.Bar(x=counts[estado], y=counts["Cantidad"], name=estado), row=(i - 1) // 2 + 1, col=(i - 1) % 2 + 1
-    )
+        fig3.add_trace(
+            go.Bar(x=counts[estado], y=counts["Cantidad"], name=estado), row=(i - 1) // 2 + 1, col=(i - 1) % 2 + 1
+        )
 
-fig3.update_layout(height=800, width=1000, title_text="Distribución de Estados de los Árboles")
-fig3.show()
+    fig3.update_layout(height=800, width=1000, title_text="Distribución de Estados de los Árboles")
+    fig3.show()
 
-# 2.4 Medidas Físicas
-medidas = ["PAP", "DAP", "Altura Total", "Altura Comercial", "Diam. Copa Polar", "Diam. Copa Ecuatorial"]
-medidas_validas = [col for col in medidas if col in df.columns]
+    # 2.4 Medidas Físicas
+    medidas_validas = [col for col in MEDIDAS if col in muestra.columns]
 
-fig4 = make_subplots(rows=2, cols=3, subplot_titles=medidas_validas)
+    fig4 = make_subplots(rows=2, cols=3, subplot_titles=medidas_validas)
 
-for i, medida in enumerate(medidas_validas, 1):
-    fig4.add_trace(go.Box(y=df[medida].dropna(), name=medida), row=(i - 1) // 3 + 1, col=(i - 1) % 3 + 1)
+    for i, medida in enumerate(medidas_validas, 1):
+        fig4.add_trace(go.Box(y=muestra[medida].dropna(), name=medida), row=(i - 1) // 3 + 1, col=(i - 1) % 3 + 1)
 
-fig4.update_layout(height=600, width=1000, title_text="Distribución de Medidas Físicas")
-fig4.show()
+    fig4.update_layout(height=600, width=1000, title_text="Distribución de Medidas Físicas")
+    fig4.show()
 
-# 2.5 Mapa
-if {"Latitud", "Longitud"}.issubset(df.columns):
-    df_mapa = df.dropna(subset=["Latitud", "Longitud"])
-    fig5 = px.scatter_map(
-        df_mapa,
-        lat="Latitud",
-        lon="Longitud",
-        color="Localidad",
-        hover_name="Especie",
-        hover_data=["Estado General", "Riesgo"],
-        zoom=10,
-        height=600,
-        title="Distribución Geográfica de los Árboles",
-    )
-fig5.update_layout(mapbox_style="open-street-map")
-fig5.show()
-
-# 2.6 Correlación
-numeric_cols = df.select_dtypes(include=np.number).columns
-if len(numeric_cols) >= 2:
-    corr_matrix = df[numeric_cols].corr()
-    fig6 = go.Figure(
-        data=go.Heatmap(z=corr_matrix, x=corr_matrix.columns, y=corr_matrix.columns, colorscale="RdBu", zmin=-1, zmax=1)
-    )
-    fig6.update_layout(title="Matriz de Correlación entre Variables Numéricas")
-    fig6.show()
+    # 2.5 Mapa: puntos si caben en el presupuesto, si no celdas hexagonales con la cantidad de árboles
+    modo, df_mapa = datos_mapa(bines, muestreo)
+    if modo == "puntos":
+        fig5 = px.scatter_map(
+            df_mapa.dropna(subset=["Latitud", "Longitud"]),
+            lat="Latitud",
+            lon="Longitud",
+            color="Localidad",
+            hover_name="Especie",
+            hover_data=["Estado General", "Riesgo"],
+            zoom=10,
+            height=600,
+            title="Distribución Geográfica de los Árboles",
+        )
+    else:
+        fig5 = px.scatter_map(
+            df_mapa,
+            lat="Latitud",
+            lon="Longitud",
+            color="Localidad",
+            size="Cantidad",
+            hover_data=["Cantidad"],
+            zoom=10,
+            height=600,
+            title=f"Distribución Geográfica de los Árboles ({bines.total:,} árboles en {len(df_mapa):,} celdas)",
+        )
+    fig5.update_layout(mapbox_style="open-street-map")
+    fig5.show()
+
+    # 2.6 Correlación, calculada sobre todas las filas en la misma pasada que el resto de los agregados
+    if len(agregados.estadisticas.columnas) >= 2:
+        corr_matrix = agregados.estadisticas.correlacion()
+        fig6 = go.Figure(
+            data=go.Heatmap(
+                z=corr_matrix, x=corr_matrix.columns, y=corr_matrix.columns, colorscale="RdBu", zmin=-1, zmax=1
+            )
+        )
+        fig6.update_layout(title="Matriz de Correlación entre Variables Numéricas")
+        fig6.show()
 
-# 2.7 Distribución por Estrato
-if "Estrato" in df.columns:
-    fig7 = px.pie(df, names="Estrato", title="Distribución de Árboles por Estrato")
-    fig7.show()
+    # 2.7 Distribución por Estrato
+    if "Estrato" in agregados.conteos:
+        estratos = agregados.conteo("Estrato").reset_index()
+        estratos.columns = ["Estrato", "Cantidad"]
+        fig7 = px.pie(estratos, names="Estrato", values="Cantidad", title="Distribución de Árboles por Estrato")
+        fig7.show()
 
-# 2.8 Riesgo por Especie
-if {"Especie", "Riesgo"}.issubset(df.columns):
-    riesgo_especie = pd.crosstab(df["Especie"], df["Riesgo"])
+    # 2.8 Riesgo por Especie
+    riesgo_especie = agregados.riesgo_especie
     if "Alto" in riesgo_especie.columns:
         riesgo_top10 = riesgo_especie.nlargest(10, "Alto").reset_index()
         fig8 = px.bar(
             riesgo_top10,
             x="Especie",
-            y=["Bajo", "Medio", "Alto"],
+            y=[nivel for nivel in ["Bajo", "Medio", "Alto"] if nivel in riesgo_top10.columns],
             barmode="group",
             title="Top 10 Especies con Mayor Riesgo Alto",
             labels={"value": "Cantidad", "variable": "Nivel de Riesgo"},
         )
         fig8.show()
 
-## 3. Análisis Adicionales
+    ## 3. Análisis Adicionales
 
-# Interés patrimonial
-if "Interes patrimonial" in df.columns:
-    patrimonial = df["Interes patrimonial"].value_counts(normalize=True) * 100
+    # Interés patrimonial
     print("\nPorcentaje de árboles con interés patrimonial:")
-    print(patrimonial)
+    print(agregados.conteo("Interes patrimonial", normalizar=True) * 100)
 
-# Especies con mayor altura
-if {"Especie", "Altura Total"}.issubset(df.columns):
+    # Especies con mayor altura
     print("\nEspecies con mayor altura promedio:")
-    print(df.groupby("Especie")["Altura Total"].mean().nlargest(10).reset_index())
+    print(agregados.altura_media_por_especie().nlargest(10).reset_index())
 
-# Tratamientos aplicados
-if "Tratamiento" in df.columns:
+    # Tratamientos aplicados
     print("\nDistribución de tratamientos aplicados:")
-    print(df["Tratamiento"].value_counts().reset_index())
+    print(agregados.conteo("Tratamiento").reset_index())
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -1,10 +1,38 @@
+import numpy as np
 import pandas as pd
 import random
 import math
-from typing import Set, Dict, List, Any
+import os
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Any, AsyncIterator, Callable, Iterable, Iterator, Optional, Union
 from dataclasses import dataclass, field
-from src.data_reference import DataReference
-from src.generate_coord import generar_coordenada_en_localidad
+from src.data_reference import RUTA_DATOS, DataReference
+from src.generate_coord import LocalidadesGeo, TriangulacionesEmpaquetadas, cargar_localidades, triangulacion_disponible
+from src.memoria_compartida import BloqueCompartido, DescriptorCompartido, adjuntar
+from src.perfilador import Perfilador
+from src.pool_coordenadas import PoolCoordenadas, cargar_pool
+from src.schema import aplicar_esquema
+from src.columnar_generator import (
+    FuenteContador,
+    FuenteSecuencial,
+    TablasColumnares,
+    enteros_a_texto,
+    generar_columnas,
+    mezclar64,
+)
+
+RUTA_GEOJSON = os.path.join(RUTA_DATOS, "localidades_bogota.geojson")
+
+# Filas por shard en la generación paralela; fija la partición del trabajo independientemente de los procesos
+TAMANO_SHARD = 100_000
+
+# Valores por defecto de la API de flujo: filas por lote y lotes generados por adelantado
+TAMANO_LOTE = 10_000
+LOTES_EN_COLA = 4
+FORMATOS_LOTE = ("pandas", "arrow")
 
 
 @dataclass
@@ -23,45 +51,374 @@ class DataConfig:
     autorizados: Dict[str, float] = field(default_factory=lambda: DataReference.AUTORIZADOS)
 
 
+# Reparto del espacio de 12 dígitos de los contadores SIGAU entre las dos formas de emitir códigos, para que un
+# mismo generador nunca repita uno al mezclarlas: los IDs de árbol (codificar_ids, motor columnar) ocupan
+# [0, INICIO_CONTADORES_LOCALIDAD) y los contadores por localidad (generar y generar_lote) el resto
+INICIO_CONTADORES_LOCALIDAD = 5 * 10**11
+
+
 class SIGAUGenerator:
-    def __init__(self):
-        self.codigos_generados: Set[str] = set()
+    """
+    Códigos SIGAU únicos sin guardar los emitidos: prefijo de dos dígitos de la localidad seguido de un
+    contador pasado por una permutación con clave (red de Feistel) del espacio de 12 dígitos.
+    Los códigos por ID de árbol y los de los contadores por localidad salen de rangos de contador disjuntos.
+    """
+
+    def __init__(self, clave: Optional[int] = None):
+        self.clave = clave if clave is not None else random.getrandbits(64)
+        # Claves de ronda de cada localidad ya usada por generar, como enteros de Python
+        self._claves_ronda: Dict[int, List[int]] = {}
+        # Siguiente contador libre de cada localidad, relativo a INICIO_CONTADORES_LOCALIDAD
+        self.contadores: Dict[int, int] = {}
 
     def generar(self, codigo_localidad: int) -> str:
         """Genera un código SIGAU único basado en la localidad"""
 
-        prefijo = f"{codigo_localidad:02d}"
+        relativo = self.contadores.get(codigo_localidad, 0)
+        if relativo >= 10**12 - INICIO_CONTADORES_LOCALIDAD:
+            raise ValueError(f"Se agotaron los códigos SIGAU de la localidad {codigo_localidad}.")
+        self.contadores[codigo_localidad] = relativo + 1
+        contador = INICIO_CONTADORES_LOCALIDAD + relativo
+
+        claves_ronda = self._claves_ronda.get(codigo_localidad)
+        if claves_ronda is None:
+            claves_ronda = [int(clave) for clave in self.claves_ronda(np.array([codigo_localidad]))[:, 0]]
+            self._claves_ronda[codigo_localidad] = claves_ronda
+
+        # Misma red de Feistel que permutar_feistel, en enteros de Python para no pagar el costo de NumPy por código
+        izquierda, derecha = divmod(contador, 10**6)
+        for clave in claves_ronda:
+            izquierda, derecha = derecha, (izquierda + _mezclar64_escalar(derecha ^ clave) % 10**6) % 10**6
+
+        return f"{codigo_localidad:02d}{izquierda * 10**6 + derecha:012d}"
+
+    def generar_lote(self, codigos_localidad: np.ndarray) -> np.ndarray:
+        """Genera un código SIGAU único por cada código de localidad del lote, avanzando el contador de cada una"""
+
+        codigos_localidad = np.asarray(codigos_localidad, dtype=np.int64)
+        unicos, inversa, conteos = np.unique(codigos_localidad, return_inverse=True, return_counts=True)
+
+        # Posición de cada elemento dentro de su localidad, respetando el orden del lote
+        orden = np.argsort(inversa, kind="stable")
+        posicion = np.empty(len(codigos_localidad), dtype=np.int64)
+        posicion[orden] = np.arange(len(codigos_localidad)) - np.repeat(np.cumsum(conteos) - conteos, conteos)
+
+        base = np.array([self.contadores.get(int(c), 0) for c in unicos], dtype=np.int64)
+        codigos = self.codificar(codigos_localidad, INICIO_CONTADORES_LOCALIDAD + base[inversa] + posicion)
+        self.contadores.update(zip(unicos.tolist(), (base + conteos).tolist()))
+        return codigos
+
+    def claves_ronda(self, codigos_localidad: np.ndarray) -> np.ndarray:
+        """
+        Claves de ronda de la red de Feistel para cada localidad, con forma (RONDAS_FEISTEL, len(codigos_localidad)).
+        La localidad entra en la clave para que un mismo contador no dé el mismo sufijo en localidades distintas.
+        """
+        ajustes = np.uint64(self.clave) ^ np.asarray(codigos_localidad, dtype=np.uint64)
+        return mezclar64(ajustes[np.newaxis, :] + np.arange(RONDAS_FEISTEL, dtype=np.uint64)[:, np.newaxis])
+
+    def codificar(self, codigos_localidad: np.ndarray, contadores: np.ndarray) -> np.ndarray:
+        """
+        Código SIGAU de cada par (localidad, contador). Es una biyección: contadores distintos dentro de
+        una localidad dan códigos distintos, sin memoria ni reintentos.
+        """
+        contadores = np.asarray(contadores, dtype=np.int64)
+        if len(contadores) and (contadores.min() < 0 or contadores.max() >= 10**12):
+            raise ValueError("El contador SIGAU debe estar en [0, 10^12).")
+
+        codigos_localidad = np.asarray(codigos_localidad, dtype=np.int64)
+        unicos, inversa = np.unique(codigos_localidad, return_inverse=True)
+        digitos = permutar_feistel(contadores, self.claves_ronda(unicos)[:, inversa])
+        return enteros_a_texto(codigos_localidad * 10**12 + digitos, 14).astype(object)
+
+    def codificar_ids(self, codigos_localidad: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """Código SIGAU de cada árbol a partir de su ID, en el rango de contadores reservado para los IDs"""
+
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) and (ids.min() < 0 or ids.max() >= INICIO_CONTADORES_LOCALIDAD):
+            raise ValueError(f"El ID debe estar en [0, {INICIO_CONTADORES_LOCALIDAD}) para codificarse como SIGAU.")
+        return self.codificar(codigos_localidad, ids)
+
+
+RONDAS_FEISTEL = 6
+_MASCARA_64 = (1 << 64) - 1
+
+
+def _mezclar64_escalar(x: int) -> int:
+    """Versión escalar de mezclar64"""
+
+    x = (x + 0x9E3779B97F4A7C15) & _MASCARA_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASCARA_64
+    return x ^ (x >> 31)
+
+
+def permutar_feistel(valores: np.ndarray, claves_ronda: np.ndarray) -> np.ndarray:
+    """
+    Permutación de [0, 10^12) con una red de Feistel balanceada sobre dos mitades de 6 dígitos.
+    Cada fila de `claves_ronda` es una ronda: un escalar, o un arreglo con la clave de cada valor.
+    """
+
+    izquierda, derecha = np.divmod(np.asarray(valores, dtype=np.int64), 10**6)
+    for clave in claves_ronda:
+        ronda = (mezclar64(derecha.astype(np.uint64) ^ clave) % np.uint64(10**6)).astype(np.int64)
+        izquierda, derecha = derecha, (izquierda + ronda) % 10**6
+
+    return izquierda * 10**6 + derecha
+
+
+@dataclass
+class TareaShard:
+    """Porción independiente de una generación paralela"""
+
+    indice: int
+    id_inicial: int
+    cantidad: int
+    entropia: int
+    clave_sigau: int
+    ruta_parte: Optional[str] = None
+    # Clave del modo por contador; si está definida las filas dependen solo de (clave, ID)
+    clave: Optional[int] = None
+    compacto: bool = False
+    perfilar: bool = False
+
+
+def generar_shard(
+    tarea: TareaShard, tablas: TablasColumnares, localidades_geo, perfilador: Optional[Perfilador] = None
+) -> pd.DataFrame:
+    """Genera un shard con su propio flujo aleatorio, derivado solo de la semilla y del índice del shard"""
+
+    # Todos los shards comparten la clave SIGAU; como los IDs son disjuntos, los códigos también
+    sigau_gen = SIGAUGenerator(clave=tarea.clave_sigau)
+
+    if tarea.clave is not None:
+        ids = np.arange(tarea.id_inicial, tarea.id_inicial + tarea.cantidad, dtype=np.int64)
+        fuente = FuenteContador(tarea.clave, ids)
+        return generar_columnas(tablas, fuente, localidades_geo, sigau_gen, tarea.compacto, perfilador)
+
+    rng = np.random.default_rng(np.random.SeedSequence(tarea.entropia, spawn_key=(tarea.indice,)))
+    fuente = FuenteSecuencial(rng, tarea.id_inicial, tarea.cantidad)
+    return generar_columnas(tablas, fuente, localidades_geo, sigau_gen, tarea.compacto, perfilador)
+
+
+@dataclass(frozen=True)
+class RecursosCompartidos:
+    """Tablas numéricas y triangulaciones que el proceso padre publica en memoria compartida para sus trabajadores"""
+
+    descriptor: DescriptorCompartido
+    # Localidades de las triangulaciones publicadas; None si no se publicaron (pool de coordenadas o shapely < 2.1)
+    localidades: Optional[List[str]] = None
+
+
+# Estado de cada proceso trabajador, preparado una sola vez por _inicializar_trabajador
+_TRABAJADOR: Dict[str, Any] = {}
+
+
+def _inicializar_trabajador(
+    tablas: TablasColumnares,
+    ruta_geojson: str,
+    pool: Optional[PoolCoordenadas] = None,
+    recursos: Optional[RecursosCompartidos] = None,
+) -> None:
+    """
+    Prepara el trabajador. Con `recursos` adjunta las tablas y las triangulaciones publicadas por el padre sin
+    copiarlas; si no, lee el GeoJSON y triangula cada localidad por su cuenta.
+    `pool` es el pool de coordenadas ya construido por el padre; llega como su ruta y aquí solo se mapea.
+    """
+    arreglos: Dict[str, np.ndarray] = {}
+    if recursos is not None:
+        # Las vistas son válidas mientras el bloque siga abierto en este proceso
+        _TRABAJADOR["memoria"], arreglos = adjuntar(recursos.descriptor)
+        tablas = tablas.con_arreglos(_con_prefijo(arreglos, "tablas/"))
+    _TRABAJADOR["tablas"] = tablas
+
+    # Con pool, cada trabajador mapea el mismo archivo: las páginas se comparten y no se lee geometría
+    if pool is not None:
+        _TRABAJADOR["localidades_geo"] = pool
+    elif recursos is not None and recursos.localidades is not None:
+        geometria = _con_prefijo(arreglos, "geometria/")
+        _TRABAJADOR["localidades_geo"] = TriangulacionesEmpaquetadas(recursos.localidades, **geometria)
+    else:
+        _TRABAJADOR["localidades_geo"] = cargar_localidades(ruta_geojson)
+
+
+def _con_prefijo(arreglos: Dict[str, np.ndarray], prefijo: str) -> Dict[str, np.ndarray]:
+    return {clave[len(prefijo) :]: arreglo for clave, arreglo in arreglos.items() if clave.startswith(prefijo)}
+
+
+def _ejecutar_tarea(tarea: TareaShard):
+    """
+    Genera el shard en el trabajador; si tiene ruta de parte lo escribe y entrega solo la cantidad de filas.
+    Devuelve también el resumen del perfilador del shard (None si no se perfila).
+    """
+    perfilador = Perfilador(activo=tarea.perfilar)
+    df = generar_shard(tarea, _TRABAJADOR["tablas"], _TRABAJADOR["localidades_geo"], perfilador)
+    if tarea.ruta_parte is None:
+        return df, perfilador.resumen() if tarea.perfilar else None
+
+    with perfilador.etapa("escritura_csv"):
+        df.to_csv(tarea.ruta_parte, index=False, encoding="utf-8")
+    return len(df), perfilador.resumen() if tarea.perfilar else None
+
+
+def _mapa_acotado(pool: Executor, funcion: Callable, tareas: Iterable[Any], en_vuelo: int) -> Iterator[Any]:
+    """
+    Como pool.map, pero con a lo sumo `en_vuelo` tareas enviadas a la vez: si el consumidor se atrasa, los
+    trabajadores esperan en lugar de acumular en memoria los resultados de todas las tareas.
+    """
+    pendientes: deque = deque()
+    for tarea in tareas:
+        if len(pendientes) >= en_vuelo:
+            yield pendientes.popleft().result()
+        pendientes.append(pool.submit(funcion, tarea))
+    while pendientes:
+        yield pendientes.popleft().result()
+
+
+_FIN = object()
+
+
+class _FalloProductor:
+    """Excepción del hilo productor, reenviada al consumidor por la cola"""
 
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def _iterar_en_hilo(elementos: Iterable[Any], maximo_en_cola: int) -> AsyncIterator[Any]:
+    """
+    Recorre `elementos` en un hilo y los entrega al bucle de eventos por una cola de `maximo_en_cola` lugares.
+    Si el consumidor se atrasa el productor espera; si deja de iterar, el productor termina tras el elemento en curso.
+    """
+    loop = asyncio.get_running_loop()
+    cola: asyncio.Queue = asyncio.Queue(maxsize=maximo_en_cola)
+    detener = threading.Event()
+
+    def encolar(elemento: Any) -> None:
+        asyncio.run_coroutine_threadsafe(cola.put(elemento), loop).result()
+
+    def producir() -> None:
+        iterador = iter(elementos)
+        try:
+            for elemento in iterador:
+                if detener.is_set():
+                    return
+                encolar(elemento)
+        except BaseException as error:
+            if not detener.is_set():
+                encolar(_FalloProductor(error))
+            return
+        finally:
+            # Cierra el generador de lotes (y su pool de procesos, si tiene) aunque no se haya agotado
+            if hasattr(iterador, "close"):
+                iterador.close()
+        if not detener.is_set():
+            encolar(_FIN)
+
+    hilo = threading.Thread(target=producir, name="productor-lotes", daemon=True)
+    hilo.start()
+    try:
         while True:
-            digitos = "".join(random.choices("0123456789", k=12))
-            codigo = prefijo + digitos
-            if codigo not in self.codigos_generados:
-                self.codigos_generados.add(codigo)
-                return codigo
+            elemento = await cola.get()
+            if elemento is _FIN:
+                return
+            if isinstance(elemento, _FalloProductor):
+                raise elemento.error
+            yield elemento
+    finally:
+        # Vacía la cola para liberar al productor si estaba esperando lugar, y espera a que termine
+        detener.set()
+        while not cola.empty():
+            cola.get_nowait()
+        await asyncio.to_thread(hilo.join)
 
 
 class TreeDataGenerator:
-    def __init__(self, config: DataConfig = DataConfig()):
+    def __init__(
+        self,
+        config: Optional[DataConfig] = None,
+        ruta_geojson: str = RUTA_GEOJSON,
+        semilla: Optional[int] = None,
+        modo: str = "secuencial",
+        ponderar_especies: bool = False,
+        perfilador: Optional[Perfilador] = None,
+        pool_coordenadas: bool = False,
+    ):
+        if modo not in ("secuencial", "contador"):
+            raise ValueError(f"Modo '{modo}' no soportado.")
+
+        # La configuración por defecto se crea aquí para no leer los datos de referencia al importar el módulo
+        config = config if config is not None else DataConfig()
         self.config = config
-        self.sigau_gen = SIGAUGenerator()
+        self.semilla = semilla
+        self.modo = modo
+        self.ruta_geojson = ruta_geojson
+        self._localidades_geo: Optional[LocalidadesGeo] = None
+        # El motor columnar toma las coordenadas de un pool precalculado en lugar de muestrear las geometrías
+        self.pool_coordenadas = pool_coordenadas
+
+        # Tiempos por etapa y contadores; activo por defecto porque mide por bloque. Las etapas de cada fila del
+        # motor por registros solo se miden con Perfilador(por_fila=True). Se reinicia al comenzar cada corrida
+        self.perfilador = perfilador if perfilador is not None else Perfilador()
+
+        # Estado del motor columnar: generador NumPy reproducible y tablas de referencia como arreglos
+        self.rng = np.random.default_rng(semilla)
+        self.tablas = TablasColumnares.desde_config(config, ponderar_especies)
+
+        # Muestreadores de alias y claves de cada tabla, construidos una sola vez para el motor por registros
+        self.muestreadores = self.tablas.muestreadores
+        self._anios = sorted(config.valores_anuales)
+        self._especies = list(config.especies.keys())
+        self._tratamientos = list(config.tratamientos.keys())
+        self._localidades = list(config.localidades.keys())
+        self._autorizados = list(config.autorizados.keys())
+
+        # Generador de `random` propio del motor por registros, para que la semilla también lo haga reproducible
+        self.aleatorio = random.Random(semilla)
+
+        # Modo por contador: cada campo del árbol i se deriva de (clave, i), sin estado entre filas
+        self.clave, clave_sigau = (int(c) for c in np.random.SeedSequence(semilla).generate_state(2, np.uint64))
+        self.sigau_gen = SIGAUGenerator(clave=clave_sigau)
+
+        # ID del próximo árbol de generar_por_bloques; junto con el estado aleatorio permite continuar una corrida
+        self.siguiente_id = 1
+
+    @property
+    def localidades_geo(self) -> LocalidadesGeo:
+        """Geometrías de las localidades; se cargan la primera vez que se piden coordenadas"""
+
+        if self._localidades_geo is None:
+            self._localidades_geo = cargar_localidades(self.ruta_geojson)
+        return self._localidades_geo
+
+    @property
+    def fuente_coordenadas(self) -> Union[LocalidadesGeo, PoolCoordenadas]:
+        """De dónde saca coordenadas el motor columnar: el pool precalculado o las geometrías"""
+
+        return cargar_pool(self.ruta_geojson) if self.pool_coordenadas else self.localidades_geo
 
     def _seleccionar_especie(self) -> Dict[str, Any]:
         """Selecciona una especie y genera sus medidas"""
 
-        especie_id = random.choice(list(self.config.especies.keys()))
+        especie_id = self._especies[self.muestreadores.especies.muestrear(self.aleatorio)]
         especie = self.config.especies[especie_id]
 
-        pap = round(random.uniform(especie["min_pap"], especie["max_pap"]), 2)
-        altura_total = round(random.uniform(especie["min_alturatotal"], especie["max_alturatotal"]), 2)
+        pap = round(self.aleatorio.uniform(especie["min_pap"], especie["max_pap"]), 2)
+        altura_total = round(self.aleatorio.uniform(especie["min_alturatotal"], especie["max_alturatotal"]), 2)
 
         return {
             "nombre": especie["nombre_comun"],
             "pap": pap,
             "dap": round(pap * math.pi, 2),
             "altura_total": altura_total,
-            "altura_comercial": round(random.uniform(0, altura_total), 2),
-            "diam_copa_mayor": round(random.uniform(especie["min_diamcopamayor"], especie["max_diamcopamayor"]), 2),
-            "diam_copa_menor": round(random.uniform(especie["min_diamcopamenor"], especie["max_diamcopamenor"]), 2),
+            "altura_comercial": round(self.aleatorio.uniform(0, altura_total), 2),
+            "diam_copa_mayor": round(
+                self.aleatorio.uniform(especie["min_diamcopamayor"], especie["max_diamcopamayor"]), 2
+            ),
+            "diam_copa_menor": round(
+                self.aleatorio.uniform(especie["min_diamcopamenor"], especie["max_diamcopamenor"]), 2
+            ),
             "perimetro_basal": round(pap * math.pi * 1.1, 2),
         }
 
@@ -83,15 +440,24 @@ class TreeDataGenerator:
     def generar_arbol(self, tree_id: int) -> Dict[str, Any]:
         """Genera los datos simulados de un árbol individual"""
 
-        anio = random.randint(2020, 2025)
-        especie_data = self._seleccionar_especie()
-        tratamiento = random.choice(list(self.config.tratamientos.keys()))
-        estado = self._generar_estado(tratamiento)
-        num_localidad = random.randint(1, len(self.config.localidades))
+        if self.modo == "contador":
+            return self.generar_rango(tree_id, tree_id + 1).to_dict("records")[0]
+
+        perfilador = self.perfilador
+        anio = self._anios[self.muestreadores.anios.muestrear(self.aleatorio)]
+        with perfilador.etapa_por_fila("especie"):
+            especie_data = self._seleccionar_especie()
+        tratamiento = self._tratamientos[self.muestreadores.tratamientos.muestrear(self.aleatorio)]
+        with perfilador.etapa_por_fila("estados"):
+            estado = self._generar_estado(tratamiento)
+        num_localidad = self._localidades[self.muestreadores.localidades.muestrear(self.aleatorio)]
         localidad = self.config.localidades[num_localidad]
-        consecutivo = f"{random.randint(0, 99999):05d}"
+        consecutivo = f"{self.aleatorio.randint(0, 99999):05d}"
 
-        lat, lon = generar_coordenada_en_localidad("data/localidades_bogota.geojson", localidad.upper())
+        with perfilador.etapa_por_fila("coordenadas"):
+            lat, lon = self.localidades_geo.generar_coordenada(localidad.upper(), perfilador, self.aleatorio)
+        with perfilador.etapa_por_fila("sigau"):
+            sigau = self.sigau_gen.generar(num_localidad)
 
         return {
             "ID": tree_id,
@@ -99,14 +465,14 @@ class TreeDataGenerator:
             "IVP": self.config.valores_anuales[anio]["ivp"],
             "Salario Minimo": self.config.valores_anuales[anio]["salario_minimo"],
             "Concepto": f"{anio}EE{consecutivo}",
-            "TipoCT": random.choice(self.config.tipos_ct),
+            "TipoCT": self.config.tipos_ct[self.muestreadores.tipos_ct.muestrear(self.aleatorio)],
             "Consecutivo": f"SSFFS-{consecutivo}",
-            "SIGAU": self.sigau_gen.generar(num_localidad),
+            "SIGAU": sigau,
             "Especie": especie_data["nombre"],
             "Tratamiento": tratamiento,
-            "Espacio": random.choice(self.config.espacios),
-            "Emplazamiento": random.choice(self.config.emplazamientos),
-            "Estrato": random.randint(1, 6),
+            "Espacio": self.config.espacios[self.muestreadores.espacios.muestrear(self.aleatorio)],
+            "Emplazamiento": self.config.emplazamientos[self.muestreadores.emplazamientos.muestrear(self.aleatorio)],
+            "Estrato": self.aleatorio.randint(1, 6),
             "Localidad": localidad,
             "Latitud": lat,
             "Longitud": lon,
@@ -123,14 +489,284 @@ class TreeDataGenerator:
             "Estado FitoSanitario": estado["estado_fito"],
             "Estado General": estado["estado_general"],
             "Riesgo": estado["riesgo"],
-            "Interes patrimonial": random.choices(["Si", "No"], weights=[0.05, 0.95])[0],
-            "Autorizado": random.choices(
-                list(self.config.autorizados.keys()), weights=list(self.config.autorizados.values())
-            )[0],
+            "Interes patrimonial": self.muestreadores.valores_interes_patrimonial[
+                self.muestreadores.interes_patrimonial.muestrear(self.aleatorio)
+            ],
+            "Autorizado": self._autorizados[self.muestreadores.autorizados.muestrear(self.aleatorio)],
+        }
+
+    def generar_dataset(
+        self, cantidad: int = 100, motor: str = "columnar", procesos: Optional[int] = None, compacto: bool = False
+    ) -> pd.DataFrame:
+        """
+        Genera un DataFrame con múltiples árboles simulados.
+        motor="columnar" genera cada columna como un arreglo de NumPy; motor="registros" arma un dict por árbol.
+        Con `procesos` se genera por shards en paralelo (ver generar_en_paralelo).
+        Con `compacto` se usa el esquema de src.schema (categóricas y tipos numéricos estrechos).
+        """
+
+        # Recarga las geometrías solo si el GeoJSON cambió desde la última corrida
+        self._localidades_geo = None
+        self.perfilador.reiniciar()
+
+        if procesos is not None:
+            if motor != "columnar":
+                raise ValueError("La generación paralela solo está disponible con el motor columnar.")
+            return pd.concat(list(self.generar_en_paralelo(cantidad, procesos, compacto=compacto)), ignore_index=True)
+        if motor == "columnar":
+            df = self._generar_bloque(1, cantidad, compacto)
+        elif motor == "registros":
+            df = self._generar_registros(1, cantidad, compacto)
+        else:
+            raise ValueError(f"Motor '{motor}' no soportado.")
+
+        self.perfilador.finalizar()
+        return df
+
+    def generar_por_bloques(
+        self,
+        cantidad: int,
+        tamano_bloque: int = 100_000,
+        compacto: bool = False,
+        motor: str = "columnar",
+        id_inicial: int = 1,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Genera `cantidad` árboles en DataFrames de a lo sumo `tamano_bloque` filas, con IDs desde `id_inicial`.
+        Los IDs continúan entre bloques y los SIGAU se mantienen únicos en todo el recorrido.
+        Al entregar cada bloque, estado() ya refleja el generador después de ese bloque.
+        """
+        if tamano_bloque <= 0:
+            raise ValueError("El tamaño de bloque debe ser positivo.")
+        if motor not in ("columnar", "registros"):
+            raise ValueError(f"Motor '{motor}' no soportado.")
+
+        # Recarga las geometrías solo si el GeoJSON cambió desde la última corrida
+        self._localidades_geo = None
+        self.perfilador.reiniciar()
+
+        for inicio in range(id_inicial, id_inicial + cantidad, tamano_bloque):
+            filas = min(tamano_bloque, id_inicial + cantidad - inicio)
+            if motor == "registros":
+                bloque = self._generar_registros(inicio, filas, compacto)
+            else:
+                bloque = self._generar_bloque(inicio, filas, compacto)
+            self.siguiente_id = inicio + filas
+            yield bloque
+
+        self.perfilador.finalizar()
+
+    def estado(self) -> Dict[str, Any]:
+        """
+        Estado del generador serializable en JSON: próximo ID, estados del generador NumPy y del de `random` del motor
+        por registros, y claves de los modos por contador y de SIGAU. Con restaurar() otro generador continúa desde aquí.
+        """
+        return {
+            "modo": self.modo,
+            "siguiente_id": self.siguiente_id,
+            "rng": self.rng.bit_generator.state,
+            "aleatorio": self.aleatorio.getstate(),
+            "clave": self.clave,
+            "sigau": {
+                "clave": self.sigau_gen.clave,
+                "contadores": {str(codigo): contador for codigo, contador in self.sigau_gen.contadores.items()},
+            },
         }
 
-    def generar_dataset(self, cantidad: int = 100) -> pd.DataFrame:
-        """Genera un DataFrame con múltiples árboles simulados"""
+    def restaurar(self, estado: Dict[str, Any]) -> None:
+        """Continúa desde un estado obtenido con estado(); el generador debe usar el mismo modo"""
+
+        if estado["modo"] != self.modo:
+            raise ValueError(f"El estado es del modo '{estado['modo']}' y el generador usa '{self.modo}'.")
+
+        self.siguiente_id = estado["siguiente_id"]
+        self.rng.bit_generator.state = estado["rng"]
+        version, interno, gauss = estado["aleatorio"]
+        self.aleatorio.setstate((version, tuple(interno), gauss))
+        self.clave = estado["clave"]
+        self.sigau_gen = SIGAUGenerator(clave=estado["sigau"]["clave"])
+        self.sigau_gen.contadores = {int(codigo): c for codigo, c in estado["sigau"]["contadores"].items()}
+
+    def iterar_lotes(
+        self,
+        cantidad: int,
+        tamano_lote: int = TAMANO_LOTE,
+        formato: str = "pandas",
+        compacto: bool = False,
+        procesos: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """
+        Entrega los árboles en lotes de a lo sumo `tamano_lote` filas a medida que se generan: DataFrames con
+        formato="pandas" o pyarrow.RecordBatch con formato="arrow". Con `procesos` los lotes se generan como shards
+        en un pool de procesos, con pocos lotes por adelantado.
+        """
+        if formato not in FORMATOS_LOTE:
+            raise ValueError(f"Formato de lote '{formato}' no soportado.")
+
+        if procesos is not None:
+            lotes = self.generar_en_paralelo(cantidad, procesos, tamano_lote, compacto)
+        else:
+            lotes = self.generar_por_bloques(cantidad, tamano_lote, compacto)
+        if formato == "pandas":
+            return lotes
+
+        import pyarrow as pa
+
+        return (pa.RecordBatch.from_pandas(lote, preserve_index=False) for lote in lotes)
+
+    def generar_async(
+        self,
+        cantidad: int,
+        tamano_lote: int = TAMANO_LOTE,
+        formato: str = "pandas",
+        compacto: bool = False,
+        procesos: Optional[int] = None,
+        lotes_en_cola: int = LOTES_EN_COLA,
+    ) -> AsyncIterator[Any]:
+        """
+        Versión asíncrona de iterar_lotes (`async for lote in generator.generar_async(...)`).
+        Los lotes se generan en un hilo aparte, así que la generación se solapa con la E/S del consumidor; a lo sumo
+        `lotes_en_cola` lotes esperan en memoria a ser consumidos.
+        """
+        if lotes_en_cola <= 0:
+            raise ValueError("lotes_en_cola debe ser positivo.")
+
+        return _iterar_en_hilo(self.iterar_lotes(cantidad, tamano_lote, formato, compacto, procesos), lotes_en_cola)
+
+    def generar_rango(self, inicio: int, fin: int, compacto: bool = False) -> pd.DataFrame:
+        """
+        Regenera los árboles con IDs en [inicio, fin) en modo por contador.
+        Cada fila depende solo de la semilla y de su ID, así que el costo no depende de `inicio`.
+        """
+        if self.modo != "contador":
+            raise ValueError("generar_rango requiere modo='contador'.")
+
+        ids = np.arange(inicio, fin, dtype=np.int64)
+        fuente = FuenteContador(self.clave, ids)
+        return generar_columnas(self.tablas, fuente, self.fuente_coordenadas, self.sigau_gen, compacto, self.perfilador)
+
+    def _generar_bloque(self, id_inicial: int, cantidad: int, compacto: bool = False) -> pd.DataFrame:
+        if self.modo == "contador":
+            return self.generar_rango(id_inicial, id_inicial + cantidad, compacto)
+
+        fuente = FuenteSecuencial(self.rng, id_inicial, cantidad)
+        return generar_columnas(self.tablas, fuente, self.fuente_coordenadas, self.sigau_gen, compacto, self.perfilador)
+
+    def _generar_registros(self, id_inicial: int, cantidad: int, compacto: bool = False) -> pd.DataFrame:
+        with self.perfilador.etapa("registros"):
+            registros = [self.generar_arbol(i) for i in range(id_inicial, id_inicial + cantidad)]
+        if self.modo != "contador":
+            self.perfilador.contar("sigau_emitidos", cantidad)
+        with self.perfilador.etapa("dataframe"):
+            df = pd.DataFrame(registros)
+            if compacto:
+                df = aplicar_esquema(df, self.config)
+        self.perfilador.contar("filas", len(df))
+        return df
+
+    def generar_en_paralelo(
+        self,
+        cantidad: int,
+        procesos: Optional[int] = None,
+        tamano_shard: int = TAMANO_SHARD,
+        compacto: bool = False,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Genera `cantidad` árboles repartidos en shards de `tamano_shard` filas sobre un pool de procesos.
+        Los shards se entregan en orden. Cada uno tiene su propio flujo aleatorio y un rango de IDs disjunto (y por
+        lo tanto SIGAU disjuntos), así que el resultado para una semilla es el mismo con cualquier número de procesos.
+        """
+        self.perfilador.reiniciar()
+        yield from self._ejecutar_shards(self._tareas_shard(cantidad, tamano_shard, compacto), procesos)
+        self.perfilador.finalizar()
+
+    def generar_partes(
+        self, cantidad: int, directorio: str, procesos: Optional[int] = None, tamano_shard: int = TAMANO_SHARD
+    ) -> List[str]:
+        """Como generar_en_paralelo, pero cada trabajador escribe su shard en un CSV `part-NNNNN.csv` del directorio"""
+
+        os.makedirs(directorio, exist_ok=True)
+        self.perfilador.reiniciar()
+        tareas = self._tareas_shard(cantidad, tamano_shard)
+        for tarea in tareas:
+            tarea.ruta_parte = os.path.join(directorio, f"part-{tarea.indice:05d}.csv")
+
+        for _ in self._ejecutar_shards(tareas, procesos):
+            pass
+        self.perfilador.finalizar()
+        return [tarea.ruta_parte for tarea in tareas]
+
+    def _tareas_shard(self, cantidad: int, tamano_shard: int, compacto: bool = False) -> List[TareaShard]:
+        if tamano_shard <= 0:
+            raise ValueError("El tamaño de shard debe ser positivo.")
+
+        # Sin semilla explícita se fija una entropía para que todos los shards compartan la misma raíz
+        entropia = np.random.SeedSequence(self.semilla).entropy
+
+        return [
+            TareaShard(
+                indice=i,
+                id_inicial=inicio + 1,
+                cantidad=min(tamano_shard, cantidad - inicio),
+                entropia=entropia,
+                clave_sigau=self.sigau_gen.clave,
+                clave=self.clave if self.modo == "contador" else None,
+                compacto=compacto,
+                perfilar=self.perfilador.activo,
+            )
+            for i, inicio in enumerate(range(0, max(cantidad, 1), tamano_shard))
+        ]
+
+    def _ejecutar_shards(self, tareas: List[TareaShard], procesos: Optional[int]) -> Iterator[Any]:
+        procesos = procesos or os.cpu_count() or 1
+        if procesos == 1 or len(tareas) <= 1:
+            _TRABAJADOR.update(tablas=self.tablas, localidades_geo=self.fuente_coordenadas)
+            yield from self._acumular_perfiles(map(_ejecutar_tarea, tareas))
+            return
+
+        # El pool se construye aquí, antes de crear los trabajadores, para que no lo construyan todos a la vez
+        pool_coordenadas = self.fuente_coordenadas if self.pool_coordenadas else None
+        bloque, recursos = self._publicar_recursos()
+        try:
+            # Las tablas viajan sin sus arreglos numéricos cuando los trabajadores los toman de la memoria compartida
+            tablas = self.tablas
+            if recursos is not None:
+                tablas = tablas.con_arreglos({c: a[:0] for c, a in tablas.arreglos_numericos().items()})
+            with ProcessPoolExecutor(
+                max_workers=min(procesos, len(tareas)),
+                initializer=_inicializar_trabajador,
+                initargs=(tablas, self.ruta_geojson, pool_coordenadas, recursos),
+            ) as pool:
+                resultados = _mapa_acotado(pool, _ejecutar_tarea, tareas, 2 * procesos)
+                yield from self._acumular_perfiles(resultados)
+        finally:
+            if bloque is not None:
+                bloque.cerrar()
+
+    def _publicar_recursos(self):
+        """
+        Copia a un bloque de memoria compartida las tablas numéricas y, si los trabajadores van a muestrear
+        geometría, las triangulaciones de todas las localidades (calculadas una sola vez, aquí).
+        Devuelve (None, None) si el sistema no ofrece memoria compartida.
+        """
+        arreglos = {f"tablas/{campo}": arreglo for campo, arreglo in self.tablas.arreglos_numericos().items()}
+        localidades = None
+        if not self.pool_coordenadas and triangulacion_disponible():
+            with self.perfilador.etapa("triangulacion"):
+                triangulaciones = TriangulacionesEmpaquetadas.desde_localidades(self.localidades_geo)
+            arreglos.update({f"geometria/{clave}": arreglo for clave, arreglo in triangulaciones.arreglos().items()})
+            localidades = triangulaciones.nombres
+
+        try:
+            bloque = BloqueCompartido(arreglos)
+        except OSError:
+            return None, None
+        return bloque, RecursosCompartidos(bloque.descriptor, localidades)
+
+    def _acumular_perfiles(self, resultados: Iterator[Any]) -> Iterator[Any]:
+        """Suma al perfilador los resúmenes de los shards; los tiempos de etapa suman los de todos los procesos"""
 
-        registros = [self.generar_arbol(i + 1) for i in range(cantidad)]
-        return pd.DataFrame(registros)
+        for resultado, resumen in resultados:
+            if resumen is not None:
+                self.perfilador.acumular(resumen)
+            yield resultado
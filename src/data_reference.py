@@ -1,6 +1,72 @@
-from typing import Dict, List
+from typing import Any, Callable, Dict, List
 import os
 import csv
+import hashlib
+import pickle
+
+# Directorio de datos del paquete, independiente del directorio de trabajo
+RUTA_DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Caché binaria de tablas de referencia ya parseadas
+RUTA_CACHE = os.environ.get("ALDA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "alda_data_generator"))
+
+
+def _hash_archivo(ruta: str) -> str:
+    with open(ruta, "rb") as archivo:
+        return hashlib.sha256(archivo.read()).hexdigest()
+
+
+def cargar_con_cache(ruta_archivo: str, parsear: Callable[[str], Any]) -> Any:
+    """
+    Devuelve `parsear(ruta_archivo)` usando una caché en disco (pickle) asociada al archivo fuente.
+    La caché es válida si coinciden mtime y tamaño o, si el mtime cambió, el hash SHA-256 del contenido.
+    """
+    estado = os.stat(ruta_archivo)
+    nombre = os.path.splitext(os.path.basename(ruta_archivo))[0]
+    ruta_cache = os.path.join(
+        RUTA_CACHE, f"{nombre}-{hashlib.sha256(os.path.abspath(ruta_archivo).encode()).hexdigest()[:16]}.pickle"
+    )
+
+    cache = None
+    try:
+        with open(ruta_cache, "rb") as archivo:
+            cache = pickle.load(archivo)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    if cache is not None and (cache["mtime_ns"], cache["tamano"]) == (estado.st_mtime_ns, estado.st_size):
+        return cache["datos"]
+
+    hash_actual = _hash_archivo(ruta_archivo)
+    datos = cache["datos"] if cache is not None and cache["sha256"] == hash_actual else parsear(ruta_archivo)
+
+    # Una caché que no se puede escribir (disco de solo lectura, permisos) no debe impedir la carga
+    try:
+        os.makedirs(RUTA_CACHE, exist_ok=True)
+        temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as archivo:
+            registro = {"mtime_ns": estado.st_mtime_ns, "tamano": estado.st_size, "sha256": hash_actual}
+            pickle.dump({**registro, "datos": datos}, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta_cache)
+    except OSError:
+        pass
+
+    return datos
+
+
+class _CargaPerezosa:
+    """Atributo de clase que se calcula en el primer acceso y luego queda fijo en la clase"""
+
+    def __init__(self, cargar: Callable[[], Any]):
+        self.cargar = cargar
+
+    def __set_name__(self, propietario: type, nombre: str):
+        self.nombre = nombre
+
+    def __get__(self, instancia: Any, propietario: type) -> Any:
+        valor = self.cargar()
+        setattr(propietario, self.nombre, valor)
+        return valor
 
 
 class DataReference:
@@ -38,7 +104,10 @@ class DataReference:
 
         return especies
 
-    ESPECIES = csv_a_diccionario("data/info_especies.csv")
+    # Se lee en el primer acceso, no al importar el módulo
+    ESPECIES = _CargaPerezosa(
+        lambda: cargar_con_cache(os.path.join(RUTA_DATOS, "info_especies.csv"), DataReference.csv_a_diccionario)
+    )
 
     # Lista de especies
     # ESPECIES = ['Araucaria','Araucaria crespa','Cipres, Pino cipres, Pino','Pino candelabro','Pino patula','Cipres italiano','Pino hayuelo','Cipres enano','Pino azul','Pino australiano','Pino colombiano, pino de pacho, pino romeron','Pino colombiano, chaquiro','Eucalipto común','Eucalipto pomarroso','Eucalipto plateado','Eucalipto de flor, eucalipto lavabotella','Eucalipto','Palma de cera, Palma blanca','Palma coquito','Palma yuca, palmiche','Palma fenix','Palma washingtoniana','Helecho palma','Urapán, Fresno','Acacia japonesa','Acacia negra, gris','Acacia de jardin','Acacia baracatinga, acacia sabanera, acacia nigra','Acacia blanca, leucaena','Carbonero rojo','Carbonero rosado','Aliso, fresno, chaquiro','Cedro, cedro andino, cedro clavel','Nogal, cedro nogal, cedro negro','Roble','Caucho de la india, caucho','Caucho sabanero','Caucho tequendama','Cerezo, capuli','Durazno comun','Duraznillo, velitas','Eugenia','Roble australiano','Guayacan de Manizales','Hojarasco','Liquidambar, estoraque','Magnolio','Sangregao, drago, croto','Sauce lloron','Alcaparro doble','Alcaparro enano','Amarrabollo','Arboloco','Cajeto, garagay, urapo','Cedrillo, Yuco','Corono','Cucharo','Falso pimiento','Gaque','Jazmin de la china','Jazmin del cabo, laurel huesito','Laurel de cera (hoja pequeña)','Laurel de cera','Mangle de tierra fria','Mano de oso','Mortillo','Raque, San juanito','Sietecueros nazareno','Sietecueros real','Tibar, pagoda o rodamonte','Yarumo','Abutilon blanco','Abutilon rojo y amarillo (Farolito)','Arrayan blanco','Brevo','Papayuelo','Calistemo lloron','Cayeno','Chicala, chirlobirlo, flor amarillo','Chilco','Chocho','Ciro','Ciruelo','Dividivi de tierra fria','Espino, Garbancillo','Feijoa','Gurrubo','Hayuelo','Higuerillo','Higueron','Holly espinoso','Holly liso','Platano de tierra fria','Sauco','Trompeto','Tuno roso','Aguacate','Sombrilla japonesa','Guamo santafereño','Encenillo','Alamo de lombardia','Tomate de arbol','Mandarina','Garrocho','Cafe','NN','Otro','Pino libro','Cipres Japones, criptomeria','Eucalipto','Eucalipto blanco','Palma de cera, Palma de ramo','Palma de yuca, Palma de bayoneta','Palma de datiles','Palma roebeleni','Palma payanesa','Palma sancona','Acacia morada','Acacia','Carbonero','Caucho','Caucho benjamin','Caucho lira','Guayabo brasilero','Cordoncillo','Salvio negro','Laurel europeo','Sangregado','Tibar, Rodamonte, Pagoda','Gaquillo','Pitosporo','Arrayan negro','Callistemo','Corazon de pollo','Schefflera, Pategallina hojigrande','Schefflera, Pategallina hojipequeña','Gualanday','Amarguero amarillo','Tabaquillo','Algodoncillo','Guayabo','Pimiento','Olivo','Naranjo','Borrachero blanco','Borrachero rojo','Caballero de la noche, Jazmin, Dama de noche','Granado','Tominejero','Cariseco, Tres hojas','Tomatillo','Cucubo','Algodon extranjero','Pino','Cipres','Eucalipto plateado','Tibar extranjero','Guayabillo','Uva camarona','Uva de Anis','Salvio morado','Nispero','Pomarroso','Curapin, Campanilla','Quina','Metrosideros','Arbol de corcho','Pero','Manzano','Pino Montezuma','Limon','Acacia','Palo blanco','Arbol pipermint','Algodoncillo','Chirimoyo','Pate vaca','Ayer, hoy y mañana','Salton o Charne','Carbonero','Calistemo','Caballero de la noche','Arupo','Palma areca','Citrus spp.','Manzano de monte','Sangregado','Cipres','Palma funeral','Chiripique','Chocho, balu, cambulo','Tibar, tobo, rodamonte','Eucalipto manchado','Eucalipto','Bonetero del Japon','Liberal o lechero','Caucho','Fucsia boliviana','Motilon, chuguaca','Guamo','Jazmin amarillo','Lavatera, Malvavisco morado','Leptospermun','Aligustre del Japon','Magnolia rosada','Malvavisco','Tuno esmeraldo','Tuno','Tuno','Tinto','Angelito','Arrayan','Cucharo','Susque','Yolombo','Fenix','Pino','Cerezo, ciruelo','Romero','Jomi, upacon','Tinto','Tecomaria','Trompo','Yuca, palma yuca','Olmo de agua','Schefflera, Yuco blanco','Schefflera, Tortolito','Schefflera','Schefflera pategallina peludo','Abutilonpequeño','Arce','Té de Bogotá','Almanegra, quedo','Lembo, pategallo','Diosme','Ocobo, Guayacan','Gardenia','Granizo','Balso blanco','Romero de paramo','Chirriador','Siete Cueros peludo','Canelo','Pegamosco','Punta de lanza','Tulipan africano','Acacia blanca, Cultriformes','Buganbil, veranera','Boj','Camelia','Pajarito','Mangostino','Acebo','Venturosa','Cidron','Azuceno, enebro','Ombu, Arbol de la bella sombra','Árbol de platano','Cafetillo, crucito','Azalea','Mimbre','Moquillo','Ceiba de tierra fria','Guayabo de pava','Lulo de perro','Aloe arboreo','Balazo','Camaron','Cigarrillo','Dalia','Rosa','Manto de Maria','Hebe','Marihuana','Mermelada','Mirto','Retamo','Palma cinta','Aralia japonesa','Abelia','Azara','Guayabo anselmo, Champo','Moradilla','Hiperico, Corazoncillo','Platano','Secuoya','Algarrobo','Anona','Arbol de neem','Arbol de Te','Arupo','Guacimo','Mamey','Oreja de Burro','Punga','Totumillo','Espino blanco','Guarana, guacharo','Guayabo de mico','Tachuelo','Mango','Morera','Nacedero','Tabaquillo','Flor morado','Escolin, Espadero','Pimiento negro','Fotinia','Ojo de perdiz','Motilón','Cipres','Tinto','Agracejo','Arrayan','Mulato','Cucharo','Fucsia arbustiva','Tagua','Crucito','Cerezo','Tuno roso','Palma Alejandra','Abutilon quesito','Acacia azul','Alcaparro enano','Arbol de hierro','Ardicia','Aromo','Cajeto','Cajeto','Cajeto de Bogota','Cerezo','Chicala rosado','Guayabo del peru','Holly liso','Jazmin australiano','Mano de oso']
@@ -126,27 +195,4 @@ class DataReference:
     # Tipos de CT
     TIPOS_CT = ["Emergencia", "Infraestructura", "Manejo"]
 
-    def csv_a_diccionario(ruta_archivo):
-        arboles = {}
-
-        with open(ruta_archivo, mode="r", encoding="utf-8") as archivo:
-            lector = csv.DictReader(archivo)
-
-            for fila in lector:
-                nombre = fila["nomcomun"].strip()
-
-                arboles[nombre] = {
-                    "min_pap": float(fila["min_pap"]),
-                    "max_pap": float(fila["max_pap"]),
-                    "min_alturatotal": float(fila["min_alturatotal"]),
-                    "max_alturatotal": float(fila["max_alturatotal"]),
-                    "min_diamcopamayor": float(fila["min_diamcopamayor"]),
-                    "max_diamcopamayor": float(fila["max_diamcopamayor"]),
-                    "min_diamcopamenor": float(fila["min_diamcopamenor"]),
-                    "max_diamcopamenor": float(fila["max_diamcopamenor"]),
-                    "total": int(fila["total"]),
-                }
-
-        return arboles
-
     AUTORIZADOS = {"OTRO": 0.1, "ENEL": 0.15, "IDU": 0.05, "JBB": 0.4, "UAESP": 0.2, "EEAB": 0.1}
@@ -0,0 +1,182 @@
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+import pandas as pd
+
+FORMATOS = ("csv", "parquet", "feather")
+
+# Compresión por defecto de cada formato columnar
+COMPRESION_POR_DEFECTO = {"parquet": "zstd", "feather": "lz4"}
+
+
+@dataclass
+class ProgresoEscritura:
+    """Avance de una escritura por bloques"""
+
+    filas: int = 0
+    bytes_escritos: int = 0
+    inicio: float = field(default_factory=time.perf_counter)
+
+    @property
+    def segundos(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.filas / self.segundos if self.segundos > 0 else 0.0
+
+    def segundos_restantes(self, total: int) -> Optional[float]:
+        """Tiempo estimado para llegar a `total` filas al ritmo actual"""
+
+        ritmo = self.filas_por_segundo
+        return max(total - self.filas, 0) / ritmo if ritmo > 0 else None
+
+
+def formatear_bytes(cantidad: float) -> str:
+    for unidad in ("B", "KB", "MB", "GB"):
+        if cantidad < 1024:
+            return f"{cantidad:,.1f} {unidad}"
+        cantidad /= 1024
+    return f"{cantidad:,.1f} TB"
+
+
+def imprimir_progreso(progreso: ProgresoEscritura) -> None:
+    print(f"{progreso.filas:,} filas escritas ({progreso.filas_por_segundo:,.0f} filas/s)")
+
+
+def escribir_csv(
+    bloques: Iterable[pd.DataFrame],
+    ruta_salida: str,
+    reportar: Optional[Callable[[ProgresoEscritura], None]] = imprimir_progreso,
+    anexar: bool = False,
+) -> ProgresoEscritura:
+    """
+    Escribe los bloques en un CSV a medida que llegan, con el encabezado una sola vez.
+    La memoria usada queda acotada por el tamaño de un bloque.
+    Con `anexar` los bloques se agregan al final del archivo (con encabezado solo si está vacío), y
+    `bytes_escritos` es el tamaño total del archivo tras cada bloque.
+    """
+    directorio = os.path.dirname(ruta_salida)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+
+    progreso = ProgresoEscritura()
+    with open(ruta_salida, mode="a" if anexar else "w", encoding="utf-8", newline="") as archivo:
+        encabezado = archivo.tell() == 0
+        for bloque in bloques:
+            bloque.to_csv(archivo, index=False, header=encabezado)
+            encabezado = False
+            progreso.filas += len(bloque)
+            progreso.bytes_escritos = archivo.tell()
+            if reportar is not None:
+                reportar(progreso)
+
+    return progreso
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Las salidas Parquet y Feather requieren pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+def escribir_columnar(
+    bloques: Iterable[pd.DataFrame],
+    ruta_salida: str,
+    formato: str = "parquet",
+    particionar_por: Optional[List[str]] = None,
+    tamano_grupo_filas: Optional[int] = None,
+    compresion: Optional[str] = None,
+    reportar: Optional[Callable[[ProgresoEscritura], None]] = imprimir_progreso,
+    primer_bloque: int = 0,
+) -> ProgresoEscritura:
+    """
+    Escribe los bloques en Parquet o Arrow IPC/Feather a medida que llegan.
+    Sin `particionar_por` se produce un único archivo; con columnas (por ejemplo ["Localidad", "Anio"]) se
+    produce un directorio particionado al estilo Hive (`Localidad=BOSA/Anio=2024/...`).
+    `tamano_grupo_filas` fija el tamaño de los row groups (Parquet) o de los lotes de registros (Feather).
+    En un directorio particionado, cada bloque escribe archivos `part-NNNNN-*` numerados desde `primer_bloque`,
+    así que una corrida posterior puede agregar bloques sin tocar los existentes.
+    """
+    if formato not in ("parquet", "feather"):
+        raise ValueError(f"Formato columnar '{formato}' no soportado.")
+    if primer_bloque and not particionar_por:
+        raise ValueError("Solo se pueden agregar bloques a una salida Parquet o Feather particionada.")
+
+    pa = _importar_pyarrow()
+    compresion = compresion or COMPRESION_POR_DEFECTO[formato]
+    progreso = ProgresoEscritura()
+    esquema = None
+    escritor = None
+
+    if particionar_por:
+        os.makedirs(ruta_salida, exist_ok=True)
+        formato_dataset = pa.dataset.ParquetFileFormat() if formato == "parquet" else pa.dataset.IpcFileFormat()
+        opciones = formato_dataset.make_write_options(compression=compresion)
+    else:
+        directorio = os.path.dirname(ruta_salida)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def sumar_archivo(archivo) -> None:
+        progreso.bytes_escritos += os.path.getsize(archivo.path)
+
+    try:
+        for numero, bloque in enumerate(bloques, start=primer_bloque):
+            # Todos los bloques se escriben con el esquema del primero
+            tabla = pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False)
+            esquema = tabla.schema
+
+            if particionar_por:
+                campos = pa.schema([esquema.field(columna) for columna in particionar_por])
+                pa.dataset.write_dataset(
+                    tabla,
+                    ruta_salida,
+                    format=formato_dataset,
+                    file_options=opciones,
+                    partitioning=pa.dataset.partitioning(campos, flavor="hive"),
+                    basename_template=f"part-{numero:05d}-{{i}}.{formato}",
+                    existing_data_behavior="overwrite_or_ignore",
+                    max_rows_per_group=tamano_grupo_filas or 1024 * 1024,
+                    min_rows_per_group=0,
+                    file_visitor=sumar_archivo,
+                )
+            elif formato == "parquet":
+                if escritor is None:
+                    escritor = pa.parquet.ParquetWriter(ruta_salida, esquema, compression=compresion)
+                escritor.write_table(tabla, row_group_size=tamano_grupo_filas)
+            else:
+                if escritor is None:
+                    opciones_ipc = pa.ipc.IpcWriteOptions(compression=compresion)
+                    escritor = pa.ipc.new_file(ruta_salida, esquema, options=opciones_ipc)
+                escritor.write_table(tabla, max_chunksize=tamano_grupo_filas)
+
+            progreso.filas += len(bloque)
+            if not particionar_por:
+                progreso.bytes_escritos = os.path.getsize(ruta_salida)
+            if reportar is not None:
+                reportar(progreso)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+    if escritor is not None:
+        progreso.bytes_escritos = os.path.getsize(ruta_salida)
+    return progreso
+
+
+def escribir(bloques: Iterable[pd.DataFrame], ruta_salida: str, formato: str = "csv", **opciones) -> ProgresoEscritura:
+    """Escribe los bloques en el formato indicado ("csv", "parquet" o "feather")"""
+
+    if formato == "csv":
+        return escribir_csv(bloques, ruta_salida, **opciones)
+    if formato in FORMATOS:
+        return escribir_columnar(bloques, ruta_salida, formato, **opciones)
+
+    raise ValueError(f"Formato '{formato}' no soportado.")
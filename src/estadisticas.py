@@ -0,0 +1,170 @@
+import copy
+import math
+from typing import List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Cuantiles reportados por EstadisticasNumericas.resumen, como en DataFrame.describe
+CUANTILES_RESUMEN = [0.25, 0.5, 0.75]
+
+
+class BocetoCuantiles:
+    """
+    Resumen aproximado de una distribución para estimar cuantiles en una pasada, al estilo de t-digest:
+    centroides (media, peso) que son pequeños en las colas y grandes en el centro. `compresion` acota la
+    cantidad de centroides (del orden de compresion / 2); el mínimo y el máximo se guardan exactos.
+    """
+
+    def __init__(self, compresion: int = 200):
+        self.compresion = compresion
+        self.medias = np.empty(0, dtype=np.float64)
+        self.pesos = np.empty(0, dtype=np.float64)
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    @property
+    def total(self) -> float:
+        return float(self.pesos.sum())
+
+    def agregar(self, valores: np.ndarray) -> None:
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return
+
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+        self._comprimir(np.concatenate([self.medias, valores]), np.concatenate([self.pesos, np.ones(len(valores))]))
+
+    def fusionar(self, otro: "BocetoCuantiles") -> "BocetoCuantiles":
+        fusionado = BocetoCuantiles(max(self.compresion, otro.compresion))
+        fusionado.minimo = min(self.minimo, otro.minimo)
+        fusionado.maximo = max(self.maximo, otro.maximo)
+        fusionado._comprimir(np.concatenate([self.medias, otro.medias]), np.concatenate([self.pesos, otro.pesos]))
+        return fusionado
+
+    def cuantil(self, q: Sequence[float]) -> np.ndarray:
+        """Estimación de los cuantiles `q` (entre 0 y 1) interpolando entre los centros de los centroides"""
+
+        q = np.asarray(q, dtype=np.float64)
+        if len(self.pesos) == 0:
+            return np.full(q.shape, np.nan)
+
+        centros = np.cumsum(self.pesos) - self.pesos / 2
+        posiciones = np.concatenate([[0.0], centros, [self.total]])
+        valores = np.concatenate([[self.minimo], self.medias, [self.maximo]])
+        return np.interp(q * self.total, posiciones, valores)
+
+    def _comprimir(self, medias: np.ndarray, pesos: np.ndarray) -> None:
+        orden = np.argsort(medias, kind="stable")
+        medias, pesos = medias[orden], pesos[orden]
+
+        # Escala k1 de t-digest: cada centroide abarca a lo sumo una unidad de k, que crece rápido en las colas
+        acumulado = np.cumsum(pesos)
+        q = (acumulado - pesos / 2) / acumulado[-1]
+        k = self.compresion / (2 * math.pi) * np.arcsin(2 * q - 1)
+        grupos = np.floor(k - k[0]).astype(np.int64)
+
+        inicios = np.flatnonzero(np.diff(grupos, prepend=-1))
+        self.pesos = np.add.reduceat(pesos, inicios)
+        self.medias = np.add.reduceat(medias * pesos, inicios) / self.pesos
+
+
+class EstadisticasNumericas:
+    """
+    Conteo, media, varianza, mínimo, máximo, cuantiles aproximados y matriz de covarianza de varias columnas,
+    acumulados en una pasada con las actualizaciones estables de Welford/Chan.
+    Los acumuladores de bloques o procesos distintos se fusionan exactamente (salvo los cuantiles).
+    Las filas con algún valor faltante en las columnas seguidas se descartan.
+    """
+
+    def __init__(self, columnas: Sequence[str], compresion: int = 200):
+        self.columnas: List[str] = list(columnas)
+        self.compresion = compresion
+        k = len(self.columnas)
+        self.n = 0
+        self.media = np.zeros(k)
+        # Suma de productos de las desviaciones respecto de la media (co-momentos de segundo orden)
+        self.m2 = np.zeros((k, k))
+        self.minimo = np.full(k, np.inf)
+        self.maximo = np.full(k, -np.inf)
+        self.bocetos = [BocetoCuantiles(compresion) for _ in self.columnas]
+
+    def agregar(self, datos: pd.DataFrame) -> "EstadisticasNumericas":
+        """Incorpora las filas de `datos` (un DataFrame con las columnas seguidas) y devuelve el acumulador"""
+
+        valores = datos[self.columnas].to_numpy(dtype=np.float64)
+        valores = valores[~np.isnan(valores).any(axis=1)]
+        if len(valores) == 0:
+            return self
+
+        bloque = EstadisticasNumericas(self.columnas, self.compresion)
+        bloque.n = len(valores)
+        bloque.media = valores.mean(axis=0)
+        centrados = valores - bloque.media
+        bloque.m2 = centrados.T @ centrados
+        bloque.minimo = valores.min(axis=0)
+        bloque.maximo = valores.max(axis=0)
+        for boceto, columna in zip(bloque.bocetos, valores.T):
+            boceto.agregar(columna)
+
+        fusionado = self.fusionar(bloque)
+        self.__dict__.update(fusionado.__dict__)
+        return self
+
+    def fusionar(self, otro: "EstadisticasNumericas") -> "EstadisticasNumericas":
+        """Acumulador equivalente a haber visto los datos de `self` y de `otro` (fórmula de Chan)"""
+
+        if otro.n == 0:
+            return copy.deepcopy(self)
+        if self.n == 0:
+            return copy.deepcopy(otro)
+        if otro.columnas != self.columnas:
+            raise ValueError("Solo se pueden fusionar estadísticas de las mismas columnas.")
+
+        n = self.n + otro.n
+        delta = otro.media - self.media
+
+        fusionado = EstadisticasNumericas(self.columnas, self.compresion)
+        fusionado.n = n
+        fusionado.media = self.media + delta * (otro.n / n)
+        fusionado.m2 = self.m2 + otro.m2 + np.outer(delta, delta) * (self.n * otro.n / n)
+        fusionado.minimo = np.minimum(self.minimo, otro.minimo)
+        fusionado.maximo = np.maximum(self.maximo, otro.maximo)
+        fusionado.bocetos = [a.fusionar(b) for a, b in zip(self.bocetos, otro.bocetos)]
+        return fusionado
+
+    def covarianza(self, ddof: int = 1) -> pd.DataFrame:
+        divisor = self.n - ddof
+        matriz = self.m2 / divisor if divisor > 0 else np.full_like(self.m2, np.nan)
+        return pd.DataFrame(matriz, index=self.columnas, columns=self.columnas)
+
+    def varianza(self, ddof: int = 1) -> pd.Series:
+        return pd.Series(np.diag(self.covarianza(ddof).to_numpy()), index=self.columnas)
+
+    def correlacion(self) -> pd.DataFrame:
+        """Correlación de Pearson; es NaN para las columnas constantes, como en DataFrame.corr"""
+
+        desviaciones = np.sqrt(np.diag(self.m2))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            matriz = self.m2 / np.outer(desviaciones, desviaciones)
+        return pd.DataFrame(np.clip(matriz, -1, 1), index=self.columnas, columns=self.columnas)
+
+    def cuantiles(self, q: Sequence[float]) -> pd.DataFrame:
+        return pd.DataFrame(
+            {columna: boceto.cuantil(q) for columna, boceto in zip(self.columnas, self.bocetos)}, index=list(q)
+        )
+
+    def resumen(self, cuantiles: Optional[Sequence[float]] = None) -> pd.DataFrame:
+        """Tabla con una fila por columna, con las mismas estadísticas que DataFrame.describe"""
+
+        cuantiles = CUANTILES_RESUMEN if cuantiles is None else cuantiles
+        resumen = pd.DataFrame(
+            {"conteo": self.n, "media": self.media, "desviacion": np.sqrt(self.varianza().to_numpy())},
+            index=self.columnas,
+        )
+        resumen["minimo"] = self.minimo
+        for q, valores in self.cuantiles(cuantiles).iterrows():
+            resumen[f"{q:.0%}"] = valores
+        resumen["maximo"] = self.maximo
+        return resumen
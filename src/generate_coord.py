@@ -1,36 +1,519 @@
-import geopandas as gpd
-from shapely.geometry import Polygon, Point
+import numpy as np
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 import random
 import os
+from src.perfilador import Perfilador, perfilador_o_inactivo
 
+# shapely (y GEOS) se importa dentro de las funciones que usan geometrías: importar el módulo no lo carga
+if TYPE_CHECKING:
+    import shapely
+    from shapely.geometry import Polygon
+
+# Código devuelto por LocalidadesGeo.localizar para los puntos que no caen en ninguna localidad
+FUERA_DE_LOCALIDADES = -1
+
+# Puntos consultados por lote en localizar; acota la memoria de las geometrías temporales
+TAMANO_LOTE_LOCALIZAR = 500_000
+
+# Celdas de la rejilla de aceleración sobre el lado más largo de la extensión de las localidades (unos 60 m en Bogotá)
+CELDAS_REJILLA = 2048
+
+# Generador de generar_coordenada cuando no se le pasa uno
+_ALEATORIO = random.Random()
+
+# Valores de una celda de RejillaLocalidades que no está entera dentro de una localidad
+CELDA_FUERA = -1
+CELDA_FRONTERA = -2
+
+
+@lru_cache(maxsize=None)
+def triangulacion_disponible() -> bool:
+    """La triangulación restringida está disponible desde shapely 2.1"""
+
+    import shapely
+
+    return hasattr(shapely, "constrained_delaunay_triangles")
+
+
+class _MuestreoTriangulado(ABC):
+    """
+    Muestreo uniforme dentro de cada localidad a partir de su triangulación: se elige un triángulo con probabilidad
+    proporcional a su área y un punto uniforme dentro de él. Las subclases proveen triangulacion(nombre).
+    """
+
+    triangulacion_disponible = True
+
+    @abstractmethod
+    def triangulacion(self, nombre_localidad: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Vértices (k, 3, 2) de los triángulos de la localidad y su área acumulada normalizada"""
+
+    def muestrear(
+        self,
+        nombre_localidad: str,
+        cantidad: int,
+        rng: Optional[np.random.Generator] = None,
+        perfilador: Optional[Perfilador] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Genera `cantidad` coordenadas uniformes dentro de la localidad como arreglos (latitudes, longitudes)"""
+
+        rng = rng if rng is not None else np.random.default_rng()
+        uniformes = rng.random((3, cantidad))
+        return self._puntos_desde_uniformes(nombre_localidad, uniformes[0], uniformes[1], uniformes[2])
+
+    def muestrear_por_codigo(
+        self,
+        codigos: Sequence[int],
+        localidades: Dict[int, str],
+        rng: Optional[np.random.Generator] = None,
+        uniformes: Optional[np.ndarray] = None,
+        perfilador: Optional[Perfilador] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Genera una coordenada por cada código de localidad del vector `codigos`.
+        `localidades` traduce cada código al nombre usado en el GeoJSON (por ejemplo DataReference.LOCALIDADES).
+        Si se pasan `uniformes` con forma (3, n), cada punto depende solo de sus tres uniformes y no se usa `rng`.
+        Con `perfilador` se cuentan los puntos por localidad y los sorteos rechazados del muestreo por rechazo.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        codigos = np.asarray(codigos)
+        latitudes = np.empty(len(codigos), dtype=np.float64)
+        longitudes = np.empty(len(codigos), dtype=np.float64)
+        if uniformes is not None and not self.triangulacion_disponible:
+            raise RuntimeError("El muestreo desde uniformes requiere shapely >= 2.1.")
+
+        # Una sola llamada vectorizada por localidad presente en el lote
+        for codigo in np.unique(codigos):
+            posiciones = np.flatnonzero(codigos == codigo)
+            nombre = localidades[int(codigo)]
+            if perfilador is not None:
+                perfilador.contar(f"coordenadas[{nombre}]", len(posiciones))
+            if uniformes is None:
+                latitudes[posiciones], longitudes[posiciones] = self.muestrear(nombre, len(posiciones), rng, perfilador)
+            else:
+                latitudes[posiciones], longitudes[posiciones] = self._puntos_desde_uniformes(
+                    nombre, *uniformes[:, posiciones]
+                )
+
+        return latitudes, longitudes
+
+    def _puntos_desde_uniformes(
+        self, nombre_localidad: str, u_triangulo: np.ndarray, u1: np.ndarray, u2: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Transforma tres uniformes [0, 1) por punto en coordenadas exactas dentro de la localidad"""
+
+        vertices, acumulada = self.triangulacion(nombre_localidad)
+
+        # Triángulo elegido con probabilidad proporcional a su área
+        indices = np.minimum(np.searchsorted(acumulada, u_triangulo, side="right"), len(acumulada) - 1)
+        a, b, c = vertices[indices, 0], vertices[indices, 1], vertices[indices, 2]
+
+        # Reflejar los pares fuera del triángulo unitario para mantener la uniformidad
+        fuera = u1 + u2 > 1
+        u1 = np.where(fuera, 1 - u1, u1)
+        u2 = np.where(fuera, 1 - u2, u2)
+
+        puntos = a + u1[:, None] * (b - a) + u2[:, None] * (c - a)
+        return puntos[:, 1], puntos[:, 0]  # Latitudes, Longitudes
+
+
+class RejillaLocalidades:
+    """
+    Rejilla uniforme de celdas cuadradas sobre la extensión de los polígonos, clasificada una sola vez: cada celda
+    vale el índice del polígono que la contiene entera, CELDA_FUERA si no toca ninguno o CELDA_FRONTERA si la cruza
+    algún borde. Un punto se clasifica con una consulta al arreglo y solo los de celdas de frontera necesitan la
+    prueba geométrica exacta. Si los polígonos se solapan, una celda queda en el primero que la contiene entera,
+    como en LocalidadesGeo.localizar.
+    """
+
+    def __init__(self, poligonos: Sequence["Polygon"], celdas: int = CELDAS_REJILLA):
+        import shapely
+
+        self.minx, self.miny, maxx, maxy = shapely.total_bounds(poligonos)
+        self.lado = max(maxx - self.minx, maxy - self.miny) / celdas
+        self.columnas = int((maxx - self.minx) / self.lado) + 1
+        self.filas = int((maxy - self.miny) / self.lado) + 1
+        self.celdas = np.full((self.filas, self.columnas), CELDA_FUERA, dtype=np.int32)
+
+        # Por polígono, las celdas (índices planos) enteras dentro de él y las que cruza su borde
+        self.dentro: List[np.ndarray] = []
+        self.frontera: List[np.ndarray] = []
+        # Por polígono, las de adentro seguidas de las de frontera: las celdas sobre las que se muestrea
+        self.candidatas: List[np.ndarray] = []
+        for indice, poligono in enumerate(poligonos):
+            dentro, frontera = self._clasificar_poligono(poligono)
+            self.dentro.append(dentro)
+            self.frontera.append(frontera)
+            self.candidatas.append(np.concatenate([dentro, frontera]))
+
+            # Una celda ya asignada a un polígono anterior, o ya en la frontera de uno, no cambia
+            celdas = self.celdas.reshape(-1)
+            celdas[frontera] = np.where(celdas[frontera] == CELDA_FUERA, CELDA_FRONTERA, celdas[frontera])
+            celdas[dentro] = np.where(celdas[dentro] == CELDA_FUERA, indice, celdas[dentro])
+
+    def _clasificar_poligono(self, poligono: "Polygon") -> Tuple[np.ndarray, np.ndarray]:
+        import shapely
+
+        # El borde se densifica a medio lado de celda: cada celda que toca está a lo sumo a una celda de alguno de
+        # sus puntos, así que las celdas de esos puntos y sus vecinas incluyen toda la frontera
+        borde = shapely.boundary(poligono)
+        puntos = shapely.get_coordinates(shapely.segmentize(borde, self.lado / 2))
+        columnas = np.floor((puntos[:, 0] - self.minx) / self.lado).astype(np.int64)
+        filas = np.floor((puntos[:, 1] - self.miny) / self.lado).astype(np.int64)
+        vecinas = np.arange(-1, 2)
+        columnas = np.clip((columnas[:, None, None] + vecinas[None, None, :]).repeat(3, axis=1), 0, self.columnas - 1)
+        filas = np.clip((filas[:, None, None] + vecinas[None, :, None]).repeat(3, axis=2), 0, self.filas - 1)
+        cercanas = np.unique(filas.ravel() * self.columnas + columnas.ravel())
+
+        # De esas, la frontera son las que el borde toca de verdad; la caja se agranda un poco para que el redondeo
+        # de clasificar() no deje un punto de una celda interior justo del otro lado del borde
+        margen = self.lado * 1e-6
+        x0 = self.minx + (cercanas % self.columnas) * self.lado - margen
+        y0 = self.miny + (cercanas // self.columnas) * self.lado - margen
+        shapely.prepare(borde)
+        frontera = cercanas[
+            shapely.intersects(borde, shapely.box(x0, y0, x0 + self.lado + 2 * margen, y0 + self.lado + 2 * margen))
+        ]
+
+        # El resto de las celdas de su caja envolvente no toca el borde: la decide su centro
+        x0, y0, x1, y1 = poligono.bounds
+        c0, f0 = int((x0 - self.minx) / self.lado), int((y0 - self.miny) / self.lado)
+        c1, f1 = int((x1 - self.minx) / self.lado), int((y1 - self.miny) / self.lado)
+        filas, columnas = np.mgrid[f0 : f1 + 1, c0 : c1 + 1]
+        indices = (filas * self.columnas + columnas).ravel()
+        candidatas = indices[~np.isin(indices, frontera)]
+        centros_x = self.minx + (candidatas % self.columnas + 0.5) * self.lado
+        centros_y = self.miny + (candidatas // self.columnas + 0.5) * self.lado
+        return candidatas[shapely.contains_xy(poligono, centros_x, centros_y)], frontera
+
+    def clasificar(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Valor de la celda de cada punto (índice de polígono, CELDA_FUERA o CELDA_FRONTERA)"""
+
+        columnas = (np.asarray(x, dtype=np.float64) - self.minx) / self.lado
+        filas = (np.asarray(y, dtype=np.float64) - self.miny) / self.lado
+        # Las comparaciones con NaN son falsas, así que las coordenadas vacías quedan fuera
+        validos = (columnas >= 0) & (columnas < self.columnas) & (filas >= 0) & (filas < self.filas)
+        resultado = np.full(len(columnas), CELDA_FUERA, dtype=np.int32)
+        resultado[validos] = self.celdas[filas[validos].astype(np.int64), columnas[validos].astype(np.int64)]
+        return resultado
+
+    def muestrear(
+        self, indice: int, cantidad: int, rng: np.random.Generator
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Puntos uniformes sobre las celdas que cubren el polígono `indice` (las de adentro y las de su frontera),
+        como (x, y, seguro): `seguro` marca los que cayeron en una celda entera dentro del polígono.
+        """
+        candidatas = self.candidatas[indice]
+        elegidas = rng.integers(0, len(candidatas), cantidad)
+        celdas = candidatas[elegidas]
+        x = self.minx + (celdas % self.columnas + rng.random(cantidad)) * self.lado
+        y = self.miny + (celdas // self.columnas + rng.random(cantidad)) * self.lado
+        return x, y, elegidas < len(self.dentro[indice])
+
+    def muestrear_uno(self, indice: int, rng: random.Random) -> Tuple[float, float, bool]:
+        """Como muestrear, para un solo punto sorteado con un generador de `random` (el del motor por registros)"""
+
+        candidatas = self.candidatas[indice]
+        elegida = rng.randrange(len(candidatas))
+        celda = int(candidatas[elegida])
+        x = self.minx + (celda % self.columnas + rng.random()) * self.lado
+        y = self.miny + (celda // self.columnas + rng.random()) * self.lado
+        return x, y, elegida < len(self.dentro[indice])
+
+    def area_candidata(self, indice: int) -> float:
+        """Área de las celdas que cubren el polígono `indice`"""
+
+        return (len(self.dentro[indice]) + len(self.frontera[indice])) * self.lado**2
+
+
+class LocalidadesGeo(_MuestreoTriangulado):
+    """Polígonos de las localidades indexados por nombre, leídos una sola vez del GeoJSON"""
+
+    def __init__(self, ruta_geojson: str):
+        # geopandas y shapely solo se importan cuando de verdad se necesitan geometrías
+        import geopandas as gpd
+        import shapely
+
+        self.triangulacion_disponible = triangulacion_disponible()
+
+        self.ruta = os.path.abspath(ruta_geojson)
+        self.firma = _firma_archivo(self.ruta)
+
+        try:
+            localidades = gpd.read_file(self.ruta)
+        except Exception as e:
+            raise RuntimeError(f"No se pudo leer el archivo GeoJSON: {e}")
+
+        self.poligonos: Dict[str, "Polygon"] = {}
+        self.limites: Dict[str, Tuple[float, float, float, float]] = {}
+        for nombre, poligono in zip(localidades["LocNombre"], localidades.geometry):
+            # La geometría preparada acelera las pruebas punto-en-polígono repetidas
+            shapely.prepare(poligono)
+            self.poligonos[nombre] = poligono
+            self.limites[nombre] = poligono.bounds
+
+        # Código de cada localidad (LocCodigo del GeoJSON, el mismo de DataReference.LOCALIDADES) o su posición
+        if "LocCodigo" in localidades:
+            codigos = [int(codigo) for codigo in localidades["LocCodigo"]]
+        else:
+            codigos = list(range(1, len(localidades) + 1))
+        self.codigos: Dict[str, int] = dict(zip(localidades["LocNombre"], codigos))
+        # Posición de cada localidad en la rejilla (el orden del GeoJSON)
+        self._indices: Dict[str, int] = {nombre: i for i, nombre in enumerate(self.poligonos)}
+        self.nombres: Dict[int, str] = {codigo: nombre for nombre, codigo in self.codigos.items()}
+
+        # Índice espacial de los polígonos y rejilla de aceleración para localizar puntos; se construyen la primera
+        # vez que se usan
+        self._indice: Optional["shapely.STRtree"] = None
+        self._rejilla: Optional[RejillaLocalidades] = None
+
+        # Triangulaciones por localidad, calculadas la primera vez que se muestrea cada una
+        self._triangulaciones: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def vigente(self) -> bool:
+        """Indica si el archivo en disco sigue siendo el mismo que se cargó"""
+
+        return os.path.exists(self.ruta) and _firma_archivo(self.ruta) == self.firma
+
+    @property
+    def rejilla(self) -> RejillaLocalidades:
+        if self._rejilla is None:
+            self._rejilla = RejillaLocalidades(list(self.poligonos.values()))
+        return self._rejilla
+
+    def generar_coordenada(
+        self, nombre_localidad: str, perfilador: Optional[Perfilador] = None, rng: Optional[random.Random] = None
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Genera una coordenada (latitud, longitud) aleatoria dentro de la localidad.
+        El punto se sortea sobre las celdas de la rejilla que cubren la localidad: si cae en una celda entera
+        dentro de ella se acepta sin prueba geométrica, y solo en las de frontera se comprueba contra el polígono.
+        Sin `rng` se usa un generador del módulo, sin semilla.
+        """
+        import shapely
+
+        poligono = self.poligonos.get(nombre_localidad)
+        if poligono is None:
+            print(f"Localidad '{nombre_localidad}' no encontrada.")
+            return None
+
+        indice = self._indices[nombre_localidad]
+        rechazos = 0
+        while True:
+            x, y, seguro = self.rejilla.muestrear_uno(indice, rng if rng is not None else _ALEATORIO)
+            if seguro or shapely.contains_xy(poligono, x, y):
+                if rechazos and perfilador is not None:
+                    perfilador.contar(f"coordenadas_rechazadas[{nombre_localidad}]", rechazos)
+                return (y, x)  # Latitud, Longitud
+            rechazos += 1
+
+    def localizar(
+        self, latitudes: Sequence[float], longitudes: Sequence[float], tamano_lote: int = TAMANO_LOTE_LOCALIZAR
+    ) -> np.ndarray:
+        """
+        Código de la localidad que contiene cada punto, o FUERA_DE_LOCALIDADES si no cae en ninguna.
+        La rejilla de aceleración resuelve con una consulta los puntos de celdas enteras dentro o fuera de las
+        localidades; solo los de celdas de frontera pasan por la prueba exacta, en la que un punto sobre el límite
+        entre dos localidades queda en la primera del GeoJSON.
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        if latitudes.shape != longitudes.shape:
+            raise ValueError("Las latitudes y longitudes deben tener la misma longitud.")
+
+        codigos_indice = np.array([self.codigos[nombre] for nombre in self.poligonos], dtype=np.int64)
+        clases = self.rejilla.clasificar(longitudes, latitudes)
+
+        resultado = np.full(len(latitudes), FUERA_DE_LOCALIDADES, dtype=np.int64)
+        dentro = clases >= 0
+        resultado[dentro] = codigos_indice[clases[dentro]]
+        frontera = np.flatnonzero(clases == CELDA_FRONTERA)
+        resultado[frontera] = self._localizar_exacto(latitudes[frontera], longitudes[frontera], tamano_lote)
+        return resultado
+
+    def _localizar_exacto(self, latitudes: np.ndarray, longitudes: np.ndarray, tamano_lote: int) -> np.ndarray:
+        """
+        localizar sin la rejilla: los puntos se consultan por lotes contra un STRtree de los polígonos y solo los
+        candidatos de cada caja se prueban contra el polígono exacto
+        """
+        import shapely
+
+        if self._indice is None:
+            self._indice = shapely.STRtree(list(self.poligonos.values()))
+        poligonos = list(self.poligonos.values())
+        codigos_indice = [self.codigos[nombre] for nombre in self.poligonos]
+
+        resultado = np.full(len(latitudes), FUERA_DE_LOCALIDADES, dtype=np.int64)
+        for inicio in range(0, len(latitudes), tamano_lote):
+            lat, lon = latitudes[inicio : inicio + tamano_lote], longitudes[inicio : inicio + tamano_lote]
+            # El árbol solo compara cajas envolventes; la prueba exacta usa los polígonos preparados
+            candidatos, indices = self._indice.query(shapely.points(lon, lat))
+            asignados = np.zeros(len(lat), dtype=bool)
+            # En el orden del GeoJSON, para que un punto sobre un límite quede en la primera localidad
+            for indice in np.unique(indices):
+                puntos = candidatos[indices == indice]
+                puntos = puntos[~asignados[puntos]]
+                dentro = puntos[shapely.intersects_xy(poligonos[indice], lon[puntos], lat[puntos])]
+                asignados[dentro] = True
+                resultado[inicio + dentro] = codigos_indice[indice]
+
+        return resultado
+
+    def localizar_nombres(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """Como localizar, pero con el nombre de la localidad (None fuera de todas)"""
+
+        # Tabla indexada por código; su última posición (índice -1, FUERA_DE_LOCALIDADES) queda en None
+        tabla = np.full(max(self.nombres) + 2, None, dtype=object)
+        for codigo, nombre in self.nombres.items():
+            tabla[codigo] = nombre
+        return tabla[self.localizar(latitudes, longitudes)]
+
+    def en_localidad(
+        self, latitudes: Sequence[float], longitudes: Sequence[float], nombres_localidad: Sequence[str]
+    ) -> np.ndarray:
+        """Indica, por punto, si la coordenada cae dentro de la localidad registrada para ella"""
+
+        return self.localizar_nombres(latitudes, longitudes) == np.asarray(nombres_localidad, dtype=object)
+
+    def triangulacion(self, nombre_localidad: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Triangula el polígono de la localidad.
+        Devuelve los vértices de los triángulos con forma (k, 3, 2) y el área acumulada normalizada.
+        """
+        triangulacion = self._triangulaciones.get(nombre_localidad)
+        if triangulacion is None:
+            import shapely
+
+            poligono = self._poligono(nombre_localidad)
+            triangulos = shapely.get_parts(shapely.constrained_delaunay_triangles(poligono))
+            vertices = shapely.get_coordinates(shapely.get_exterior_ring(triangulos)).reshape(-1, 4, 2)[:, :3]
+            acumulada = np.cumsum(shapely.area(triangulos))
+            triangulacion = (vertices, acumulada / acumulada[-1])
+            self._triangulaciones[nombre_localidad] = triangulacion
+
+        return triangulacion
+
+    def muestrear(
+        self,
+        nombre_localidad: str,
+        cantidad: int,
+        rng: Optional[np.random.Generator] = None,
+        perfilador: Optional[Perfilador] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.triangulacion_disponible:
+            rng = rng if rng is not None else np.random.default_rng()
+            return self._muestrear_por_rechazo(nombre_localidad, cantidad, rng, perfilador)
+        return super().muestrear(nombre_localidad, cantidad, rng, perfilador)
+
+    def _poligono(self, nombre_localidad: str) -> "Polygon":
+        poligono = self.poligonos.get(nombre_localidad)
+        if poligono is None:
+            raise ValueError(f"Localidad '{nombre_localidad}' no encontrada.")
+        return poligono
+
+    def _muestrear_por_rechazo(
+        self,
+        nombre_localidad: str,
+        cantidad: int,
+        rng: np.random.Generator,
+        perfilador: Optional[Perfilador] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Muestreo por rechazo vectorizado en bloques sobremuestreados (sin triangulación disponible).
+        Los puntos se sortean sobre las celdas de la rejilla que cubren la localidad, no sobre su caja envolvente:
+        se rechazan muchos menos y solo los de celdas de frontera pasan por la prueba exacta.
+        """
+        import shapely
+
+        perfilador = perfilador_o_inactivo(perfilador)
+        poligono = self._poligono(nombre_localidad)
+        indice = self._indices[nombre_localidad]
+        proporcion = poligono.area / self.rejilla.area_candidata(indice)
+
+        latitudes, longitudes = [], []
+        faltantes = cantidad
+        while faltantes > 0:
+            bloque = int(faltantes / proporcion * 1.2) + 16
+            x, y, dentro = self.rejilla.muestrear(indice, bloque, rng)
+            dudosos = np.flatnonzero(~dentro)
+            dentro[dudosos] = shapely.contains_xy(poligono, x[dudosos], y[dudosos])
+            perfilador.contar(f"coordenadas_rechazadas[{nombre_localidad}]", bloque - int(dentro.sum()))
+            latitudes.append(y[dentro][:faltantes])
+            longitudes.append(x[dentro][:faltantes])
+            faltantes -= len(latitudes[-1])
+
+        return np.concatenate(latitudes), np.concatenate(longitudes)
+
+
+class TriangulacionesEmpaquetadas(_MuestreoTriangulado):
+    """
+    Triangulaciones de todas las localidades en tres arreglos planos: vértices (t, 3, 2), área acumulada
+    normalizada por localidad (t,) e `inicios` (k + 1,), donde los triángulos de la localidad i son los de
+    [inicios[i], inicios[i + 1]). Muestrea igual que LocalidadesGeo sin geometrías de shapely, así que los
+    arreglos pueden venir de memoria compartida (ver src.memoria_compartida).
+    """
+
+    def __init__(self, nombres: Sequence[str], vertices: np.ndarray, acumuladas: np.ndarray, inicios: np.ndarray):
+        self.nombres = list(nombres)
+        self.vertices = vertices
+        self.acumuladas = acumuladas
+        self.inicios = inicios
+        self._posiciones = {nombre: i for i, nombre in enumerate(self.nombres)}
+
+    @classmethod
+    def desde_localidades(cls, localidades_geo: LocalidadesGeo) -> "TriangulacionesEmpaquetadas":
+        """Triangula todas las localidades (si aún no lo estaban) y concatena sus triangulaciones"""
+
+        nombres = list(localidades_geo.poligonos)
+        triangulaciones = [localidades_geo.triangulacion(nombre) for nombre in nombres]
+        inicios = np.cumsum([0] + [len(acumulada) for _, acumulada in triangulaciones]).astype(np.int64)
+        return cls(
+            nombres,
+            np.concatenate([vertices for vertices, _ in triangulaciones]),
+            np.concatenate([acumulada for _, acumulada in triangulaciones]),
+            inicios,
+        )
+
+    def arreglos(self) -> Dict[str, np.ndarray]:
+        return {"vertices": self.vertices, "acumuladas": self.acumuladas, "inicios": self.inicios}
+
+    def triangulacion(self, nombre_localidad: str) -> Tuple[np.ndarray, np.ndarray]:
+        posicion = self._posiciones.get(nombre_localidad)
+        if posicion is None:
+            raise ValueError(f"Localidad '{nombre_localidad}' no encontrada.")
+        inicio, fin = self.inicios[posicion], self.inicios[posicion + 1]
+        return self.vertices[inicio:fin], self.acumuladas[inicio:fin]
+
+
+def _firma_archivo(ruta: str) -> Tuple[int, int]:
+    """Firma (mtime, tamaño) usada para detectar cambios del archivo en disco"""
+
+    estado = os.stat(ruta)
+    return (estado.st_mtime_ns, estado.st_size)
+
+
+_LOCALIDADES_CACHE: Dict[str, LocalidadesGeo] = {}
+
+
+def cargar_localidades(ruta_geojson: str) -> LocalidadesGeo:
+    """Devuelve las localidades del GeoJSON, leyéndolo solo la primera vez o si cambió en disco"""
 
-def generar_coordenada_en_localidad(ruta_geojson, nombre_localidad):
     if not os.path.exists(ruta_geojson):
         raise FileNotFoundError(f"El archivo '{ruta_geojson}' no existe.")
 
-    # Cargar el GeoJSON
-    try:
-        localidades = gpd.read_file(ruta_geojson)
-    except Exception as e:
-        raise RuntimeError(f"No se pudo leer el archivo GeoJSON: {e}")
-
-    # Filtrar la localidad deseada
-    localidad = localidades[localidades["LocNombre"] == nombre_localidad]
-
-    if localidad.empty:
-        print(f"Localidad '{nombre_localidad}' no encontrada.")
-        return None
-
-    # Obtener el polígono de la localidad
-    poligono = localidad.geometry.iloc[0]
-
-    # Generar coordenadas aleatorias dentro del polígono
-    minx, miny, maxx, maxy = poligono.bounds
-    while True:
-        # Generar un punto aleatorio dentro del bounding box
-        punto = Point(random.uniform(minx, maxx), random.uniform(miny, maxy))
-        if punto.within(poligono):
-            return (punto.y, punto.x)  # Latitud, Longitud
+    ruta = os.path.abspath(ruta_geojson)
+    localidades = _LOCALIDADES_CACHE.get(ruta)
+    if localidades is None or not localidades.vigente():
+        localidades = LocalidadesGeo(ruta)
+        _LOCALIDADES_CACHE[ruta] = localidades
+
+    return localidades
+
+
+def generar_coordenada_en_localidad(ruta_geojson, nombre_localidad, perfilador=None):
+    return cargar_localidades(ruta_geojson).generar_coordenada(nombre_localidad, perfilador)
 
 
 """
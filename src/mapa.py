@@ -0,0 +1,222 @@
+import math
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+# Zoom del mapa de análisis y tamaño en pantalla de cada celda a ese zoom
+ZOOM_POR_DEFECTO = 11
+PIXELES_CELDA = 12
+
+# Niveles de zoom cuyos bines se precalculan en la misma pasada (ver BinesPorZoom)
+NIVELES_ZOOM = (10, 11, 12, 13)
+
+# Por encima de esta cantidad de árboles el mapa muestra celdas agregadas en lugar de puntos
+PRESUPUESTO_PUNTOS = 50_000
+
+FORMAS = ("hex", "cuadrada")
+
+
+def tamano_celda(zoom: float, pixeles: int = PIXELES_CELDA) -> float:
+    """Tamaño en grados que ocupa `pixeles` píxeles en un mapa web (teselas de 256 px) al nivel de `zoom`"""
+
+    return 360.0 / (256 * 2**zoom) * pixeles
+
+
+class BinesEspaciales:
+    """
+    Conteo de árboles por celda hexagonal o cuadrada sobre (Longitud, Latitud), opcionalmente desglosado por
+    una columna (`por`, por ejemplo "Localidad" o "Riesgo"). El resultado ocupa lo mismo sin importar cuántas
+    filas se agreguen, y los bines de distintos bloques se fusionan sumando los conteos.
+    Las celdas se trazan en grados; cerca del ecuador, como en Bogotá, la deformación es despreciable.
+    """
+
+    def __init__(self, tamano: float, forma: str = "hex", por: Optional[str] = None):
+        if forma not in FORMAS:
+            raise ValueError(f"Forma de celda '{forma}' no soportada.")
+        if tamano <= 0:
+            raise ValueError("El tamaño de celda debe ser positivo.")
+
+        self.tamano = tamano
+        self.forma = forma
+        self.por = por
+        self.conteos = pd.Series(dtype="int64")
+
+    @classmethod
+    def para_zoom(cls, zoom: float = ZOOM_POR_DEFECTO, forma: str = "hex", por: Optional[str] = None):
+        return cls(tamano_celda(zoom), forma, por)
+
+    @property
+    def total(self) -> int:
+        return int(self.conteos.sum())
+
+    def celdas(self, latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Índices enteros (i, j) de la celda de cada punto"""
+
+        x = np.asarray(longitudes, dtype=np.float64) / self.tamano
+        y = np.asarray(latitudes, dtype=np.float64) / self.tamano
+        if self.forma == "cuadrada":
+            return np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+
+        # Coordenadas axiales de una grilla hexagonal con vértice arriba, redondeadas en coordenadas cúbicas
+        q = math.sqrt(3) / 3 * x - y / 3
+        r = 2 / 3 * y
+        s = -q - r
+        q_red, r_red, s_red = np.round(q), np.round(r), np.round(s)
+        dq, dr, ds = np.abs(q_red - q), np.abs(r_red - r), np.abs(s_red - s)
+        corregir_q = (dq > dr) & (dq > ds)
+        corregir_r = ~corregir_q & (dr > ds)
+        q_red = np.where(corregir_q, -r_red - s_red, q_red)
+        r_red = np.where(corregir_r, -q_red - s_red, r_red)
+        return q_red.astype(np.int64), r_red.astype(np.int64)
+
+    def centros(self, i: np.ndarray, j: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Centro (latitudes, longitudes) de las celdas (i, j)"""
+
+        i = np.asarray(i, dtype=np.float64)
+        j = np.asarray(j, dtype=np.float64)
+        if self.forma == "cuadrada":
+            return (j + 0.5) * self.tamano, (i + 0.5) * self.tamano
+        return 1.5 * j * self.tamano, math.sqrt(3) * (i + j / 2) * self.tamano
+
+    def agregar(self, df: pd.DataFrame) -> "BinesEspaciales":
+        df = df.dropna(subset=["Latitud", "Longitud"])
+        i, j = self.celdas(df["Latitud"].to_numpy(), df["Longitud"].to_numpy())
+        claves = {"i": i, "j": j}
+        if self.por is not None:
+            claves[self.por] = df[self.por].to_numpy()
+
+        conteos = pd.DataFrame(claves).groupby(list(claves), observed=True).size()
+        self.conteos = conteos if self.conteos.empty else self.conteos.add(conteos, fill_value=0).astype("int64")
+        return self
+
+    def fusionar(self, otro: "BinesEspaciales") -> "BinesEspaciales":
+        if (otro.tamano, otro.forma, otro.por) != (self.tamano, self.forma, self.por):
+            raise ValueError("Solo se pueden fusionar bines con el mismo tamaño, forma y desglose.")
+
+        fusionado = BinesEspaciales(self.tamano, self.forma, self.por)
+        fusionado.conteos = (
+            otro.conteos if self.conteos.empty else self.conteos.add(otro.conteos, fill_value=0).astype("int64")
+        )
+        return fusionado
+
+    def resultado(self) -> pd.DataFrame:
+        """Una fila por celda (y valor del desglose) con su centro y la cantidad de árboles"""
+
+        columnas = ["Latitud", "Longitud", *([self.por] if self.por else []), "Cantidad"]
+        if self.conteos.empty:
+            return pd.DataFrame(columns=columnas)
+
+        tabla = self.conteos.rename("Cantidad").reset_index()
+        tabla["Latitud"], tabla["Longitud"] = self.centros(tabla["i"].to_numpy(), tabla["j"].to_numpy())
+        return tabla[columnas]
+
+
+class BinesPorZoom:
+    """
+    BinesEspaciales de varios niveles de zoom, calculados en la misma lectura y fusionables nivel por nivel.
+    Para dibujar se elige el nivel más fino cuya cantidad de celdas cabe en el presupuesto del mapa.
+    """
+
+    def __init__(self, zooms: Sequence[int] = NIVELES_ZOOM, forma: str = "hex", por: Optional[str] = None):
+        if not zooms:
+            raise ValueError("Se necesita al menos un nivel de zoom.")
+        self.forma = forma
+        self.por = por
+        self.niveles = {zoom: BinesEspaciales.para_zoom(zoom, forma, por) for zoom in sorted(zooms)}
+
+    @property
+    def total(self) -> int:
+        return next(iter(self.niveles.values())).total
+
+    def nivel(self, zoom: int) -> BinesEspaciales:
+        bines = self.niveles.get(zoom)
+        if bines is None:
+            raise ValueError(f"No hay bines precalculados para el zoom {zoom}.")
+        return bines
+
+    def agregar(self, df: pd.DataFrame) -> "BinesPorZoom":
+        for bines in self.niveles.values():
+            bines.agregar(df)
+        return self
+
+    def fusionar(self, otro: "BinesPorZoom") -> "BinesPorZoom":
+        if list(otro.niveles) != list(self.niveles):
+            raise ValueError("Solo se pueden fusionar bines con los mismos niveles de zoom.")
+
+        fusionado = BinesPorZoom(list(self.niveles), self.forma, self.por)
+        fusionado.niveles = {zoom: bines.fusionar(otro.niveles[zoom]) for zoom, bines in self.niveles.items()}
+        return fusionado
+
+    def para_presupuesto(self, presupuesto: int) -> BinesEspaciales:
+        """El nivel más fino con a lo sumo `presupuesto` celdas; si ninguno cabe, el más grueso"""
+
+        for bines in reversed(list(self.niveles.values())):
+            if len(bines.conteos) <= presupuesto:
+                return bines
+        return next(iter(self.niveles.values()))
+
+
+class MuestraAleatoria:
+    """
+    Muestra uniforme de a lo sumo `tamano` filas de un flujo de bloques. A cada fila se le asigna una clave
+    aleatoria y se conservan las de menor clave, así que dos muestras se fusionan sin sesgo.
+    Las muestras que se van a fusionar deben usar flujos de claves independientes: con la misma `semilla` en dos
+    partes, las filas en la misma posición reciben la misma clave. Sin semilla se usa entropía nueva.
+    """
+
+    def __init__(self, tamano: int, semilla: Optional[int] = None):
+        self.tamano = tamano
+        self.rng = np.random.default_rng(semilla)
+        self.vistas = 0
+        self._filas: Optional[pd.DataFrame] = None
+
+    def agregar(self, df: pd.DataFrame) -> "MuestraAleatoria":
+        self.vistas += len(df)
+        nuevas = df.assign(_clave=self.rng.random(len(df)))
+        self._conservar(nuevas)
+        return self
+
+    def fusionar(self, otra: "MuestraAleatoria") -> "MuestraAleatoria":
+        fusionada = MuestraAleatoria(max(self.tamano, otra.tamano))
+        fusionada.vistas = self.vistas + otra.vistas
+        for filas in (self._filas, otra._filas):
+            if filas is not None:
+                fusionada._conservar(filas)
+        return fusionada
+
+    def datos(self, cantidad: Optional[int] = None) -> pd.DataFrame:
+        """Filas de la muestra en su orden original; con `cantidad`, una submuestra uniforme de ese tamaño"""
+
+        if self._filas is None:
+            return pd.DataFrame()
+        filas = self._filas if cantidad is None else self._filas.nsmallest(cantidad, "_clave")
+        return filas.sort_index().drop(columns="_clave")
+
+    def _conservar(self, filas: pd.DataFrame) -> None:
+        if self._filas is not None:
+            filas = pd.concat([self._filas, filas])
+        self._filas = filas.nsmallest(self.tamano, "_clave") if len(filas) > self.tamano else filas
+
+
+def datos_mapa(
+    bines: Union[BinesEspaciales, BinesPorZoom],
+    muestra: MuestraAleatoria,
+    presupuesto: int = PRESUPUESTO_PUNTOS,
+    modo: str = "celdas",
+) -> Tuple[str, pd.DataFrame]:
+    """
+    Elige qué dibujar: ("puntos", filas) si todos los árboles caben en el presupuesto; si no, ("celdas", bines)
+    o, con modo="muestra", ("muestra", filas) con a lo sumo `presupuesto` árboles elegidos al azar.
+    Con BinesPorZoom las celdas son las del nivel más fino que cabe en el presupuesto.
+    Así el tamaño de la figura depende del presupuesto o de la cantidad de celdas, no de la cantidad de árboles.
+    """
+    if modo not in ("celdas", "muestra"):
+        raise ValueError(f"Modo de mapa '{modo}' no soportado.")
+
+    if muestra.vistas <= min(presupuesto, muestra.tamano):
+        return "puntos", muestra.datos()
+    if modo == "muestra":
+        return "muestra", muestra.datos(presupuesto)
+    if isinstance(bines, BinesPorZoom):
+        bines = bines.para_presupuesto(presupuesto)
+    return "celdas", bines.resultado()
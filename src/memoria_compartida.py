@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+import numpy as np
+
+# Alineación de cada arreglo dentro del bloque, suficiente para cualquier tipo numérico
+_ALINEACION = 64
+
+
+@dataclass(frozen=True)
+class DescriptorCompartido:
+    """Nombre del bloque de memoria compartida y (desplazamiento, forma, tipo) de cada arreglo dentro de él"""
+
+    nombre: str
+    arreglos: Tuple[Tuple[str, int, Tuple[int, ...], str], ...]
+
+
+class BloqueCompartido:
+    """
+    Arreglos NumPy copiados una sola vez a un bloque de multiprocessing.shared_memory.
+    Los procesos trabajadores reciben solo el descriptor (unos cientos de bytes) y con adjuntar() obtienen
+    vistas de solo lectura sobre la misma memoria, sin copiar ni deserializar nada. Quien crea el bloque lo libera
+    con cerrar() o al salir del `with`.
+    """
+
+    def __init__(self, arreglos: Dict[str, np.ndarray]):
+        disposicion = []
+        desplazamiento = 0
+        for clave, arreglo in arreglos.items():
+            arreglo = np.asarray(arreglo)
+            if arreglo.dtype.hasobject:
+                raise TypeError(f"El arreglo '{clave}' tiene objetos de Python y no se puede compartir.")
+            desplazamiento = -(-desplazamiento // _ALINEACION) * _ALINEACION
+            disposicion.append((clave, desplazamiento, arreglo.shape, arreglo.dtype.str))
+            desplazamiento += arreglo.nbytes
+
+        self.memoria = shared_memory.SharedMemory(create=True, size=max(desplazamiento, 1))
+        self.descriptor = DescriptorCompartido(self.memoria.name, tuple(disposicion))
+        for (clave, inicio, forma, tipo), arreglo in zip(disposicion, arreglos.values()):
+            np.ndarray(forma, dtype=tipo, buffer=self.memoria.buf, offset=inicio)[...] = arreglo
+
+    @property
+    def tamano(self) -> int:
+        return self.memoria.size
+
+    def cerrar(self) -> None:
+        self.memoria.close()
+        self.memoria.unlink()
+
+    def __enter__(self) -> "BloqueCompartido":
+        return self
+
+    def __exit__(self, *excepcion) -> None:
+        self.cerrar()
+
+
+def adjuntar(descriptor: DescriptorCompartido) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+    """
+    Vistas de solo lectura de los arreglos de un BloqueCompartido creado en otro proceso.
+    Las vistas son válidas mientras el objeto SharedMemory devuelto siga vivo; hay que conservarlo.
+    """
+    memoria = shared_memory.SharedMemory(name=descriptor.nombre)
+    arreglos = {}
+    for clave, inicio, forma, tipo in descriptor.arreglos:
+        arreglo = np.ndarray(forma, dtype=tipo, buffer=memoria.buf, offset=inicio)
+        arreglo.flags.writeable = False
+        arreglos[clave] = arreglo
+    return memoria, arreglos
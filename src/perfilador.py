@@ -0,0 +1,99 @@
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional
+
+# Contexto vacío que se devuelve cuando el perfilador está desactivado
+_SIN_MEDICION = nullcontext()
+
+
+class _Etapa:
+    __slots__ = ("perfilador", "nombre", "inicio")
+
+    def __init__(self, perfilador: "Perfilador", nombre: str):
+        self.perfilador = perfilador
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *excepcion):
+        self.perfilador.tiempos[self.nombre] += time.perf_counter() - self.inicio
+        self.perfilador.llamadas[self.nombre] += 1
+
+
+class Perfilador:
+    """
+    Instrumentación por etapas: tiempos acumulados, número de llamadas y contadores de eventos.
+    `etapa` mide por bloque, así que su costo es despreciable y puede quedar activo en producción. Las etapas por
+    fila (`etapa_por_fila`, las del motor por registros) solo se miden con `por_fila=True`.
+    Los totales se acumulan hasta `reiniciar`; `reportar` recibe el resumen cada vez que termina una corrida (ver
+    `finalizar`).
+    """
+
+    def __init__(
+        self,
+        activo: bool = True,
+        reportar: Optional[Callable[[Dict[str, Any]], None]] = None,
+        por_fila: bool = False,
+    ):
+        self.activo = activo
+        self.reportar = reportar
+        self.por_fila = por_fila
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self.tiempos: Dict[str, float] = defaultdict(float)
+        self.llamadas: Dict[str, int] = defaultdict(int)
+        self.contadores: Dict[str, int] = defaultdict(int)
+
+    def etapa(self, nombre: str):
+        """Contexto que acumula el tiempo de la etapa `nombre`"""
+
+        return _Etapa(self, nombre) if self.activo else _SIN_MEDICION
+
+    def etapa_por_fila(self, nombre: str):
+        """Como etapa, para código que corre una vez por fila: sin `por_fila` no mide nada"""
+
+        return _Etapa(self, nombre) if self.activo and self.por_fila else _SIN_MEDICION
+
+    def contar(self, nombre: str, cantidad: int = 1) -> None:
+        if self.activo:
+            self.contadores[nombre] += cantidad
+
+    def resumen(self) -> Dict[str, Any]:
+        return {
+            "etapas": {
+                nombre: {"segundos": segundos, "llamadas": self.llamadas[nombre]}
+                for nombre, segundos in sorted(self.tiempos.items(), key=lambda item: -item[1])
+            },
+            "contadores": dict(sorted(self.contadores.items())),
+        }
+
+    def acumular(self, resumen: Dict[str, Any]) -> None:
+        """Suma el resumen de otro perfilador, por ejemplo el de un proceso trabajador"""
+
+        for nombre, etapa in resumen["etapas"].items():
+            self.tiempos[nombre] += etapa["segundos"]
+            self.llamadas[nombre] += etapa["llamadas"]
+        for nombre, cantidad in resumen["contadores"].items():
+            self.contadores[nombre] += cantidad
+
+    def finalizar(self) -> Dict[str, Any]:
+        """
+        Entrega el resumen a `reportar` (si existe) y lo devuelve. No reinicia los totales: quien empieza una
+        corrida nueva llama a `reiniciar` (TreeDataGenerator lo hace al comenzar cada una).
+        """
+
+        resumen = self.resumen()
+        if self.activo and self.reportar is not None:
+            self.reportar(resumen)
+        return resumen
+
+
+def perfilador_o_inactivo(perfilador: Optional[Perfilador]) -> Perfilador:
+    return perfilador if perfilador is not None else PERFILADOR_INACTIVO
+
+
+# Perfilador que no mide nada, usado cuando no se pasa uno
+PERFILADOR_INACTIVO = Perfilador(activo=False)
@@ -0,0 +1,173 @@
+import json
+import os
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from src.cache_resultados import hash_archivo
+from src.data_reference import RUTA_CACHE
+from src.generate_coord import LocalidadesGeo, cargar_localidades
+from src.perfilador import Perfilador
+
+RUTA_POOLS = os.path.join(RUTA_CACHE, "coordenadas")
+
+# Puntos precalculados por localidad; con los 20 polígonos del GeoJSON (las 19 localidades urbanas y Sumapaz) el pool
+# ocupa unos 80 MB. Se muestrea con reposición, así que una corrida de varios millones de filas repite coordenadas
+PUNTOS_POR_LOCALIDAD = 250_000
+
+# Puntos muestreados por llamada al construir el pool
+_BLOQUE_CONSTRUCCION = 100_000
+
+
+class PoolCoordenadas:
+    """
+    Coordenadas (latitud, longitud) uniformes dentro de cada localidad, precalculadas y leídas de un archivo .npy
+    mapeado en memoria con forma (localidades, puntos, 2). Muestrear es indexar el arreglo, sin geometría.
+    Los procesos que abren el mismo archivo comparten sus páginas; al enviarse a otro proceso solo viaja la ruta.
+    Tiene la misma interfaz de muestreo que LocalidadesGeo, así que el generador columnar usa cualquiera de los dos.
+    Cada muestra es una de `tamano` posiciones fijas: con millones de filas por localidad las coordenadas se repiten
+    (en promedio cada punto aparece filas / tamano veces), a diferencia del muestreo sobre la geometría.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        with open(_ruta_metadatos(ruta), encoding="utf-8") as archivo:
+            metadatos = json.load(archivo)
+
+        self.sha256: str = metadatos["sha256"]
+        self.localidades = list(metadatos["localidades"])
+        self._filas: Dict[str, int] = {nombre: i for i, nombre in enumerate(self.localidades)}
+        self.puntos = np.load(ruta, mmap_mode="r")
+
+    def __reduce__(self):
+        return PoolCoordenadas, (self.ruta,)
+
+    @property
+    def tamano(self) -> int:
+        """Puntos disponibles por localidad"""
+
+        return self.puntos.shape[1]
+
+    def muestrear(
+        self,
+        nombre_localidad: str,
+        cantidad: int,
+        rng: Optional[np.random.Generator] = None,
+        perfilador: Optional[Perfilador] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Toma `cantidad` coordenadas de la localidad (con reposición) como arreglos (latitudes, longitudes)"""
+
+        fila = self._filas.get(nombre_localidad)
+        if fila is None:
+            raise ValueError(f"Localidad '{nombre_localidad}' no encontrada.")
+
+        rng = rng if rng is not None else np.random.default_rng()
+        puntos = self.puntos[fila, rng.integers(0, self.tamano, cantidad)]
+        return puntos[:, 0], puntos[:, 1]
+
+    def muestrear_por_codigo(
+        self,
+        codigos: Sequence[int],
+        localidades: Dict[int, str],
+        rng: Optional[np.random.Generator] = None,
+        uniformes: Optional[np.ndarray] = None,
+        perfilador: Optional[Perfilador] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Una coordenada por cada código de localidad del vector `codigos`, como en LocalidadesGeo.
+        Con `uniformes` de forma (3, n) el punto i es el de posición floor(uniformes[0, i] * tamano) del pool.
+        """
+        codigos = np.asarray(codigos)
+        filas_por_codigo = np.full(max(localidades) + 1, -1, dtype=np.int64)
+        for codigo, nombre in localidades.items():
+            if nombre not in self._filas:
+                raise ValueError(f"Localidad '{nombre}' no encontrada.")
+            filas_por_codigo[codigo] = self._filas[nombre]
+        validos = (codigos >= 0) & (codigos < len(filas_por_codigo))
+        filas = np.where(validos, filas_por_codigo[np.where(validos, codigos, 0)], -1)
+        if (filas < 0).any():
+            desconocidos = ", ".join(str(codigo) for codigo in np.unique(codigos[filas < 0]))
+            raise ValueError(f"Localidad con código {desconocidos} no encontrada.")
+
+        if uniformes is not None:
+            posiciones = (np.asarray(uniformes)[0] * self.tamano).astype(np.int64)
+        else:
+            rng = rng if rng is not None else np.random.default_rng()
+            posiciones = rng.integers(0, self.tamano, len(codigos))
+
+        if perfilador is not None:
+            for codigo, cantidad in zip(*np.unique(codigos, return_counts=True)):
+                perfilador.contar(f"coordenadas[{localidades[int(codigo)]}]", int(cantidad))
+
+        puntos = self.puntos[filas, posiciones]
+        return puntos[:, 0], puntos[:, 1]
+
+
+def _ruta_metadatos(ruta: str) -> str:
+    return os.path.splitext(ruta)[0] + ".json"
+
+
+def construir_pool(
+    localidades_geo: LocalidadesGeo, ruta: str, sha256: str, puntos_por_localidad: int = PUNTOS_POR_LOCALIDAD
+) -> PoolCoordenadas:
+    """
+    Muestrea `puntos_por_localidad` coordenadas de cada localidad con LocalidadesGeo.muestrear y las escribe en `ruta`.
+    La semilla sale del hash del GeoJSON, así que el mismo GeoJSON produce siempre el mismo pool.
+    """
+    if puntos_por_localidad <= 0:
+        raise ValueError("El pool necesita al menos un punto por localidad.")
+
+    rng = np.random.default_rng(int(sha256[:16], 16))
+    nombres = list(localidades_geo.poligonos)
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    puntos = np.lib.format.open_memmap(
+        temporal, mode="w+", dtype=np.float64, shape=(len(nombres), puntos_por_localidad, 2)
+    )
+    for fila, nombre in enumerate(nombres):
+        for inicio in range(0, puntos_por_localidad, _BLOQUE_CONSTRUCCION):
+            fin = min(inicio + _BLOQUE_CONSTRUCCION, puntos_por_localidad)
+            puntos[fila, inicio:fin, 0], puntos[fila, inicio:fin, 1] = localidades_geo.muestrear(
+                nombre, fin - inicio, rng
+            )
+    puntos.flush()
+    del puntos
+
+    # Los metadatos se escriben antes que el arreglo: un .npy visible siempre tiene su .json completo
+    with open(_ruta_metadatos(ruta), "w", encoding="utf-8") as archivo:
+        json.dump({"sha256": sha256, "localidades": nombres}, archivo, ensure_ascii=False)
+    os.replace(temporal, ruta)
+    return PoolCoordenadas(ruta)
+
+
+_POOLS_CACHE: Dict[Tuple[str, int, str], Tuple[Tuple[int, int], PoolCoordenadas]] = {}
+
+
+def cargar_pool(
+    ruta_geojson: str, puntos_por_localidad: int = PUNTOS_POR_LOCALIDAD, directorio: str = RUTA_POOLS
+) -> PoolCoordenadas:
+    """
+    Devuelve el pool del GeoJSON, construyéndolo solo si no existe uno para su contenido actual.
+    El archivo se nombra por el hash SHA-256 del GeoJSON, así que cambiar las geometrías crea un pool nuevo.
+    """
+    if not os.path.exists(ruta_geojson):
+        raise FileNotFoundError(f"El archivo '{ruta_geojson}' no existe.")
+
+    # Dentro del proceso, el hash se recalcula solo si cambian la fecha de modificación o el tamaño del GeoJSON
+    llave = (os.path.abspath(ruta_geojson), puntos_por_localidad, directorio)
+    estado = os.stat(ruta_geojson)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    en_memoria = _POOLS_CACHE.get(llave)
+    if en_memoria is not None and en_memoria[0] == firma:
+        return en_memoria[1]
+
+    sha256 = hash_archivo(ruta_geojson).hexdigest()
+    ruta = os.path.join(directorio, f"pool-{sha256[:16]}-{puntos_por_localidad}.npy")
+    if os.path.exists(ruta):
+        pool = PoolCoordenadas(ruta)
+    else:
+        pool = construir_pool(cargar_localidades(ruta_geojson), ruta, sha256, puntos_por_localidad)
+
+    _POOLS_CACHE[llave] = (firma, pool)
+    return pool
@@ -0,0 +1,125 @@
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from src.data_writer import ProgresoEscritura
+
+VERSION = 3
+
+# Archivos de un bloque en una salida particionada, como los nombra data_writer.escribir_columnar
+_PARTE_BLOQUE = re.compile(r"^part-(\d+)-")
+
+
+@dataclass
+class PuntoControl:
+    """
+    Estado confirmado de una generación por bloques, guardado en JSON junto a la salida.
+    `filas`, `bloques` y `bytes` describen lo ya escrito; `generador` es TreeDataGenerator.estado() tras el último
+    bloque confirmado, así que una corrida nueva continúa con los mismos IDs, flujo aleatorio y SIGAU.
+    """
+
+    formato: str
+    modo: str
+    compacto: bool
+    ponderar_especies: bool
+    # Las coordenadas del pool no son las del muestreo sobre la geometría: cambiar de fuente rompe la continuidad
+    pool_coordenadas: bool
+    particionar_por: Optional[List[str]]
+    # En el modo secuencial los valores sorteados dependen de dónde empieza cada bloque
+    tamano_bloque: int
+    # Filas que debe tener la salida al terminar
+    objetivo: int
+    filas: int = 0
+    bloques: int = 0
+    # Tamaño del CSV hasta la última fila confirmada; lo que haya después se descarta al reanudar
+    bytes: int = 0
+    generador: Dict[str, Any] = field(default_factory=dict)
+    version: int = VERSION
+
+    @property
+    def completo(self) -> bool:
+        return self.filas >= self.objetivo
+
+    @property
+    def restantes(self) -> int:
+        return max(self.objetivo - self.filas, 0)
+
+    def guardar(self, ruta: str) -> None:
+        """Escribe el punto de control de forma atómica: un corte deja el anterior o el nuevo, nunca uno a medias"""
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(asdict(self), archivo)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "PuntoControl":
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"No hay punto de control en '{ruta}'.")
+
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        if datos.get("version") != VERSION:
+            raise ValueError(f"Versión de punto de control no soportada: {datos.get('version')}.")
+        return cls(**datos)
+
+
+def ruta_punto_control(ruta_salida: str) -> str:
+    """El punto de control de `salida.csv` (o del directorio `salida/`) es `salida.csv.punto_control.json`"""
+
+    return os.path.normpath(ruta_salida) + ".punto_control.json"
+
+
+def preparar_salida(punto: PuntoControl, ruta_salida: str) -> None:
+    """
+    Deja la salida exactamente como estaba en el punto de control: recorta el CSV a `punto.bytes` o borra los
+    archivos de bloques no confirmados de un directorio particionado.
+    """
+    if punto.formato == "csv":
+        if not os.path.exists(ruta_salida):
+            if punto.bytes:
+                raise FileNotFoundError(f"El archivo '{ruta_salida}' no existe.")
+            return
+        if os.path.getsize(ruta_salida) < punto.bytes:
+            raise ValueError(f"'{ruta_salida}' es más corto que su punto de control; no se puede continuar.")
+        with open(ruta_salida, "r+b") as archivo:
+            archivo.truncate(punto.bytes)
+        return
+
+    for directorio, _, archivos in os.walk(ruta_salida):
+        for nombre in archivos:
+            coincidencia = _PARTE_BLOQUE.match(nombre)
+            if coincidencia and int(coincidencia.group(1)) >= punto.bloques:
+                os.remove(os.path.join(directorio, nombre))
+
+
+def registrar_bloques(
+    punto: PuntoControl,
+    ruta: str,
+    estado: Callable[[], Dict[str, Any]],
+    reportar: Optional[Callable[[ProgresoEscritura], None]] = None,
+) -> Callable[[ProgresoEscritura], None]:
+    """
+    Callback para data_writer.escribir: tras cada bloque escrito actualiza y guarda el punto de control con
+    `estado()` (el del generador) y luego llama a `reportar`, si se indicó.
+    """
+    filas_previas = punto.filas
+
+    def registrar(progreso: ProgresoEscritura) -> None:
+        punto.filas = filas_previas + progreso.filas
+        punto.bloques += 1
+        if punto.formato == "csv":
+            punto.bytes = progreso.bytes_escritos
+        punto.generador = estado()
+        punto.guardar(ruta)
+        if reportar is not None:
+            reportar(progreso)
+
+    return registrar
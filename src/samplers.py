@@ -0,0 +1,101 @@
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Sequence
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.data_generator import DataConfig
+
+
+class TablaAlias:
+    """Muestreo categórico ponderado en tiempo constante con el método de alias de Walker/Vose"""
+
+    def __init__(self, pesos: Sequence[float]):
+        pesos = np.asarray(pesos, dtype=np.float64)
+        if len(pesos) == 0 or (pesos < 0).any() or pesos.sum() <= 0:
+            raise ValueError("Los pesos deben ser no negativos y sumar un valor positivo.")
+
+        n = len(pesos)
+        escalados = pesos * n / pesos.sum()
+        self.probabilidad = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n, dtype=np.int64)
+
+        pequenos = [i for i in range(n) if escalados[i] < 1]
+        grandes = [i for i in range(n) if escalados[i] >= 1]
+        while pequenos and grandes:
+            menor, mayor = pequenos.pop(), grandes.pop()
+            self.probabilidad[menor] = escalados[menor]
+            self.alias[menor] = mayor
+            escalados[mayor] -= 1 - escalados[menor]
+            (pequenos if escalados[mayor] < 1 else grandes).append(mayor)
+
+        # Los restantes quedan con probabilidad 1 (solo difieren de 1 por error de redondeo)
+        self._probabilidad = self.probabilidad.tolist()
+        self._alias = self.alias.tolist()
+
+    def __len__(self) -> int:
+        return len(self.alias)
+
+    def muestrear(self, rng: random.Random) -> int:
+        """Sortea un índice con un generador de `random` (el del motor por registros)"""
+
+        return self._desde_uniforme(rng.random())
+
+    def muestrear_lote(self, cantidad: int, rng: np.random.Generator) -> np.ndarray:
+        """Sortea `cantidad` índices de una vez"""
+
+        return self.desde_uniformes(rng.random(cantidad))
+
+    def desde_uniformes(self, uniformes: np.ndarray) -> np.ndarray:
+        """
+        Convierte uniformes en [0, 1) en índices: la parte entera de u·n elige la columna y la fraccionaria
+        decide entre la columna y su alias. Un solo uniforme por sorteo.
+        """
+        escalados = np.asarray(uniformes) * len(self.alias)
+        columnas = np.minimum(escalados.astype(np.int64), len(self.alias) - 1)
+        return np.where(escalados - columnas < self.probabilidad[columnas], columnas, self.alias[columnas])
+
+    def _desde_uniforme(self, uniforme: float) -> int:
+        escalado = uniforme * len(self._alias)
+        columna = min(int(escalado), len(self._alias) - 1)
+        return columna if escalado - columna < self._probabilidad[columna] else self._alias[columna]
+
+
+@dataclass
+class Muestreadores:
+    """Tablas de alias de cada campo categórico, construidas una sola vez desde DataConfig"""
+
+    anios: TablaAlias
+    especies: TablaAlias
+    tratamientos: TablaAlias
+    localidades: TablaAlias
+    tipos_ct: TablaAlias
+    espacios: TablaAlias
+    emplazamientos: TablaAlias
+    interes_patrimonial: TablaAlias
+    autorizados: TablaAlias
+
+    # Valores a los que apunta cada índice, en el mismo orden que las tablas
+    valores_interes_patrimonial: List[str]
+
+    @classmethod
+    def desde_config(cls, config: "DataConfig", ponderar_especies: bool = False) -> "Muestreadores":
+        """Con `ponderar_especies` las especies se sortean según su abundancia (columna `total`)"""
+
+        def uniforme(cantidad: int) -> TablaAlias:
+            return TablaAlias(np.ones(cantidad))
+
+        pesos_especies = [especie["total"] for especie in config.especies.values()] if ponderar_especies else None
+
+        return cls(
+            anios=uniforme(len(config.valores_anuales)),
+            especies=TablaAlias(pesos_especies) if ponderar_especies else uniforme(len(config.especies)),
+            tratamientos=uniforme(len(config.tratamientos)),
+            localidades=uniforme(len(config.localidades)),
+            tipos_ct=uniforme(len(config.tipos_ct)),
+            espacios=uniforme(len(config.espacios)),
+            emplazamientos=uniforme(len(config.emplazamientos)),
+            interes_patrimonial=TablaAlias([0.05, 0.95]),
+            autorizados=TablaAlias(list(config.autorizados.values())),
+            valores_interes_patrimonial=["Si", "No"],
+        )
@@ -0,0 +1,76 @@
+from typing import TYPE_CHECKING, Any, Dict, List
+import pandas as pd
+
+if TYPE_CHECKING:
+    from src.data_generator import DataConfig
+
+# Tipos numéricos compactos según el rango de valores de cada columna.
+# Latitud y Longitud se mantienen en float64: en float32 perderían precisión (del orden de un metro).
+TIPOS_NUMERICOS: Dict[str, str] = {
+    "ID": "int64",
+    "Anio": "int16",
+    "IVP": "float32",
+    "Salario Minimo": "int32",
+    "Estrato": "int8",
+    "Latitud": "float64",
+    "Longitud": "float64",
+    "PAP": "float32",
+    "DAP": "float32",
+    "Altura Total": "float32",
+    "Altura Comercial": "float32",
+    "Diam. Copa Polar": "float32",
+    "Diam. Copa Ecuatorial": "float32",
+    "Perimetro basal": "float32",
+    "Estado fuste": "int8",
+    "Estado Copa": "int8",
+    "Estado Raiz": "int8",
+    "Estado FitoSanitario": "int8",
+}
+
+# Columnas de texto con muchos valores distintos, que se mantienen como texto ("str", respaldado por pyarrow en
+# pandas 3). SIGAU es único por árbol y Consecutivo y Concepto tienen 100.000 y 600.000 valores posibles: como
+# categóricas, el vocabulario ocupa más que los datos en bloques de 100.000 filas.
+# Estas tres columnas (unos 60 bytes por fila) y las de 8 bytes (ID, Latitud, Longitud) fijan el tamaño del esquema
+# compacto en unos 139 bytes por fila, frente a 368 del esquema original: unas 2,7 veces menos memoria.
+COLUMNAS_TEXTO: List[str] = ["Concepto", "Consecutivo", "SIGAU"]
+
+
+def _sin_repetidos(valores) -> List[str]:
+    return list(dict.fromkeys(valores))
+
+
+def vocabularios(config: "DataConfig") -> Dict[str, List[str]]:
+    """Valores posibles de cada columna categórica, tomados de los datos de referencia"""
+
+    return {
+        "TipoCT": _sin_repetidos(config.tipos_ct),
+        "Especie": _sin_repetidos(especie["nombre_comun"] for especie in config.especies.values()),
+        "Tratamiento": _sin_repetidos(config.tratamientos),
+        "Espacio": _sin_repetidos(config.espacios),
+        "Emplazamiento": _sin_repetidos(config.emplazamientos),
+        "Localidad": _sin_repetidos(config.localidades.values()),
+        "Estado General": _sin_repetidos(config.estados_generales.values()),
+        "Riesgo": _sin_repetidos(config.riesgos.values()),
+        "Interes patrimonial": ["Si", "No"],
+        "Autorizado": _sin_repetidos(config.autorizados),
+    }
+
+
+def tipos_compactos(config: "DataConfig") -> Dict[str, Any]:
+    """Tipo de cada una de las 31 columnas en el esquema compacto"""
+
+    categoricas = {columna: pd.CategoricalDtype(valores) for columna, valores in vocabularios(config).items()}
+    return {**TIPOS_NUMERICOS, **categoricas, **{columna: "str" for columna in COLUMNAS_TEXTO}}
+
+
+def aplicar_esquema(df: pd.DataFrame, config: "DataConfig") -> pd.DataFrame:
+    """Convierte un DataFrame de árboles al esquema compacto (categóricas y tipos numéricos estrechos)"""
+
+    tipos = tipos_compactos(config)
+    return df.astype({columna: tipo for columna, tipo in tipos.items() if columna in df.columns})
+
+
+def leer_csv(ruta: str, config: "DataConfig", **kwargs) -> pd.DataFrame:
+    """Lee un CSV de árboles directamente en el esquema compacto, conservando los ceros iniciales del SIGAU"""
+
+    return pd.read_csv(ruta, dtype=tipos_compactos(config), **kwargs)
@@ -0,0 +1,462 @@
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.columnar_generator import enteros_a_texto, mezclar64
+from src.data_analysis import TAMANO_BLOQUE, leer_parte, listar_partes
+from src.data_generator import RUTA_GEOJSON, DataConfig
+from src.generate_coord import cargar_localidades
+
+# Las medidas se guardan redondeadas a dos decimales; el margen relativo cubre la precisión de float32
+# (unas 7 cifras significativas) en el esquema compacto
+TOLERANCIA = 0.005
+TOLERANCIA_RELATIVA = 1e-6
+
+# Ejemplos guardados por verificación en el reporte
+MAX_EJEMPLOS = 5
+
+# Cubetas en disco para buscar SIGAU repetidos sin tenerlos todos en memoria
+CUBETAS_SIGAU = 64
+# SIGAU acumulados por parte antes de volcarlos a disco, y por tramo de cubetas al buscar repetidos (8 bytes c/u)
+VOLCADO_SIGAU = 4_000_000
+GRUPO_SIGAU = 8_000_000
+
+# Verificaciones en el orden del reporte
+VERIFICACIONES = [
+    "especie_desconocida",
+    "pap_fuera_de_rango",
+    "altura_total_fuera_de_rango",
+    "altura_comercial_fuera_de_rango",
+    "copa_polar_fuera_de_rango",
+    "copa_ecuatorial_fuera_de_rango",
+    "dap_formula",
+    "perimetro_basal_formula",
+    "tratamiento_desconocido",
+    "estados_tratamiento",
+    "estado_general",
+    "riesgo",
+    "localidad_desconocida",
+    "sigau_formato",
+    "sigau_prefijo",
+    "sigau_duplicado",
+    "coordenada_fuera_de_localidad",
+]
+
+COLUMNAS_REQUERIDAS = [
+    "ID",
+    "SIGAU",
+    "Especie",
+    "Tratamiento",
+    "Localidad",
+    "Latitud",
+    "Longitud",
+    "PAP",
+    "DAP",
+    "Altura Total",
+    "Altura Comercial",
+    "Diam. Copa Polar",
+    "Diam. Copa Ecuatorial",
+    "Perimetro basal",
+    "Estado fuste",
+    "Estado Copa",
+    "Estado Raiz",
+    "Estado FitoSanitario",
+    "Estado General",
+    "Riesgo",
+]
+
+# Límites de especie de cada verificación de rango: (columna, campo mínimo, campo máximo)
+_RANGOS = {
+    "pap_fuera_de_rango": ("PAP", "min_pap", "max_pap"),
+    "altura_total_fuera_de_rango": ("Altura Total", "min_alturatotal", "max_alturatotal"),
+    "copa_polar_fuera_de_rango": ("Diam. Copa Polar", "min_diamcopamayor", "max_diamcopamayor"),
+    "copa_ecuatorial_fuera_de_rango": ("Diam. Copa Ecuatorial", "min_diamcopamenor", "max_diamcopamenor"),
+}
+
+
+def _indices(valores: pd.Series, categorias: pd.Index) -> np.ndarray:
+    """
+    Posición de cada valor en `categorias` (-1 si no está o está vacío). Solo se buscan los valores distintos:
+    las categorías de una columna categórica o los que da factorize en una de texto.
+    """
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        codigos, distintos = valores.cat.codes.to_numpy(), valores.cat.categories
+    else:
+        codigos, distintos = pd.factorize(valores)
+    return np.append(categorias.get_indexer(distintos), -1)[codigos]
+
+
+def sigau_a_enteros(sigau: pd.Series) -> np.ndarray:
+    """SIGAU de 14 dígitos como enteros; -1 para los que no tienen ese formato (incluidos los vacíos)"""
+
+    # Con un carácter más que el formato, los códigos más largos no se truncan y los más cortos terminan en \0
+    caracteres = np.asarray(sigau.astype(str), dtype="U15").view(np.uint32).reshape(-1, 15)
+    digitos = caracteres[:, :14].astype(np.int64) - ord("0")
+    validos = ((digitos >= 0) & (digitos <= 9)).all(axis=1) & (caracteres[:, 14] == 0)
+    valores = digitos @ (10 ** np.arange(13, -1, -1, dtype=np.int64))
+    return np.where(validos, valores, -1)
+
+
+@dataclass
+class ReglasValidacion:
+    """Datos de referencia de DataConfig como arreglos indexados por la posición de cada valor en su vocabulario"""
+
+    especies: pd.Index
+    # Límites por nombre de especie; los nombres repetidos en info_especies.csv toman la unión de sus rangos
+    limites: Dict[str, np.ndarray]
+    tratamientos: pd.Index
+    estados: np.ndarray
+    estados_generales: pd.Index
+    estado_general: np.ndarray
+    riesgos: pd.Index
+    riesgo: np.ndarray
+    localidades: pd.Index
+    codigos_localidad: np.ndarray
+
+    @classmethod
+    def desde_config(cls, config: DataConfig) -> "ReglasValidacion":
+        especies = pd.DataFrame(list(config.especies.values()))
+        minimos = especies.groupby("nombre_comun", sort=False).min()
+        maximos = especies.groupby("nombre_comun", sort=False).max()
+        limites = {}
+        for minimo, maximo in (campos[1:] for campos in _RANGOS.values()):
+            limites[minimo] = minimos[minimo].to_numpy(np.float64)
+            limites[maximo] = maximos[maximo].to_numpy(np.float64)
+
+        estados = np.array(
+            [[t["est_fuste"], t["est_copa"], t["est_raiz"], t["est_fito"]] for t in config.tratamientos.values()],
+            dtype=np.int64,
+        )
+        promedios = [math.floor(fila.sum() / 4) for fila in estados]
+        estados_generales = pd.Index(list(dict.fromkeys(config.estados_generales.values())))
+        riesgos = pd.Index(list(dict.fromkeys(config.riesgos.values())))
+
+        return cls(
+            especies=minimos.index,
+            limites=limites,
+            tratamientos=pd.Index(list(config.tratamientos)),
+            estados=estados,
+            estados_generales=estados_generales,
+            estado_general=estados_generales.get_indexer([config.estados_generales[p] for p in promedios]),
+            riesgos=riesgos,
+            riesgo=riesgos.get_indexer([config.riesgos[p] for p in promedios]),
+            localidades=pd.Index(list(config.localidades.values())),
+            codigos_localidad=np.array(list(config.localidades), dtype=np.int64),
+        )
+
+
+@dataclass
+class ReporteValidacion:
+    """
+    Conteo de filas que incumplen cada verificación y algunos ejemplos: los ID de las filas o, para
+    sigau_duplicado, los códigos repetidos. Fusionar los reportes de dos partes da el reporte de su unión.
+    """
+
+    filas: int = 0
+    violaciones: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(VERIFICACIONES, 0))
+    ejemplos: Dict[str, list] = field(default_factory=lambda: {verificacion: [] for verificacion in VERIFICACIONES})
+    max_ejemplos: int = MAX_EJEMPLOS
+
+    def registrar(self, verificacion: str, incumple: np.ndarray, ejemplos: np.ndarray) -> None:
+        cantidad = int(np.count_nonzero(incumple))
+        if cantidad == 0:
+            return
+        self.violaciones[verificacion] += cantidad
+        faltantes = self.max_ejemplos - len(self.ejemplos[verificacion])
+        if faltantes > 0:
+            self.ejemplos[verificacion].extend(ejemplos[incumple][:faltantes].tolist())
+
+    def fusionar(self, otro: "ReporteValidacion") -> "ReporteValidacion":
+        return ReporteValidacion(
+            filas=self.filas + otro.filas,
+            violaciones={v: self.violaciones[v] + otro.violaciones[v] for v in VERIFICACIONES},
+            ejemplos={v: (self.ejemplos[v] + otro.ejemplos[v])[: self.max_ejemplos] for v in VERIFICACIONES},
+            max_ejemplos=self.max_ejemplos,
+        )
+
+    @property
+    def valido(self) -> bool:
+        return not any(self.violaciones.values())
+
+    def resumen(self) -> pd.DataFrame:
+        """Una fila por verificación con la cantidad de violaciones, su proporción y los ejemplos"""
+
+        return pd.DataFrame(
+            {
+                "violaciones": [self.violaciones[v] for v in VERIFICACIONES],
+                "proporcion": [self.violaciones[v] / self.filas if self.filas else 0.0 for v in VERIFICACIONES],
+                "ejemplos": [self.ejemplos[v] for v in VERIFICACIONES],
+            },
+            index=pd.Index(VERIFICACIONES, name="verificacion"),
+        )
+
+    def a_dict(self) -> dict:
+        """Reporte compacto para JSON: solo las verificaciones con violaciones"""
+
+        return {
+            "filas": self.filas,
+            "valido": self.valido,
+            "violaciones": {v: self.violaciones[v] for v in VERIFICACIONES if self.violaciones[v]},
+            "ejemplos": {v: self.ejemplos[v] for v in VERIFICACIONES if self.violaciones[v]},
+        }
+
+
+def validar_bloque(
+    df: pd.DataFrame,
+    reglas: ReglasValidacion,
+    reporte: ReporteValidacion,
+    localidades_geo=None,
+    cubetas: Optional["CubetasSigau"] = None,
+) -> None:
+    """
+    Evalúa todas las verificaciones sobre el bloque con operaciones vectorizadas y las acumula en `reporte`.
+    Los SIGAU válidos se agregan a `cubetas` para buscar repetidos al final; sin `localidades_geo` no se
+    verifican las coordenadas.
+    """
+    faltantes = [columna for columna in COLUMNAS_REQUERIDAS if columna not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas para validar: {faltantes}.")
+
+    ids = df["ID"].to_numpy()
+    reporte.filas += len(df)
+
+    def columna(nombre: str) -> np.ndarray:
+        return df[nombre].to_numpy(np.float64)
+
+    def cerca(valores: np.ndarray, esperados) -> np.ndarray:
+        return np.abs(valores - esperados) <= TOLERANCIA + TOLERANCIA_RELATIVA * np.abs(esperados)
+
+    def fuera(valores: np.ndarray, minimo, maximo) -> np.ndarray:
+        # Las comparaciones con NaN son falsas, así que un valor vacío también queda fuera
+        holgura = TOLERANCIA + TOLERANCIA_RELATIVA * np.abs(valores)
+        return ~((valores >= minimo - holgura) & (valores <= maximo + holgura))
+
+    # Medidas dentro de los límites de la especie
+    especie = _indices(df["Especie"], reglas.especies)
+    conocida = especie >= 0
+    reporte.registrar("especie_desconocida", ~conocida, ids)
+    for verificacion, (nombre, minimo, maximo) in _RANGOS.items():
+        incumple = np.zeros(len(df), dtype=bool)
+        incumple[conocida] = fuera(
+            columna(nombre)[conocida],
+            reglas.limites[minimo][especie[conocida]],
+            reglas.limites[maximo][especie[conocida]],
+        )
+        reporte.registrar(verificacion, incumple, ids)
+
+    pap, altura_total = columna("PAP"), columna("Altura Total")
+    reporte.registrar("altura_comercial_fuera_de_rango", fuera(columna("Altura Comercial"), 0, altura_total), ids)
+
+    # Fórmulas de _seleccionar_especie: DAP = round(PAP * π, 2) y perímetro basal = round(PAP * π * 1.1, 2)
+    reporte.registrar("dap_formula", ~cerca(columna("DAP"), pap * math.pi), ids)
+    reporte.registrar("perimetro_basal_formula", ~cerca(columna("Perimetro basal"), pap * math.pi * 1.1), ids)
+
+    # Estados, estado general y riesgo según TRATAMIENTOS
+    tratamiento = _indices(df["Tratamiento"], reglas.tratamientos)
+    conocido = tratamiento >= 0
+    reporte.registrar("tratamiento_desconocido", ~conocido, ids)
+    estados = df[["Estado fuste", "Estado Copa", "Estado Raiz", "Estado FitoSanitario"]].to_numpy(np.float64)
+    reporte.registrar("estados_tratamiento", conocido & (estados != reglas.estados[tratamiento]).any(axis=1), ids)
+    estado_general = _indices(df["Estado General"], reglas.estados_generales)
+    reporte.registrar("estado_general", conocido & (estado_general != reglas.estado_general[tratamiento]), ids)
+    riesgo = _indices(df["Riesgo"], reglas.riesgos)
+    reporte.registrar("riesgo", conocido & (riesgo != reglas.riesgo[tratamiento]), ids)
+
+    # SIGAU: 14 dígitos cuyos dos primeros son el código de la localidad
+    localidad = _indices(df["Localidad"], reglas.localidades)
+    reporte.registrar("localidad_desconocida", localidad < 0, ids)
+    sigau = sigau_a_enteros(df["SIGAU"])
+    valido = sigau >= 0
+    reporte.registrar("sigau_formato", ~valido, ids)
+    prefijo = sigau // 10**12
+    reporte.registrar(
+        "sigau_prefijo", valido & (localidad >= 0) & (prefijo != reglas.codigos_localidad[localidad]), ids
+    )
+    if cubetas is not None:
+        cubetas.agregar(sigau[valido])
+
+    if localidades_geo is not None:
+        # Código del GeoJSON → posición en reglas.localidades; fuera de todas o en una desconocida queda en -1
+        posiciones = np.full(max(localidades_geo.nombres) + 2, -1, dtype=np.int64)
+        posiciones[list(localidades_geo.nombres)] = reglas.localidades.get_indexer(
+            list(localidades_geo.nombres.values())
+        )
+        encontrada = posiciones[localidades_geo.localizar(columna("Latitud"), columna("Longitud"))]
+        reporte.registrar("coordenada_fuera_de_localidad", (localidad >= 0) & (encontrada != localidad), ids)
+
+
+class CubetasSigau:
+    """
+    SIGAU de una parte repartidos en cubetas por hash, para buscar repetidos sin tenerlos todos en memoria.
+    Se acumulan hasta VOLCADO_SIGAU y se vuelcan a un archivo ordenado por cubeta con los límites de cada una
+    al comienzo; un código repetido siempre cae en la misma cubeta, aunque venga de otra parte.
+    """
+
+    def __init__(self, directorio: str, parte: int):
+        self.directorio = directorio
+        self.parte = parte
+        self.pendientes: List[np.ndarray] = []
+        self.cantidad = 0
+        self.volcados = 0
+
+    def agregar(self, sigau: np.ndarray) -> None:
+        self.pendientes.append(sigau)
+        self.cantidad += len(sigau)
+        if self.cantidad >= VOLCADO_SIGAU:
+            self.volcar()
+
+    def volcar(self) -> None:
+        if not self.cantidad:
+            return
+        valores = np.concatenate(self.pendientes)
+        cubeta = (mezclar64(valores.astype(np.uint64)) % np.uint64(CUBETAS_SIGAU)).astype(np.int64)
+        limites = np.concatenate([[0], np.cumsum(np.bincount(cubeta, minlength=CUBETAS_SIGAU))])
+        ruta = os.path.join(self.directorio, f"sigau-{self.parte:05d}-{self.volcados:04d}.bin")
+        with open(ruta, "wb") as archivo:
+            limites.astype(np.int64).tofile(archivo)
+            valores[np.argsort(cubeta, kind="stable")].tofile(archivo)
+        self.pendientes, self.cantidad = [], 0
+        self.volcados += 1
+
+
+def _leer_cubetas(ruta: str, desde: int, hasta: int) -> np.ndarray:
+    """SIGAU de las cubetas [desde, hasta) de un volcado: un tramo contiguo del archivo"""
+
+    limites = np.fromfile(ruta, dtype=np.int64, count=CUBETAS_SIGAU + 1)
+    desplazamiento = (CUBETAS_SIGAU + 1 + limites[desde]) * 8
+    return np.fromfile(ruta, dtype=np.int64, count=limites[hasta] - limites[desde], offset=desplazamiento)
+
+
+def _grupos_cubetas(volcados: List[str]) -> List[Tuple[int, int]]:
+    """Cubetas consecutivas agrupadas en tramos de unos GRUPO_SIGAU códigos; un dataset chico usa un solo tramo"""
+
+    tamanos = sum(np.diff(np.fromfile(ruta, dtype=np.int64, count=CUBETAS_SIGAU + 1)) for ruta in volcados)
+    grupos, desde, acumulado = [], 0, 0
+    for cubeta, tamano in enumerate(tamanos):
+        acumulado += tamano
+        if acumulado >= GRUPO_SIGAU:
+            grupos.append((desde, cubeta + 1))
+            desde, acumulado = cubeta + 1, 0
+    if desde < CUBETAS_SIGAU:
+        grupos.append((desde, CUBETAS_SIGAU))
+    return grupos
+
+
+def _repetidos(volcados: List[str], desde: int, hasta: int, max_ejemplos: int) -> ReporteValidacion:
+    """Cuenta los SIGAU repetidos de un tramo de cubetas: cada aparición después de la primera es una violación"""
+
+    valores = np.concatenate([_leer_cubetas(ruta, desde, hasta) for ruta in volcados])
+    valores.sort()
+    repetidos = valores[1:][valores[1:] == valores[:-1]]
+
+    reporte = ReporteValidacion(max_ejemplos=max_ejemplos)
+    reporte.violaciones["sigau_duplicado"] = len(repetidos)
+    reporte.ejemplos["sigau_duplicado"] = enteros_a_texto(np.unique(repetidos)[:max_ejemplos], 14).tolist()
+    return reporte
+
+
+def _fusionar_repetidos(reporte: ReporteValidacion, directorio: str, pool=None) -> ReporteValidacion:
+    volcados = sorted(os.path.join(directorio, nombre) for nombre in os.listdir(directorio))
+    if not volcados:
+        return reporte
+    argumentos = [(volcados, desde, hasta, reporte.max_ejemplos) for desde, hasta in _grupos_cubetas(volcados)]
+    repetidos = pool.map(_repetidos, *zip(*argumentos)) if pool else [_repetidos(*a) for a in argumentos]
+    return reduce(ReporteValidacion.fusionar, repetidos, reporte)
+
+
+def _validar_en_cubetas(
+    bloques: Iterable[pd.DataFrame],
+    numero: int,
+    directorio: str,
+    reglas: ReglasValidacion,
+    ruta_geojson: Optional[str],
+    max_ejemplos: int,
+) -> ReporteValidacion:
+    """Valida los bloques de una parte; sus SIGAU quedan en los volcados con ese `numero`"""
+
+    localidades_geo = cargar_localidades(ruta_geojson) if ruta_geojson else None
+    reporte = ReporteValidacion(max_ejemplos=max_ejemplos)
+    cubetas = CubetasSigau(directorio, numero)
+    for bloque in bloques:
+        validar_bloque(bloque, reglas, reporte, localidades_geo, cubetas)
+    cubetas.volcar()
+    return reporte
+
+
+def _validar_parte(ruta: str, parte: str, tamano_bloque: int, *args) -> ReporteValidacion:
+    return _validar_en_cubetas(leer_parte(ruta, parte, tamano_bloque, columnas=COLUMNAS_REQUERIDAS), *args)
+
+
+def validar(
+    ruta: str,
+    procesos: Optional[int] = None,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    config: Optional[DataConfig] = None,
+    ruta_geojson: Optional[str] = RUTA_GEOJSON,
+    max_ejemplos: int = MAX_EJEMPLOS,
+) -> ReporteValidacion:
+    """
+    Valida un CSV, archivo Parquet/Feather o directorio particionado contra los datos de referencia.
+    Cada parte se recorre por bloques de `tamano_bloque` filas en un proceso distinto (con `procesos` > 1);
+    los SIGAU se reparten en cubetas en disco (CubetasSigau) y cada tramo de cubetas se ordena por separado para
+    encontrar repetidos en todo el dataset. Con ruta_geojson=None no se verifican las coordenadas.
+    """
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"El archivo '{ruta}' no se encontró.")
+
+    partes = listar_partes(ruta)
+    if not partes:
+        raise ValueError(f"El directorio '{ruta}' no contiene archivos de datos.")
+    reglas = ReglasValidacion.desde_config(config if config is not None else DataConfig())
+
+    with tempfile.TemporaryDirectory(prefix="validacion-") as directorio:
+        argumentos = [
+            (ruta, parte, tamano_bloque, numero, directorio, reglas, ruta_geojson, max_ejemplos)
+            for numero, parte in enumerate(partes)
+        ]
+        vacio = ReporteValidacion(max_ejemplos=max_ejemplos)
+        if procesos == 1 or len(partes) <= 1:
+            reporte = reduce(ReporteValidacion.fusionar, (_validar_parte(*args) for args in argumentos), vacio)
+            return _fusionar_repetidos(reporte, directorio)
+
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            reporte = reduce(ReporteValidacion.fusionar, pool.map(_validar_parte, *zip(*argumentos)), vacio)
+            return _fusionar_repetidos(reporte, directorio, pool)
+
+
+def validar_bloques(
+    bloques: Iterable[pd.DataFrame], config: Optional[DataConfig] = None, ruta_geojson: Optional[str] = RUTA_GEOJSON
+) -> ReporteValidacion:
+    """Valida DataFrames ya cargados (por ejemplo los de generar_por_bloques), en un solo proceso"""
+
+    reglas = ReglasValidacion.desde_config(config if config is not None else DataConfig())
+    with tempfile.TemporaryDirectory(prefix="validacion-") as directorio:
+        reporte = _validar_en_cubetas(bloques, 0, directorio, reglas, ruta_geojson, MAX_EJEMPLOS)
+        return _fusionar_repetidos(reporte, directorio)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Valida la consistencia de un dataset de árboles generado.")
+    parser.add_argument("ruta", help="CSV, archivo Parquet/Feather o directorio particionado")
+    parser.add_argument("-p", "--procesos", type=int, help="Procesos trabajadores (uno por parte)")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE, help="Filas por bloque")
+    parser.add_argument("--sin-coordenadas", action="store_true", help="No verificar las coordenadas")
+    args = parser.parse_args(argv)
+
+    reporte = validar(
+        args.ruta, args.procesos, args.tamano_bloque, ruta_geojson=None if args.sin_coordenadas else RUTA_GEOJSON
+    )
+    print(json.dumps(reporte.a_dict(), indent=2, ensure_ascii=False))
+    return 0 if reporte.valido else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
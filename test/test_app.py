@@ -0,0 +1,144 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import pyarrow.parquet as pq
+import app
+from src import data_generator, data_reference
+
+
+class TestLineaDeComandos(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Los cachés de la corrida quedan en el directorio temporal, también para los procesos trabajadores
+        cache = os.path.join(self.temp_dir.name, "cache")
+        for parcheo in (
+            mock.patch.dict(os.environ, {"ALDA_CACHE_DIR": cache, "ALDA_CACHE_RESULTADOS_MB": "16"}),
+            mock.patch.object(data_reference, "RUTA_CACHE", cache),
+        ):
+            parcheo.start()
+            self.addCleanup(parcheo.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def ejecutar(self, *argumentos):
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida), contextlib.redirect_stderr(io.StringIO()):
+            resumen = app.main(list(argumentos))
+        return resumen, salida.getvalue()
+
+    def test_resumen_json(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.csv")
+        ruta_resumen = os.path.join(self.temp_dir.name, "resumen.json")
+        resumen, impreso = self.ejecutar(
+            "-n", "250", "-o", ruta, "--semilla", "5", "--tamano-bloque", "100", "--resumen", ruta_resumen
+        )
+
+        self.assertEqual(json.loads(impreso), resumen)
+        with open(ruta_resumen, encoding="utf-8") as archivo:
+            self.assertEqual(json.load(archivo), resumen)
+        self.assertEqual(resumen["filas"], 250)
+        self.assertEqual(resumen["bytes"], os.path.getsize(ruta))
+        self.assertEqual(set(resumen["segundos"]), {"inicializacion", "generacion", "escritura", "total"})
+        self.assertEqual(resumen["perfil"]["contadores"]["filas"], 250)
+        self.assertEqual(len(pd.read_csv(ruta)), 250)
+
+    def test_contador_igual_en_secuencial_y_paralelo(self):
+        ruta_a = os.path.join(self.temp_dir.name, "a.parquet")
+        ruta_b = os.path.join(self.temp_dir.name, "b.parquet")
+        self.ejecutar("-n", "300", "-o", ruta_a, "-s", "9", "-f", "parquet", "--modo", "contador")
+        self.ejecutar("-n", "300", "-o", ruta_b, "-s", "9", "-f", "parquet", "--modo", "contador", "-p", "2")
+        pd.testing.assert_frame_equal(pd.read_parquet(ruta_a), pd.read_parquet(ruta_b))
+
+    def test_motor_registros(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.feather")
+        resumen, impreso = self.ejecutar("-n", "50", "-o", ruta, "-f", "feather", "--motor", "registros", "-q")
+        self.assertEqual(json.loads(impreso), resumen)
+        self.assertEqual(resumen["motor"], "registros")
+        self.assertEqual(list(pd.read_feather(ruta)["ID"]), list(range(1, 51)))
+
+    def test_semilla_reproduce_motor_registros(self):
+        rutas = [os.path.join(self.temp_dir.name, f"{nombre}.csv") for nombre in ("a", "b")]
+        for ruta in rutas:
+            self.ejecutar("-n", "80", "-o", ruta, "-s", "42", "--motor", "registros", "-q")
+        pd.testing.assert_frame_equal(pd.read_csv(rutas[0]), pd.read_csv(rutas[1]))
+
+    def test_reanudar_tras_un_corte(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.csv")
+        ruta_continua = os.path.join(self.temp_dir.name, "continua.csv")
+        argumentos = ["-n", "2500", "-s", "3", "--tamano-bloque", "1000", "--punto-control", "-q"]
+        self.ejecutar(*argumentos, "-o", ruta_continua)
+
+        # El tercer bloque falla: quedan dos confirmados y una fila a medio escribir que se debe descartar
+        original = data_generator.TreeDataGenerator._generar_bloque
+        llamadas = []
+
+        def cortar(generador, *args, **kwargs):
+            llamadas.append(1)
+            if len(llamadas) == 3:
+                raise KeyboardInterrupt
+            return original(generador, *args, **kwargs)
+
+        with mock.patch.object(data_generator.TreeDataGenerator, "_generar_bloque", cortar):
+            with self.assertRaises(KeyboardInterrupt):
+                self.ejecutar(*argumentos, "-o", ruta)
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            archivo.write("2001,2024,fila incompleta")
+
+        # Reanudar con otra fuente de coordenadas cambiaría la salida a mitad del dataset
+        with self.assertRaises(SystemExit):
+            self.ejecutar(*argumentos, "-o", ruta, "--reanudar", "--pool-coordenadas")
+        # Igual con otro tamaño de bloque: cambiaría los valores sorteados del modo secuencial
+        with self.assertRaises(SystemExit):
+            self.ejecutar(*argumentos, "-o", ruta, "--reanudar", "--tamano-bloque", "500")
+
+        resumen, _ = self.ejecutar(*argumentos, "-o", ruta, "--reanudar")
+        self.assertEqual((resumen["filas"], resumen["filas_totales"]), (500, 2500))
+        pd.testing.assert_frame_equal(pd.read_csv(ruta), pd.read_csv(ruta_continua))
+
+    def test_agregar_filas_unicas(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles")
+        argumentos = ["-o", ruta, "-f", "parquet", "--particionar-por", "Localidad", "--tamano-bloque", "400", "-q"]
+        self.ejecutar("-n", "1000", "--punto-control", *argumentos)
+        resumen, _ = self.ejecutar("-n", "700", "--agregar", *argumentos)
+
+        df = pd.read_parquet(ruta)
+        self.assertEqual(resumen["filas_totales"], 1700)
+        self.assertEqual(sorted(df["ID"]), list(range(1, 1701)))
+        self.assertTrue(df["SIGAU"].is_unique)
+
+        # Sin punto de control no se puede agregar, y los argumentos deben coincidir con los guardados
+        with self.assertRaises(SystemExit):
+            self.ejecutar("--agregar", "-o", os.path.join(self.temp_dir.name, "otro.csv"))
+        with self.assertRaises(SystemExit):
+            self.ejecutar("-n", "10", "--agregar", "--compacto", *argumentos)
+
+    def test_tamano_grupo_filas(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.parquet")
+        self.ejecutar("-n", "500", "-o", ruta, "-f", "parquet", "--tamano-bloque", "400", "--tamano-grupo-filas", "150")
+
+        metadatos = pq.ParquetFile(ruta).metadata
+        self.assertEqual(metadatos.row_group(0).num_rows, 150)
+        self.assertEqual(metadatos.num_rows, 500)
+
+    def test_argumentos_invalidos(self):
+        for argumentos in (
+            ["--tamano-bloque", "0"],
+            ["--motor", "registros", "-p", "2"],
+            ["--compresion", "zstd"],
+            ["--tamano-grupo-filas", "100"],
+            ["-f", "parquet", "--tamano-grupo-filas", "0"],
+            ["-f", "parquet", "--punto-control"],
+        ):
+            with self.subTest(argumentos=argumentos), self.assertRaises(SystemExit):
+                self.ejecutar(*argumentos)
+
+
+if __name__ == "__main__":
+    unittest.main()
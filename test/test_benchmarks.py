@@ -0,0 +1,55 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from benchmarks.__main__ import main
+from benchmarks.suite import Resultado, cargar, comparar, guardar, medir
+
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def guardar(self, nombre, valores):
+        ruta = os.path.join(self.temp_dir.name, nombre)
+        guardar([Resultado(caso, "filas", valor, 1.0, 1) for caso, valor in valores.items()], ruta)
+        return ruta
+
+    def test_medir(self):
+        llamadas = []
+        resultado = medir("caso", lambda: llamadas.append(1), 100, "filas", repeticiones=4)
+        self.assertEqual(len(llamadas), 4)
+        self.assertEqual(resultado.repeticiones, 4)
+        self.assertGreater(resultado.por_segundo, 0)
+
+    def test_guardar_y_cargar(self):
+        ruta = self.guardar("base.json", {"a": 1000.0, "b": 50.0})
+        self.assertEqual(cargar(ruta), {"a": 1000.0, "b": 50.0})
+
+    def test_comparar_detecta_regresiones(self):
+        comparaciones = {c.nombre: c for c in comparar({"a": 100.0, "b": 100.0, "c": 1.0}, {"a": 85.0, "b": 95.0})}
+        self.assertEqual(set(comparaciones), {"a", "b"})
+        self.assertTrue(comparaciones["a"].es_regresion(0.10))
+        self.assertFalse(comparaciones["b"].es_regresion(0.10))
+        self.assertAlmostEqual(comparaciones["a"].cambio, -0.15)
+
+    def test_comando_compare(self):
+        base = self.guardar("base.json", {"a": 100.0})
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["compare", base, self.guardar("igual.json", {"a": 98.0})]), 0)
+            self.assertEqual(main(["compare", base, self.guardar("lento.json", {"a": 50.0})]), 1)
+            self.assertEqual(main(["compare", base, self.guardar("lento.json", {"a": 50.0}), "-u", "0.6"]), 0)
+
+    def test_comando_run(self):
+        ruta = os.path.join(self.temp_dir.name, "sigau.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            main(["run", "-g", "sigau", "--rapido", "-r", "1", "-o", ruta])
+        self.assertIn("sigau_lote[ocupacion=0.99]", cargar(ruta))
+
+
+if __name__ == "__main__":
+    unittest.main()
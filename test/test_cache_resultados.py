@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.cache_resultados import CacheResultados, clave
+from src.data_analysis import DEFINICION_AGREGADOS, AgregadosArboles, agregar, con_cache
+from src.data_generator import TreeDataGenerator
+
+
+class TestCacheResultados(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = TreeDataGenerator(semilla=33).generar_dataset(600)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = CacheResultados(os.path.join(self.temp_dir.name, "cache"))
+        self.llamadas = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def agregar_contando(self, bloques):
+        bloques = list(bloques)
+        self.llamadas.append(sum(len(bloque) for bloque in bloques))
+        return agregar(bloques)
+
+    def analizar(self, ruta, definicion=DEFINICION_AGREGADOS):
+        return con_cache(ruta, definicion, self.agregar_contando, AgregadosArboles.fusionar, self.cache)
+
+    def assertAgregadosIguales(self, a, b):
+        self.assertEqual(a.filas, b.filas)
+        for columna in a.conteos:
+            pd.testing.assert_series_equal(a.conteo(columna).sort_index(), b.conteo(columna).sort_index())
+        pd.testing.assert_series_equal(
+            a.altura_media_por_especie().sort_index(), b.altura_media_por_especie().sort_index()
+        )
+
+    def test_segunda_lectura_sale_de_la_cache(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.csv")
+        self.df.to_csv(ruta, index=False)
+
+        primero = self.analizar(ruta)
+        segundo = self.analizar(ruta)
+
+        self.assertEqual(self.llamadas, [600])
+        self.assertAgregadosIguales(primero, segundo)
+
+    def test_filas_agregadas_al_csv_se_leen_incrementalmente(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.csv")
+        self.df.iloc[:400].to_csv(ruta, index=False)
+        self.analizar(ruta)
+
+        self.df.iloc[400:].to_csv(ruta, index=False, header=False, mode="a")
+        incremental = self.analizar(ruta)
+
+        self.assertEqual(self.llamadas, [400, 200])
+        self.assertAgregadosIguales(incremental, agregar([pd.read_csv(ruta, dtype={"SIGAU": str})]))
+
+    def test_csv_modificado_se_recalcula_completo(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.csv")
+        self.df.iloc[:400].to_csv(ruta, index=False)
+        self.analizar(ruta)
+
+        self.df.iloc[100:500].to_csv(ruta, index=False)
+        resultado = self.analizar(ruta)
+
+        self.assertEqual(self.llamadas, [400, 400])
+        self.assertEqual(resultado.filas, 400)
+
+    def test_partes_nuevas_reutilizan_las_guardadas(self):
+        directorio = os.path.join(self.temp_dir.name, "partes")
+        os.makedirs(directorio)
+        self.df.iloc[:300].to_csv(os.path.join(directorio, "parte-0.csv"), index=False)
+        self.analizar(directorio)
+
+        self.df.iloc[300:].to_csv(os.path.join(directorio, "parte-1.csv"), index=False)
+        resultado = self.analizar(directorio)
+
+        self.assertEqual(self.llamadas, [300, 300])
+        self.assertAgregadosIguales(resultado, agregar([self.df]))
+
+    def test_definiciones_distintas_no_comparten_resultados(self):
+        ruta = os.path.join(self.temp_dir.name, "arboles.csv")
+        self.df.to_csv(ruta, index=False)
+
+        self.analizar(ruta)
+        self.analizar(ruta, definicion="otra")
+
+        self.assertEqual(self.llamadas, [600, 600])
+
+    def test_desalojo_por_tamano(self):
+        cache = CacheResultados(self.cache.directorio, limite_bytes=2500)
+        for i in range(5):
+            cache.guardar(clave(str(i)), b"x" * 1000)
+            os.utime(cache._ruta(clave(str(i))), ns=(i * 10**9, i * 10**9))
+
+        cache.guardar(clave("nuevo"), b"x" * 1000)
+
+        self.assertLessEqual(cache.tamano(), 2500)
+        self.assertIsNotNone(cache.obtener(clave("nuevo")))
+        self.assertIsNotNone(cache.obtener(clave("4")))
+        self.assertIsNone(cache.obtener(clave("0")))
+
+
+if __name__ == "__main__":
+    unittest.main()
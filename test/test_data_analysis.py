@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from src import data_analysis
+from src.data_analysis import (
+    AgregadosArboles,
+    agregar,
+    agregar_archivo,
+    agregar_archivos,
+    leer_parte,
+    leer_por_bloques,
+    listar_partes,
+)
+from src.data_generator import TreeDataGenerator
+from src.data_writer import escribir
+
+
+class TestAnalisisPorBloques(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = TreeDataGenerator(semilla=21).generar_dataset(1000)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def bloques(self, tamano):
+        return [self.df.iloc[i : i + tamano] for i in range(0, len(self.df), tamano)]
+
+    def test_agregados_iguales_a_pandas(self):
+        agregados = agregar(self.bloques(170))
+        df = self.df
+
+        self.assertEqual(agregados.filas, 1000)
+        for columna in ["Localidad", "Especie", "Estado Copa", "Tratamiento"]:
+            esperado = df[columna].value_counts()
+            pd.testing.assert_series_equal(agregados.conteo(columna).sort_index(), esperado.sort_index())
+        pd.testing.assert_series_equal(
+            agregados.conteo("Interes patrimonial", normalizar=True).sort_index(),
+            df["Interes patrimonial"].value_counts(normalize=True).sort_index(),
+        )
+
+        pd.testing.assert_series_equal(
+            agregados.altura_media_por_especie().sort_index(),
+            df.groupby("Especie")["Altura Total"].mean().sort_index(),
+        )
+        pd.testing.assert_frame_equal(
+            agregados.riesgo_especie.sort_index().sort_index(axis=1),
+            pd.crosstab(df["Especie"], df["Riesgo"]).sort_index().sort_index(axis=1),
+            check_names=False,
+        )
+
+        resumen = agregados.resumen_numerico()
+        self.assertEqual(resumen.loc["PAP", "conteo"], 1000)
+        self.assertAlmostEqual(resumen.loc["DAP", "media"], df["DAP"].mean())
+        self.assertEqual(resumen.loc["Altura Total", "maximo"], df["Altura Total"].max())
+        self.assertEqual(resumen.loc["Latitud", "minimo"], df["Latitud"].min())
+        self.assertAlmostEqual(resumen.loc["PAP", "desviacion"], df["PAP"].std())
+        pd.testing.assert_frame_equal(
+            agregados.estadisticas.correlacion(), df[agregados.estadisticas.columnas].corr(), check_exact=False
+        )
+
+    def test_fusion_independiente_de_la_particion(self):
+        a = agregar(self.bloques(1000))
+        b = agregar(self.bloques(77))
+        c = agregar(self.bloques(300)[2:]).fusionar(agregar(self.bloques(300)[:2]))
+
+        for otro in (b, c):
+            self.assertEqual(otro.filas, a.filas)
+            for columna, conteo in a.conteos.items():
+                pd.testing.assert_series_equal(otro.conteo(columna).sort_index(), a.conteo(columna).sort_index())
+            # Los cuartiles son aproximados y dependen de la partición; el resto es exacto
+            exactas = ["conteo", "media", "desviacion", "minimo", "maximo"]
+            pd.testing.assert_frame_equal(otro.resumen_numerico()[exactas], a.resumen_numerico()[exactas])
+
+        vacio = AgregadosArboles().fusionar(AgregadosArboles())
+        self.assertEqual(vacio.filas, 0)
+        self.assertTrue(vacio.conteo("Localidad").empty)
+
+    def test_lectura_por_bloques_y_archivos(self):
+        ruta_csv = os.path.join(self.temp_dir.name, "arboles.csv")
+        ruta_parquet = os.path.join(self.temp_dir.name, "particionado")
+        escribir(self.bloques(400), ruta_csv, reportar=None)
+        escribir(self.bloques(400), ruta_parquet, "parquet", particionar_por=["Localidad"], reportar=None)
+
+        self.assertEqual([len(b) for b in leer_por_bloques(ruta_csv, 300)], [300, 300, 300, 100])
+        self.assertEqual(list(next(leer_por_bloques(ruta_csv, 10, columnas=["ID", "SIGAU"])).columns), ["ID", "SIGAU"])
+
+        esperado = self.df["Localidad"].value_counts().sort_index()
+        for ruta in (ruta_csv, ruta_parquet):
+            with self.subTest(ruta=ruta):
+                agregados = agregar_archivo(ruta, tamano_bloque=250)
+                self.assertEqual(agregados.filas, 1000)
+                pd.testing.assert_series_equal(agregados.conteo("Localidad").sort_index(), esperado)
+
+        # Cada archivo de un directorio particionado se lee por separado, con su columna de partición
+        archivos = listar_partes(ruta_parquet)
+        self.assertEqual(archivos, sorted(archivos))
+        leidas = pd.concat(
+            bloque
+            for parte in archivos
+            for bloque in leer_parte(ruta_parquet, parte, 100, columnas=["ID", "Localidad"])
+        )
+        leidas = leidas.astype({"Localidad": str}).sort_values("ID", ignore_index=True)
+        pd.testing.assert_frame_equal(leidas, self.df[["ID", "Localidad"]].astype({"Localidad": str}))
+        self.assertEqual(listar_partes(ruta_csv), [ruta_csv])
+
+        partes = []
+        for i, bloque in enumerate(self.bloques(250)):
+            partes.append(os.path.join(self.temp_dir.name, f"part-{i:05d}.csv"))
+            bloque.to_csv(partes[-1], index=False)
+        paralelo = agregar_archivos(partes, procesos=2)
+        self.assertEqual(paralelo.filas, 1000)
+        pd.testing.assert_series_equal(paralelo.conteo("Localidad").sort_index(), esperado)
+
+        with self.assertRaises(FileNotFoundError):
+            next(leer_por_bloques(os.path.join(self.temp_dir.name, "no_existe.csv")))
+
+    def test_muestras_de_partes_independientes(self):
+        # Dos partes con el mismo contenido: con el mismo flujo de claves, la fusión repetiría las mismas filas
+        with mock.patch.object(data_analysis, "TAMANO_MUESTRA", 100):
+            a = data_analysis.agregar_analisis([self.df])
+            b = data_analysis.agregar_analisis([self.df])
+        _, bines, muestra = data_analysis.fusionar_analisis(a, b)
+        self.assertEqual(bines.total, 2 * len(self.df))
+        self.assertEqual(len(muestra.datos()), 100)
+        self.assertGreater(muestra.datos()["ID"].nunique(), 80)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,12 @@
+import asyncio
+import json
+import os
+import random
+import tempfile
 import unittest
-from src.data_generator import TreeDataGenerator
+import numpy as np
+from src.data_generator import INICIO_CONTADORES_LOCALIDAD, SIGAUGenerator, TreeDataGenerator
+from src.perfilador import Perfilador
 import pandas as pd
 
 
@@ -53,6 +60,227 @@ class TestTreeDataGenerator(unittest.TestCase):
         self.assertIn("ID", df.columns)
         self.assertTrue((df["PAP"] > 0).all())
 
+    def test_motor_columnar_mismo_esquema(self):
+        columnar = self.generator.generar_dataset(200, motor="columnar")
+        registros = self.generator.generar_dataset(20, motor="registros")
+        self.assertEqual(list(columnar.columns), list(registros.columns))
+        self.assertEqual(list(columnar.dtypes), list(registros.dtypes))
+        self.assertEqual(list(columnar["ID"]), list(range(1, 201)))
+
+    def test_motor_columnar_valores_consistentes(self):
+        df = self.generator.generar_dataset(2000)
+        config = self.generator.config
+        especies = pd.DataFrame(config.especies.values()).groupby("nombre_comun")
+        limites = pd.concat([especies["min_pap"].min(), especies["max_pap"].max()], axis=1).loc[df["Especie"]]
+
+        self.assertTrue((df["PAP"].to_numpy() >= limites["min_pap"].to_numpy() - 0.005).all())
+        self.assertTrue((df["PAP"].to_numpy() <= limites["max_pap"].to_numpy() + 0.005).all())
+        self.assertTrue((df["Altura Comercial"] <= df["Altura Total"]).all())
+        self.assertTrue(df["SIGAU"].is_unique)
+        self.assertTrue((df["Concepto"].str[:6] == df["Anio"].astype(str) + "EE").all())
+
+        for _, fila in df.drop_duplicates("Tratamiento").iterrows():
+            esperado = self.generator._generar_estado(fila["Tratamiento"])
+            self.assertEqual(fila["Estado fuste"], esperado["estado_fuste"])
+            self.assertEqual(fila["Estado General"], esperado["estado_general"])
+            self.assertEqual(fila["Riesgo"], esperado["riesgo"])
+
+        for anio, valores in config.valores_anuales.items():
+            del_anio = df[df["Anio"] == anio]
+            self.assertTrue((del_anio["Salario Minimo"] == valores["salario_minimo"]).all())
+
+    def test_motor_columnar_reproducible(self):
+        primero = TreeDataGenerator(semilla=42).generar_dataset(100)
+        segundo = TreeDataGenerator(semilla=42).generar_dataset(100)
+        pd.testing.assert_frame_equal(primero, segundo)
+
+    def test_motor_registros_reproducible(self):
+        # El motor por registros no depende del estado global de `random`
+        primero = TreeDataGenerator(semilla=42).generar_dataset(100, motor="registros")
+        random.seed(0)
+        segundo = TreeDataGenerator(semilla=42).generar_dataset(100, motor="registros")
+        pd.testing.assert_frame_equal(primero, segundo)
+        self.assertFalse(TreeDataGenerator(semilla=43).generar_dataset(100, motor="registros").equals(primero))
+
+    def test_generacion_paralela_independiente_de_procesos(self):
+        generator = TreeDataGenerator(semilla=11)
+        secuencial = pd.concat(list(generator.generar_en_paralelo(230, procesos=1, tamano_shard=50)), ignore_index=True)
+        paralelo = pd.concat(list(generator.generar_en_paralelo(230, procesos=3, tamano_shard=50)), ignore_index=True)
+
+        pd.testing.assert_frame_equal(secuencial, paralelo)
+        self.assertEqual(list(paralelo["ID"]), list(range(1, 231)))
+        self.assertTrue(paralelo["SIGAU"].is_unique)
+        self.assertEqual(len(generator.generar_dataset(0, procesos=2)), 0)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            partes = generator.generar_partes(230, directorio, procesos=2, tamano_shard=50)
+            self.assertEqual([os.path.basename(p) for p in partes], [f"part-{i:05d}.csv" for i in range(5)])
+            leido = pd.concat([pd.read_csv(p, dtype={"SIGAU": str}) for p in partes], ignore_index=True)
+            self.assertEqual(list(leido["SIGAU"]), list(paralelo["SIGAU"]))
+
+    def test_perfilador_por_etapas(self):
+        reportes = []
+        generator = TreeDataGenerator(semilla=8, perfilador=Perfilador(reportar=reportes.append))
+
+        generator.generar_dataset(200)
+        self.assertEqual(len(reportes), 1)
+        etapas = reportes[0]["etapas"]
+        for etapa in ["sorteo_categorias", "medidas_especie", "coordenadas", "sigau", "dataframe"]:
+            self.assertEqual(etapas[etapa]["llamadas"], 1)
+        contadores = reportes[0]["contadores"]
+        self.assertEqual(contadores["filas"], 200)
+        self.assertEqual(contadores["sigau_emitidos"], 200)
+        self.assertEqual(sum(v for k, v in contadores.items() if k.startswith("coordenadas[")), 200)
+
+        # Cada corrida empieza de cero; el motor por registros mide por bloque salvo que se pida por fila
+        generator.generar_dataset(100, motor="registros")
+        resumen = generator.perfilador.resumen()
+        self.assertEqual(resumen["contadores"]["filas"], 100)
+        self.assertEqual(resumen["contadores"]["sigau_emitidos"], 100)
+        self.assertEqual(resumen["etapas"]["registros"]["llamadas"], 1)
+        self.assertNotIn("coordenadas", resumen["etapas"])
+
+        # Por fila, el muestreo por rechazo del motor por registros cuenta los sorteos descartados por localidad
+        generator.perfilador.por_fila = True
+        generator.generar_dataset(100, motor="registros")
+        resumen = generator.perfilador.resumen()
+        self.assertEqual(resumen["etapas"]["coordenadas"]["llamadas"], 100)
+        self.assertTrue(any(k.startswith("coordenadas_rechazadas[") for k in resumen["contadores"]))
+
+        # Los resúmenes de los shards se suman en el proceso principal
+        list(generator.generar_en_paralelo(150, procesos=2, tamano_shard=50))
+        self.assertEqual(generator.perfilador.contadores["filas"], 150)
+        self.assertEqual(generator.perfilador.llamadas["sigau"], 3)
+
+    def test_modo_contador_acceso_aleatorio(self):
+        generator = TreeDataGenerator(semilla=5, modo="contador")
+        df = generator.generar_dataset(300)
+
+        self.assertEqual(generator.generar_arbol(123), df.iloc[122].to_dict())
+        pd.testing.assert_frame_equal(generator.generar_rango(101, 201), df.iloc[100:200].reset_index(drop=True))
+        pd.testing.assert_frame_equal(
+            pd.concat(list(generator.generar_en_paralelo(300, procesos=2, tamano_shard=70)), ignore_index=True), df
+        )
+        self.assertTrue(df["SIGAU"].is_unique)
+
+        lejano = TreeDataGenerator(semilla=5, modo="contador").generar_rango(10**9, 10**9 + 3)
+        self.assertEqual(list(lejano["ID"]), [10**9, 10**9 + 1, 10**9 + 2])
+        self.assertFalse(TreeDataGenerator(semilla=6, modo="contador").generar_dataset(300).equals(df))
+
+
+class TestEstadoGenerador(unittest.TestCase):
+    def test_restaurar_continua_la_misma_secuencia(self):
+        for modo in ("secuencial", "contador"):
+            with self.subTest(modo=modo):
+                continuo = pd.concat(TreeDataGenerator(semilla=8, modo=modo).generar_por_bloques(900, 300))
+
+                primero = TreeDataGenerator(semilla=8, modo=modo)
+                inicio = list(primero.generar_por_bloques(600, 300))
+                estado = json.loads(json.dumps(primero.estado()))
+
+                segundo = TreeDataGenerator(modo=modo)
+                segundo.restaurar(estado)
+                resto = list(segundo.generar_por_bloques(300, 300, id_inicial=segundo.siguiente_id))
+                pd.testing.assert_frame_equal(pd.concat(inicio + resto), continuo)
+
+        with self.assertRaises(ValueError):
+            TreeDataGenerator(modo="contador").restaurar(TreeDataGenerator().estado())
+
+
+class TestFlujoLotes(unittest.TestCase):
+    def test_iterar_lotes_pandas_y_arrow(self):
+        lotes = list(TreeDataGenerator(semilla=4).iterar_lotes(2500, tamano_lote=1000))
+        self.assertEqual([len(lote) for lote in lotes], [1000, 1000, 500])
+
+        lotes_arrow = list(TreeDataGenerator(semilla=4).iterar_lotes(2500, tamano_lote=1000, formato="arrow"))
+        self.assertEqual([lote.num_rows for lote in lotes_arrow], [1000, 1000, 500])
+        pd.testing.assert_frame_equal(lotes_arrow[1].to_pandas(), lotes[1].reset_index(drop=True))
+
+        with self.assertRaises(ValueError):
+            TreeDataGenerator().iterar_lotes(10, formato="json")
+
+    def test_generar_async_igual_al_iterador(self):
+        async def consumir():
+            return [lote async for lote in TreeDataGenerator(semilla=4).generar_async(2500, tamano_lote=1000)]
+
+        esperado = pd.concat(TreeDataGenerator(semilla=4).iterar_lotes(2500, tamano_lote=1000))
+        pd.testing.assert_frame_equal(pd.concat(asyncio.run(consumir())), esperado)
+
+    def test_generar_async_contrapresion_y_cierre(self):
+        generator = TreeDataGenerator(semilla=4)
+
+        async def consumir():
+            lotes = generator.generar_async(100_000, tamano_lote=500, lotes_en_cola=1)
+            async for _ in lotes:
+                break
+            await asyncio.sleep(0.5)
+            # Uno consumido, uno en la cola y a lo sumo uno en curso esperando lugar
+            generadas = generator.perfilador.resumen()["contadores"]["filas"]
+            await lotes.aclose()
+            return generadas
+
+        self.assertLessEqual(asyncio.run(consumir()), 3 * 500)
+
+    def test_generar_async_propaga_errores(self):
+        async def consumir():
+            async for _ in TreeDataGenerator().generar_async(10, tamano_lote=0):
+                pass
+
+        with self.assertRaises(ValueError):
+            asyncio.run(consumir())
+
+
+class TestSIGAUGenerator(unittest.TestCase):
+    def test_codigos_unicos_con_prefijo(self):
+        generador = SIGAUGenerator(clave=9)
+        localidades = np.random.default_rng(0).integers(1, 20, 5000)
+
+        codigos = list(generador.generar_lote(localidades)) + [generador.generar(7) for _ in range(100)]
+        self.assertEqual(len(set(codigos)), len(codigos))
+        self.assertTrue(all(len(c) == 14 and c.isdigit() for c in codigos))
+        self.assertEqual([c[:2] for c in codigos[:5000]], [f"{l:02d}" for l in localidades])
+        self.assertEqual(generador.contadores[7], int((localidades == 7).sum()) + 100)
+
+        # El camino escalar y el vectorizado producen el mismo código para el mismo contador
+        escalar = SIGAUGenerator(clave=9)
+        self.assertEqual([escalar.generar(3) for _ in range(20)], list(SIGAUGenerator(clave=9).generar_lote([3] * 20)))
+
+    def test_sufijos_distintos_entre_localidades(self):
+        # Un mismo contador no da el mismo sufijo en dos localidades, ni por generar ni por generar_lote
+        generador = SIGAUGenerator(clave=9)
+        escalares = [generador.generar(codigo)[2:] for codigo in (1, 2, 3)]
+        self.assertEqual(len(set(escalares)), 3)
+        lote = [codigo[2:] for codigo in SIGAUGenerator(clave=9).generar_lote([1, 2, 3])]
+        self.assertEqual(lote, escalares)
+
+        contadores = np.arange(1000)
+        uno, dos = (SIGAUGenerator(clave=9).codificar(np.full(1000, c), contadores) for c in (1, 2))
+        self.assertTrue(all(a[2:] != b[2:] for a, b in zip(uno, dos)))
+
+    def test_codificar_es_biyectivo_y_determinista(self):
+        contadores = np.arange(10**12 - 50_000, 10**12)
+        codigos = SIGAUGenerator(clave=1).codificar(np.full(len(contadores), 5), contadores)
+        self.assertEqual(len(set(codigos)), len(contadores))
+        self.assertEqual(list(codigos[:10]), list(SIGAUGenerator(clave=1).codificar(np.full(10, 5), contadores[:10])))
+
+        with self.assertRaises(ValueError):
+            SIGAUGenerator().codificar(np.array([1]), np.array([10**12]))
+
+    def test_motores_mezclados_sin_repetidos(self):
+        # Los contadores por localidad (motor por registros) y los IDs (motor columnar) no comparten rango
+        generator = TreeDataGenerator(semilla=6)
+        registros = generator.generar_dataset(400, motor="registros")
+        sueltos = [generator.generar_arbol(i)["SIGAU"] for i in range(401, 451)]
+        columnar = generator.generar_dataset(400)
+        codigos = [*registros["SIGAU"], *sueltos, *columnar["SIGAU"]]
+        self.assertEqual(len(set(codigos)), len(codigos))
+
+        generador = SIGAUGenerator(clave=3)
+        lote = generador.codificar_ids(np.full(5, 4), np.arange(5))
+        self.assertTrue(set(lote).isdisjoint(generador.generar(4) for _ in range(5)))
+        with self.assertRaises(ValueError):
+            generador.codificar_ids(np.array([4]), np.array([INICIO_CONTADORES_LOCALIDAD]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from src import data_reference
+from src.data_reference import DataReference, cargar_con_cache
+
+
+class TestCargaDeReferencias(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.ruta_csv = os.path.join(self.temp_dir.name, "especies.csv")
+        self._escribir("abelia,0.08")
+        self.llamadas = 0
+
+        parcheo = mock.patch.object(data_reference, "RUTA_CACHE", os.path.join(self.temp_dir.name, "cache"))
+        parcheo.start()
+        self.addCleanup(parcheo.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _escribir(self, contenido, mtime_ns=None):
+        with open(self.ruta_csv, "w", encoding="utf-8") as archivo:
+            archivo.write(contenido)
+        if mtime_ns is not None:
+            os.utime(self.ruta_csv, ns=(mtime_ns, mtime_ns))
+
+    def _parsear(self, ruta):
+        self.llamadas += 1
+        with open(ruta, encoding="utf-8") as archivo:
+            return archivo.read()
+
+    def test_cache_binaria(self):
+        self.assertEqual(cargar_con_cache(self.ruta_csv, self._parsear), "abelia,0.08")
+        self.assertEqual(cargar_con_cache(self.ruta_csv, self._parsear), "abelia,0.08")
+        self.assertEqual(self.llamadas, 1)
+
+        # Mismo contenido con otro mtime: el hash coincide y no se vuelve a parsear
+        self._escribir("abelia,0.08", mtime_ns=10**18)
+        self.assertEqual(cargar_con_cache(self.ruta_csv, self._parsear), "abelia,0.08")
+        self.assertEqual(self.llamadas, 1)
+
+        # Contenido distinto: se parsea de nuevo
+        self._escribir("abutilon,0.2", mtime_ns=2 * 10**18)
+        self.assertEqual(cargar_con_cache(self.ruta_csv, self._parsear), "abutilon,0.2")
+        self.assertEqual(self.llamadas, 2)
+
+    def test_especies_desde_el_paquete(self):
+        especies = DataReference.ESPECIES
+        self.assertEqual(len(especies), 298)
+        self.assertEqual(especies[1]["nombre_comun"], "abelia")
+        self.assertIs(DataReference.ESPECIES, especies)
+
+    def test_importar_sin_librerias_geograficas(self):
+        # En un intérprete nuevo: aquí otras pruebas ya cargaron shapely
+        codigo = (
+            "import sys, src.data_generator, src.validacion; "
+            "print(sorted({m.split('.')[0] for m in sys.modules} & {'shapely', 'geopandas'}))"
+        )
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True, check=True)
+        self.assertEqual(salida.stdout.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.data_generator import TreeDataGenerator
+from src.data_writer import escribir, escribir_csv
+
+
+class TestEscrituraPorBloques(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.temp_dir.name, "salida", "arboles.csv")
+        self.generator = TreeDataGenerator(semilla=3)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_bloques_con_ids_continuos(self):
+        bloques = list(self.generator.generar_por_bloques(250, tamano_bloque=100))
+        self.assertEqual([len(b) for b in bloques], [100, 100, 50])
+        self.assertEqual(list(pd.concat(bloques)["ID"]), list(range(1, 251)))
+
+    def test_escritura_csv(self):
+        reportes = []
+        progreso = escribir_csv(
+            self.generator.generar_por_bloques(250, tamano_bloque=100),
+            self.ruta,
+            reportar=lambda p: reportes.append(p.filas),
+        )
+
+        self.assertEqual(progreso.filas, 250)
+        self.assertEqual(reportes, [100, 200, 250])
+        self.assertEqual(progreso.bytes_escritos, os.path.getsize(self.ruta))
+
+        df = pd.read_csv(self.ruta, dtype={"SIGAU": str})
+        self.assertEqual(len(df), 250)
+        self.assertEqual(len(df.columns), 31)
+        self.assertEqual(list(df["ID"]), list(range(1, 251)))
+        self.assertTrue(df["SIGAU"].is_unique)
+
+    def test_escritura_parquet_y_feather(self):
+        esperado = pd.concat(self.generator.generar_por_bloques(250, tamano_bloque=100), ignore_index=True)
+        for formato, leer in (("parquet", pd.read_parquet), ("feather", pd.read_feather)):
+            with self.subTest(formato=formato):
+                ruta = os.path.join(self.temp_dir.name, f"arboles.{formato}")
+                generador = TreeDataGenerator(semilla=3)
+                progreso = escribir(
+                    generador.generar_por_bloques(250, tamano_bloque=100),
+                    ruta,
+                    formato,
+                    tamano_grupo_filas=64,
+                    reportar=None,
+                )
+
+                self.assertEqual(progreso.filas, 250)
+                self.assertEqual(progreso.bytes_escritos, os.path.getsize(ruta))
+                pd.testing.assert_frame_equal(leer(ruta), esperado)
+
+    def test_escritura_particionada(self):
+        ruta = os.path.join(self.temp_dir.name, "dataset")
+        progreso = escribir(
+            self.generator.generar_por_bloques(250, tamano_bloque=100),
+            ruta,
+            "parquet",
+            particionar_por=["Localidad", "Anio"],
+            reportar=None,
+        )
+        self.assertEqual(progreso.filas, 250)
+        self.assertGreater(progreso.bytes_escritos, 0)
+
+        df = pd.read_parquet(ruta)
+        self.assertEqual(len(df), 250)
+        self.assertEqual(sorted(df["ID"]), list(range(1, 251)))
+
+        localidad = df["Localidad"].iloc[0]
+        filtrado = pd.read_parquet(ruta, columns=["ID", "Localidad"], filters=[("Localidad", "==", localidad)])
+        self.assertEqual(len(filtrado), (df["Localidad"] == localidad).sum())
+
+    def test_formato_no_soportado(self):
+        with self.assertRaises(ValueError):
+            escribir([], self.ruta, "xlsx")
+
+
+if __name__ == "__main__":
+    unittest.main()
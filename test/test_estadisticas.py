@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.estadisticas import BocetoCuantiles, EstadisticasNumericas
+
+
+def partir(df, partes):
+    limites = np.linspace(0, len(df), partes + 1).astype(int)
+    return [df.iloc[inicio:fin] for inicio, fin in zip(limites[:-1], limites[1:])]
+
+
+class TestEstadisticasNumericas(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        x = rng.normal(10, 2, 20_000)
+        self.df = pd.DataFrame({"PAP": x, "DAP": x * np.pi + rng.normal(0, 0.5, len(x)), "Altura": rng.random(len(x))})
+
+    def acumular(self, tamano):
+        estadisticas = EstadisticasNumericas(self.df.columns)
+        for inicio in range(0, len(self.df), tamano):
+            estadisticas.agregar(self.df.iloc[inicio : inicio + tamano])
+        return estadisticas
+
+    def test_una_pasada_igual_a_pandas(self):
+        estadisticas = self.acumular(3_000)
+
+        self.assertEqual(estadisticas.n, len(self.df))
+        np.testing.assert_allclose(estadisticas.media, self.df.mean())
+        pd.testing.assert_series_equal(estadisticas.varianza(), self.df.var())
+        pd.testing.assert_frame_equal(estadisticas.covarianza(), self.df.cov())
+        pd.testing.assert_frame_equal(estadisticas.correlacion(), self.df.corr())
+        np.testing.assert_array_equal(estadisticas.minimo, self.df.min())
+        np.testing.assert_array_equal(estadisticas.maximo, self.df.max())
+
+    def test_fusion_exacta_entre_procesos(self):
+        partes = [EstadisticasNumericas(self.df.columns).agregar(p) for p in partir(self.df, 7)]
+        fusionado = EstadisticasNumericas(self.df.columns)
+        for parte in reversed(partes):
+            fusionado = fusionado.fusionar(parte)
+
+        completo = EstadisticasNumericas(self.df.columns).agregar(self.df)
+        self.assertEqual(fusionado.n, completo.n)
+        np.testing.assert_allclose(fusionado.media, completo.media)
+        np.testing.assert_allclose(fusionado.m2, completo.m2)
+
+        with self.assertRaises(ValueError):
+            fusionado.fusionar(EstadisticasNumericas(["PAP"]).agregar(self.df))
+
+    def test_estable_con_desplazamientos_grandes(self):
+        # Con sumas de cuadrados la varianza de valores cercanos a 1e9 se perdería por cancelación
+        desplazado = self.df + 1e9
+        estadisticas = EstadisticasNumericas(desplazado.columns)
+        for parte in partir(desplazado, 10):
+            estadisticas.agregar(parte)
+        np.testing.assert_allclose(estadisticas.varianza(), self.df.var(), rtol=1e-6)
+
+    def test_resumen_y_filas_incompletas(self):
+        df = self.df.copy()
+        df.loc[:9, "PAP"] = np.nan
+        resumen = EstadisticasNumericas(df.columns).agregar(df).resumen()
+
+        self.assertEqual(
+            list(resumen.columns), ["conteo", "media", "desviacion", "minimo", "25%", "50%", "75%", "maximo"]
+        )
+        self.assertEqual(resumen.loc["PAP", "conteo"], len(df) - 10)
+        esperado = df.dropna()["PAP"].quantile([0.25, 0.5, 0.75]).to_numpy()
+        np.testing.assert_allclose(resumen.loc["PAP", ["25%", "50%", "75%"]].to_numpy(dtype=float), esperado, rtol=0.01)
+
+        vacio = EstadisticasNumericas(["PAP"])
+        self.assertTrue(np.isnan(vacio.covarianza().iloc[0, 0]))
+
+
+class TestBocetoCuantiles(unittest.TestCase):
+    def test_cuantiles_aproximados_y_colas(self):
+        valores = np.random.default_rng(1).exponential(1.0, 200_000)
+        boceto = BocetoCuantiles()
+        for parte in np.array_split(valores, 20):
+            boceto.agregar(parte)
+
+        self.assertLess(len(boceto.medias), 200)
+        self.assertEqual(boceto.total, len(valores))
+        # El error se mide en rango: la fracción de valores por debajo de cada estimación
+        q = np.array([0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999])
+        rangos = np.searchsorted(np.sort(valores), boceto.cuantil(q)) / len(valores)
+        np.testing.assert_allclose(rangos, q, atol=0.002)
+        self.assertEqual(boceto.cuantil([0, 1]).tolist(), [valores.min(), valores.max()])
+
+    def test_fusion(self):
+        rng = np.random.default_rng(2)
+        a, b = BocetoCuantiles(), BocetoCuantiles()
+        a.agregar(rng.normal(0, 1, 50_000))
+        b.agregar(rng.normal(5, 1, 50_000))
+        fusionado = a.fusionar(b)
+
+        self.assertEqual(fusionado.total, 100_000)
+        self.assertAlmostEqual(float(fusionado.cuantil([0.5])[0]), 2.5, delta=0.2)
+        self.assertTrue(np.isnan(BocetoCuantiles().cuantil([0.5])[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -89,6 +89,124 @@ class TestGenerarCoordenadaEnLocalidad(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             generar_coordenada_en_localidad("ruta/inexistente.geojson", "Localidad1")
 
+    def test_localidades_se_cargan_una_vez(self):
+        """Test que verifica que el GeoJSON se lee una sola vez y se recarga si cambia en disco"""
+        from src.generate_coord import cargar_localidades
+
+        primera = cargar_localidades(self.test_geojson_path)
+        self.assertIs(cargar_localidades(self.test_geojson_path), primera)
+        self.assertEqual(set(primera.poligonos), {"Localidad1", "Localidad2"})
+
+        # Simular una modificación del archivo cambiando su mtime
+        estado = os.stat(self.test_geojson_path)
+        os.utime(self.test_geojson_path, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+
+        recargada = cargar_localidades(self.test_geojson_path)
+        self.assertIsNot(recargada, primera)
+        self.assertIs(cargar_localidades(self.test_geojson_path), recargada)
+
+    def test_muestreo_por_lotes(self):
+        """Test que verifica que el muestreo vectorizado produce puntos dentro de cada localidad"""
+        import numpy as np
+        import shapely
+        from src.generate_coord import cargar_localidades
+
+        localidades = cargar_localidades(self.test_geojson_path)
+        rng = np.random.default_rng(7)
+
+        latitudes, longitudes = localidades.muestrear("Localidad2", 1000, rng)
+        self.assertEqual(latitudes.shape, (1000,))
+        self.assertTrue(shapely.contains_xy(localidades.poligonos["Localidad2"], longitudes, latitudes).all())
+
+        latitudes, longitudes = localidades._muestrear_por_rechazo("Localidad1", 500, rng)
+        self.assertEqual(len(latitudes), 500)
+        self.assertTrue(shapely.contains_xy(localidades.poligonos["Localidad1"], longitudes, latitudes).all())
+
+        codigos = rng.integers(1, 3, 200)
+        nombres = {1: "Localidad1", 2: "Localidad2"}
+        latitudes, longitudes = localidades.muestrear_por_codigo(codigos, nombres, rng)
+        for codigo, nombre in nombres.items():
+            mascara = codigos == codigo
+            self.assertTrue(
+                shapely.contains_xy(localidades.poligonos[nombre], longitudes[mascara], latitudes[mascara]).all()
+            )
+
+        with self.assertRaises(ValueError):
+            localidades.muestrear("LocalidadInexistente", 10, rng)
+
+    def test_localizar_puntos(self):
+        """Test que verifica la geocodificación inversa vectorizada, incluidos los puntos fuera de toda localidad"""
+        import numpy as np
+        from src.generate_coord import FUERA_DE_LOCALIDADES, cargar_localidades
+
+        localidades = cargar_localidades(self.test_geojson_path)
+        latitudes = np.array([0.5, 2.5, 1.5, 0.25, -1.0])
+        longitudes = np.array([0.5, 2.5, 1.5, 0.75, 0.5])
+
+        codigos = localidades.localizar(latitudes, longitudes, tamano_lote=2)
+        np.testing.assert_array_equal(codigos, [1, 2, FUERA_DE_LOCALIDADES, 1, FUERA_DE_LOCALIDADES])
+        self.assertEqual(
+            list(localidades.localizar_nombres(latitudes, longitudes)),
+            ["Localidad1", "Localidad2", None, "Localidad1", None],
+        )
+
+        rng = np.random.default_rng(3)
+        latitudes, longitudes = localidades.muestrear("Localidad2", 300, rng)
+        self.assertTrue(localidades.en_localidad(latitudes, longitudes, ["Localidad2"] * 300).all())
+        self.assertFalse(localidades.en_localidad(latitudes, longitudes, ["Localidad1"] * 300).any())
+
+    def test_rejilla_de_aceleracion(self):
+        """Test que verifica que la rejilla clasifica las celdas y que localizar coincide con la prueba exacta"""
+        import numpy as np
+        from src.data_generator import RUTA_GEOJSON
+        from src.generate_coord import CELDA_FRONTERA, CELDA_FUERA, RejillaLocalidades, cargar_localidades
+
+        localidades = cargar_localidades(self.test_geojson_path)
+        rejilla = RejillaLocalidades(list(localidades.poligonos.values()), celdas=12)
+        x = np.array([0.5, 2.5, 1.5, 1.0, 0.0, np.nan, 10.0])
+        y = np.array([0.5, 2.5, 1.5, 0.5, 0.0, 0.5, 0.5])
+        np.testing.assert_array_equal(
+            rejilla.clasificar(x, y), [0, 1, CELDA_FUERA, CELDA_FRONTERA, CELDA_FRONTERA, CELDA_FUERA, CELDA_FUERA]
+        )
+
+        # Con una rejilla gruesa casi todo pasa por la frontera; con la real, la mayoría sale de una consulta
+        bogota = cargar_localidades(RUTA_GEOJSON)
+        poligonos = list(bogota.poligonos.values())
+        rng = np.random.default_rng(11)
+        minx, miny, maxx, maxy = np.array([p.bounds for p in poligonos]).T
+        longitudes = rng.uniform(minx.min() - 0.01, maxx.max() + 0.01, 20_000)
+        latitudes = rng.uniform(miny.min() - 0.01, maxy.max() + 0.01, 20_000)
+        # Los vértices caen sobre los límites compartidos, donde decide el orden del GeoJSON
+        vertices = np.concatenate([np.asarray(p.exterior.coords) for p in poligonos])
+        longitudes = np.concatenate([longitudes, vertices[:, 0]])
+        latitudes = np.concatenate([latitudes, vertices[:, 1]])
+
+        esperado = bogota._localizar_exacto(latitudes, longitudes, 5_000)
+        np.testing.assert_array_equal(bogota.localizar(latitudes, longitudes), esperado)
+        frontera = bogota.rejilla.clasificar(longitudes[:20_000], latitudes[:20_000]) == CELDA_FRONTERA
+        self.assertLess(frontera.mean(), 0.2)
+
+        bogota._rejilla = RejillaLocalidades(poligonos, celdas=16)
+        np.testing.assert_array_equal(bogota.localizar(latitudes, longitudes), esperado)
+        bogota._rejilla = None
+
+        # El muestreo por rechazo sortea sobre las celdas de la localidad
+        nombre = list(bogota.poligonos)[0]
+        latitudes, longitudes = bogota._muestrear_por_rechazo(nombre, 2_000, rng)
+        self.assertTrue(bogota.en_localidad(latitudes, longitudes, [nombre] * 2_000).all())
+
+        # El camino escalar también: las celdas interiores se aceptan sin prueba geométrica
+        import random
+        from unittest import mock
+        import shapely
+
+        random.seed(4)
+        with mock.patch.object(shapely, "contains_xy", wraps=shapely.contains_xy) as contains_xy:
+            puntos = np.array([bogota.generar_coordenada(nombre) for _ in range(2_000)])
+        self.assertTrue(bogota.en_localidad(puntos[:, 0], puntos[:, 1], [nombre] * 2_000).all())
+        # Antes cada sorteo llamaba a contains_xy; ahora solo los de frontera (un 17 % de las celdas de esta localidad)
+        self.assertLess(contains_xy.call_count, 600)
+
 
 if __name__ == "__main__":
     unittest.main()
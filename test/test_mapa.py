@@ -0,0 +1,128 @@
+import math
+import unittest
+import numpy as np
+import pandas as pd
+from src.data_generator import TreeDataGenerator
+from src.mapa import BinesEspaciales, BinesPorZoom, MuestraAleatoria, datos_mapa, tamano_celda
+
+
+class TestBinesEspaciales(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = TreeDataGenerator(semilla=13).generar_dataset(2000)
+
+    def test_cada_punto_cae_en_su_celda(self):
+        rng = np.random.default_rng(0)
+        latitudes, longitudes = rng.uniform(4.4, 4.8, 5000), rng.uniform(-74.3, -74.0, 5000)
+        for forma in ("hex", "cuadrada"):
+            with self.subTest(forma=forma):
+                bines = BinesEspaciales(0.01, forma)
+                lat_centro, lon_centro = bines.centros(*bines.celdas(latitudes, longitudes))
+                distancia = np.hypot(latitudes - lat_centro, longitudes - lon_centro)
+                # Radio del hexágono, o media diagonal del cuadrado
+                self.assertTrue((distancia <= 0.01 * (1 if forma == "hex" else math.sqrt(2) / 2) + 1e-12).all())
+
+    def test_hexagono_mas_cercano(self):
+        bines = BinesEspaciales(0.01)
+        rng = np.random.default_rng(1)
+        latitudes, longitudes = rng.uniform(4.5, 4.6, 2000), rng.uniform(-74.2, -74.1, 2000)
+        i, j = bines.celdas(latitudes, longitudes)
+
+        # El centro asignado es el más cercano entre la celda y sus seis vecinas
+        lat_centro, lon_centro = bines.centros(i, j)
+        propia = np.hypot(latitudes - lat_centro, longitudes - lon_centro)
+        for di, dj in [(1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1)]:
+            lat_vecina, lon_vecina = bines.centros(i + di, j + dj)
+            self.assertTrue((propia <= np.hypot(latitudes - lat_vecina, longitudes - lon_vecina) + 1e-12).all())
+
+    def test_conteos_fusionables_y_desglose(self):
+        completo = BinesEspaciales.para_zoom(12, por="Localidad").agregar(self.df)
+        por_bloques = BinesEspaciales.para_zoom(12, por="Localidad")
+        for inicio in range(0, len(self.df), 300):
+            por_bloques = por_bloques.fusionar(
+                BinesEspaciales.para_zoom(12, por="Localidad").agregar(self.df[inicio : inicio + 300])
+            )
+
+        self.assertEqual(completo.total, len(self.df))
+        pd.testing.assert_series_equal(por_bloques.conteos.sort_index(), completo.conteos.sort_index())
+
+        tabla = completo.resultado()
+        self.assertEqual(list(tabla.columns), ["Latitud", "Longitud", "Localidad", "Cantidad"])
+        pd.testing.assert_series_equal(
+            tabla.groupby("Localidad")["Cantidad"].sum().sort_index(),
+            self.df["Localidad"].value_counts().sort_index(),
+            check_names=False,
+        )
+
+        with self.assertRaises(ValueError):
+            completo.fusionar(BinesEspaciales.para_zoom(11, por="Localidad"))
+
+    def test_tamano_por_zoom(self):
+        self.assertAlmostEqual(tamano_celda(11) / tamano_celda(12), 2)
+        self.assertGreater(
+            len(BinesEspaciales.para_zoom(14).agregar(self.df).resultado()),
+            len(BinesEspaciales.para_zoom(10).agregar(self.df).resultado()),
+        )
+
+    def test_bines_por_zoom(self):
+        completo = BinesPorZoom((10, 12, 14), por="Riesgo").agregar(self.df)
+        por_bloques = BinesPorZoom((10, 12, 14), por="Riesgo").agregar(self.df[:700])
+        por_bloques = por_bloques.fusionar(BinesPorZoom((10, 12, 14), por="Riesgo").agregar(self.df[700:]))
+        for zoom in (10, 12, 14):
+            esperado = BinesEspaciales.para_zoom(zoom, por="Riesgo").agregar(self.df).conteos.sort_index()
+            pd.testing.assert_series_equal(completo.nivel(zoom).conteos.sort_index(), esperado)
+            pd.testing.assert_series_equal(por_bloques.nivel(zoom).conteos.sort_index(), esperado)
+        self.assertEqual(completo.total, len(self.df))
+
+        # Se dibuja el nivel más fino que cabe en el presupuesto, o el más grueso si ninguno cabe
+        celdas = {zoom: len(completo.nivel(zoom).conteos) for zoom in (10, 12, 14)}
+        self.assertIs(completo.para_presupuesto(celdas[14]), completo.nivel(14))
+        self.assertIs(completo.para_presupuesto(celdas[14] - 1), completo.nivel(12))
+        self.assertIs(completo.para_presupuesto(1), completo.nivel(10))
+
+        with self.assertRaises(ValueError):
+            completo.fusionar(BinesPorZoom((10, 12), por="Riesgo"))
+        with self.assertRaises(ValueError):
+            completo.nivel(11)
+
+
+class TestMuestraAleatoria(unittest.TestCase):
+    def test_muestra_acotada_y_fusionable(self):
+        df = pd.DataFrame({"ID": np.arange(10_000)})
+        a, b = MuestraAleatoria(500, semilla=1), MuestraAleatoria(500, semilla=2)
+        for inicio in range(0, 5000, 1000):
+            a.agregar(df[inicio : inicio + 1000])
+            b.agregar(df[inicio + 5000 : inicio + 6000])
+
+        fusionada = a.fusionar(b)
+        datos = fusionada.datos()
+        self.assertEqual(fusionada.vistas, 10_000)
+        self.assertEqual(len(datos), 500)
+        self.assertTrue(datos["ID"].is_unique)
+        # Ambas mitades quedan representadas
+        self.assertTrue(150 < (datos["ID"] < 5000).sum() < 350)
+        self.assertEqual(len(fusionada.datos(100)), 100)
+
+    def test_datos_mapa_segun_presupuesto(self):
+        df = TreeDataGenerator(semilla=2).generar_dataset(300)
+        bines = BinesEspaciales.para_zoom().agregar(df)
+        muestra = MuestraAleatoria(1000).agregar(df)
+
+        modo, puntos = datos_mapa(bines, muestra, presupuesto=1000)
+        self.assertEqual((modo, len(puntos)), ("puntos", 300))
+
+        modo, celdas = datos_mapa(bines, muestra, presupuesto=100)
+        self.assertEqual(modo, "celdas")
+        self.assertEqual(celdas["Cantidad"].sum(), 300)
+
+        modo, submuestra = datos_mapa(bines, muestra, presupuesto=100, modo="muestra")
+        self.assertEqual((modo, len(submuestra)), ("muestra", 100))
+
+        por_zoom = BinesPorZoom().agregar(df)
+        modo, celdas = datos_mapa(por_zoom, muestra, presupuesto=100)
+        self.assertEqual(modo, "celdas")
+        self.assertLessEqual(len(celdas), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.data_generator import RUTA_GEOJSON, TreeDataGenerator
+from src.generate_coord import TriangulacionesEmpaquetadas, _MuestreoTriangulado, cargar_localidades
+from src.memoria_compartida import BloqueCompartido, adjuntar
+
+
+def _sumar_en_trabajador(descriptor):
+    memoria, arreglos = adjuntar(descriptor)
+    try:
+        return {clave: float(arreglo.sum()) for clave, arreglo in arreglos.items()}
+    finally:
+        memoria.close()
+
+
+class TestMemoriaCompartida(unittest.TestCase):
+    def test_arreglos_visibles_en_otro_proceso(self):
+        arreglos = {"a": np.arange(10, dtype=np.int64), "b": np.linspace(0, 1, 7).reshape(7, 1), "c": np.ones(3, "f4")}
+        with BloqueCompartido(arreglos) as bloque:
+            memoria, vistas = adjuntar(bloque.descriptor)
+            for clave, arreglo in arreglos.items():
+                np.testing.assert_array_equal(vistas[clave], arreglo)
+                self.assertEqual(vistas[clave].dtype, arreglo.dtype)
+            with self.assertRaises(ValueError):
+                vistas["a"][0] = 1
+            memoria.close()
+
+            with ProcessPoolExecutor(1) as pool:
+                sumas = pool.submit(_sumar_en_trabajador, bloque.descriptor).result()
+            self.assertEqual(sumas, {clave: float(arreglo.sum()) for clave, arreglo in arreglos.items()})
+
+        with self.assertRaises(TypeError):
+            BloqueCompartido({"nombres": np.array(["BOSA"], dtype=object)})
+
+    def test_triangulaciones_empaquetadas_muestrean_igual(self):
+        geo = cargar_localidades(RUTA_GEOJSON)
+        empaquetadas = TriangulacionesEmpaquetadas.desde_localidades(geo)
+        with BloqueCompartido(empaquetadas.arreglos()) as bloque:
+            memoria, arreglos = adjuntar(bloque.descriptor)
+            compartidas = TriangulacionesEmpaquetadas(empaquetadas.nombres, **arreglos)
+
+            codigos = np.random.default_rng(0).integers(1, 20, 500)
+            nombres = {codigo: nombre for codigo, nombre in enumerate(sorted(geo.poligonos), start=1)}
+            esperado = geo.muestrear_por_codigo(codigos, nombres, np.random.default_rng(1))
+            obtenido = compartidas.muestrear_por_codigo(codigos, nombres, np.random.default_rng(1))
+            np.testing.assert_array_equal(obtenido, esperado)
+            del compartidas, arreglos
+            memoria.close()
+
+        # Una fuente de triangulaciones incompleta falla al crearse, no en medio de un trabajador
+        class SinTriangulacion(_MuestreoTriangulado):
+            pass
+
+        with self.assertRaises(TypeError):
+            SinTriangulacion()
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"), "Requiere /dev/shm")
+    def test_generador_paralelo_libera_la_memoria(self):
+        antes = set(os.listdir("/dev/shm"))
+        generator = TreeDataGenerator(semilla=2)
+        lotes = list(generator.generar_en_paralelo(300, procesos=2, tamano_shard=100))
+        self.assertEqual(sum(len(lote) for lote in lotes), 300)
+        self.assertEqual(set(os.listdir("/dev/shm")) - antes, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
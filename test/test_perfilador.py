@@ -0,0 +1,64 @@
+import unittest
+from src.perfilador import PERFILADOR_INACTIVO, Perfilador, perfilador_o_inactivo
+
+
+class TestPerfilador(unittest.TestCase):
+    def test_etapas_y_contadores(self):
+        perfilador = Perfilador()
+        for _ in range(3):
+            with perfilador.etapa("sigau"):
+                pass
+        perfilador.contar("filas", 10)
+        perfilador.contar("filas", 5)
+
+        resumen = perfilador.resumen()
+        self.assertEqual(resumen["etapas"]["sigau"]["llamadas"], 3)
+        self.assertGreaterEqual(resumen["etapas"]["sigau"]["segundos"], 0)
+        self.assertEqual(resumen["contadores"], {"filas": 15})
+
+    def test_etapa_con_excepcion(self):
+        perfilador = Perfilador()
+        with self.assertRaises(KeyError):
+            with perfilador.etapa("coordenadas"):
+                raise KeyError("BOSA")
+        self.assertEqual(perfilador.llamadas["coordenadas"], 1)
+
+    def test_inactivo_no_mide(self):
+        perfilador = Perfilador(activo=False, reportar=self.fail)
+        with perfilador.etapa("sigau"):
+            perfilador.contar("filas")
+
+        # Las etapas por fila solo se miden si se piden
+        for por_fila, llamadas in ((False, {}), (True, {"especie": 1})):
+            por_filas = Perfilador(por_fila=por_fila)
+            with por_filas.etapa_por_fila("especie"):
+                pass
+            self.assertEqual(dict(por_filas.llamadas), llamadas)
+        self.assertEqual(perfilador.finalizar(), {"etapas": {}, "contadores": {}})
+        self.assertIs(perfilador_o_inactivo(None), PERFILADOR_INACTIVO)
+
+    def test_finalizar_y_acumular(self):
+        reportes = []
+        perfilador = Perfilador(reportar=reportes.append)
+        perfilador.contar("filas", 2)
+
+        otro = Perfilador()
+        with otro.etapa("dataframe"):
+            otro.contar("filas", 3)
+        perfilador.acumular(otro.resumen())
+
+        resumen = perfilador.finalizar()
+        self.assertEqual(reportes, [resumen])
+        self.assertEqual(resumen["contadores"]["filas"], 5)
+        self.assertEqual(resumen["etapas"]["dataframe"]["llamadas"], 1)
+
+        # finalizar no reinicia: los totales siguen acumulándose
+        perfilador.contar("filas", 1)
+        self.assertEqual(perfilador.finalizar()["contadores"]["filas"], 6)
+
+        perfilador.reiniciar()
+        self.assertEqual(perfilador.resumen(), {"etapas": {}, "contadores": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
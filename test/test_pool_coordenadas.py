@@ -0,0 +1,116 @@
+import functools
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import Polygon
+from src import data_generator
+from src.generate_coord import cargar_localidades
+from src.pool_coordenadas import PoolCoordenadas, cargar_pool
+
+
+class TestPoolCoordenadas(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directorio = os.path.join(self.temp_dir.name, "pools")
+        self.ruta_geojson = os.path.join(self.temp_dir.name, "localidades.geojson")
+        self.escribir_geojson(3)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def escribir_geojson(self, lado):
+        data = {
+            "LocNombre": ["Localidad1", "Localidad2"],
+            "geometry": [
+                Polygon([(0, 0), (lado, 0), (0, lado)]),
+                Polygon([(10, 10), (12, 10), (12, 12), (10, 12)]),
+            ],
+        }
+        gpd.GeoDataFrame(data, crs="EPSG:4326").to_file(self.ruta_geojson, driver="GeoJSON")
+
+    def test_puntos_dentro_de_cada_localidad(self):
+        pool = cargar_pool(self.ruta_geojson, 1000, self.directorio)
+        self.assertEqual(pool.puntos.shape, (2, 1000, 2))
+        self.assertIsInstance(pool.puntos, np.memmap)
+
+        codigos = np.random.default_rng(1).integers(1, 3, 500)
+        nombres = {1: "Localidad1", 2: "Localidad2"}
+        latitudes, longitudes = pool.muestrear_por_codigo(codigos, nombres, np.random.default_rng(2))
+        poligonos = {
+            "Localidad1": Polygon([(0, 0), (3, 0), (0, 3)]),
+            "Localidad2": Polygon([(10, 10), (12, 10), (12, 12), (10, 12)]),
+        }
+        for codigo, nombre in nombres.items():
+            mascara = codigos == codigo
+            self.assertTrue(shapely.contains_xy(poligonos[nombre], longitudes[mascara], latitudes[mascara]).all())
+
+        # Con uniformes el punto depende solo de ellos, como en el modo por contador
+        uniformes = np.random.default_rng(3).random((3, 500))
+        primero = pool.muestrear_por_codigo(codigos, nombres, uniformes=uniformes)
+        segundo = pool.muestrear_por_codigo(codigos, nombres, uniformes=uniformes)
+        np.testing.assert_array_equal(primero, segundo)
+
+        with self.assertRaises(ValueError):
+            pool.muestrear("LocalidadInexistente", 10)
+        # Un código sin localidad no toma puntos de otra, esté o no por debajo del mayor código conocido
+        for desconocido in (0, 3, -1):
+            with self.subTest(codigo=desconocido), self.assertRaisesRegex(ValueError, f"código {desconocido} "):
+                pool.muestrear_por_codigo(
+                    [1, desconocido], {2: "Localidad2", 1: "Localidad1"}, np.random.default_rng(4)
+                )
+
+    def test_se_reutiliza_y_se_reconstruye_si_cambia_el_geojson(self):
+        pool = cargar_pool(self.ruta_geojson, 100, self.directorio)
+        self.assertEqual(len(os.listdir(self.directorio)), 2)
+
+        # Otro proceso (o la siguiente corrida) abre el mismo archivo sin reconstruirlo
+        copia = pickle.loads(pickle.dumps(pool))
+        self.assertEqual(copia.ruta, pool.ruta)
+        np.testing.assert_array_equal(copia.puntos, pool.puntos)
+
+        self.escribir_geojson(4)
+        nuevo = cargar_pool(self.ruta_geojson, 100, self.directorio)
+        self.assertNotEqual(nuevo.ruta, pool.ruta)
+        self.assertNotEqual(nuevo.sha256, pool.sha256)
+        self.assertEqual(len(os.listdir(self.directorio)), 4)
+        self.assertIsInstance(PoolCoordenadas(pool.ruta), PoolCoordenadas)
+
+    def test_generador_con_pool(self):
+        pool_pequeno = functools.partial(cargar_pool, puntos_por_localidad=2000, directorio=self.directorio)
+        with mock.patch.object(data_generator, "cargar_pool", pool_pequeno):
+            generator = data_generator.TreeDataGenerator(semilla=5, pool_coordenadas=True)
+            df = generator.generar_dataset(2000)
+
+        geo = cargar_localidades(generator.ruta_geojson)
+        self.assertTrue(geo.en_localidad(df["Latitud"], df["Longitud"], df["Localidad"]).all())
+
+    def test_paralelo_construye_el_pool_antes_de_los_trabajadores(self):
+        pool_pequeno = functools.partial(cargar_pool, puntos_por_localidad=2000, directorio=self.directorio)
+        archivos_al_crear_pool = []
+
+        def executor(*args, **kwargs):
+            archivos_al_crear_pool.append(sorted(os.listdir(self.directorio)))
+            return ProcessPoolExecutor(*args, **kwargs)
+
+        with mock.patch.object(data_generator, "cargar_pool", pool_pequeno), mock.patch.object(
+            data_generator, "ProcessPoolExecutor", executor
+        ):
+            generator = data_generator.TreeDataGenerator(semilla=5, pool_coordenadas=True)
+            df = pd.concat(list(generator.generar_en_paralelo(600, procesos=2, tamano_shard=200)))
+
+        # Los trabajadores reciben el pool terminado y solo lo mapean
+        self.assertEqual(len(archivos_al_crear_pool), 1)
+        self.assertEqual([os.path.splitext(a)[1] for a in archivos_al_crear_pool[0]], [".json", ".npy"])
+        self.assertEqual(sorted(os.listdir(self.directorio)), archivos_al_crear_pool[0])
+        self.assertEqual(len(df), 600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import random
+import unittest
+import numpy as np
+from src.data_generator import DataConfig, TreeDataGenerator
+from src.samplers import Muestreadores, TablaAlias
+
+
+class TestTablaAlias(unittest.TestCase):
+    def test_frecuencias_por_lote(self):
+        pesos = np.array([0.1, 0.15, 0.05, 0.4, 0.2, 0.1])
+        tabla = TablaAlias(pesos)
+
+        muestras = tabla.muestrear_lote(200_000, np.random.default_rng(1))
+        frecuencias = np.bincount(muestras, minlength=len(pesos)) / len(muestras)
+        np.testing.assert_allclose(frecuencias, pesos, atol=0.005)
+
+    def test_frecuencias_escalares(self):
+        rng = random.Random(2)
+        tabla = TablaAlias([1, 3])
+        muestras = [tabla.muestrear(rng) for _ in range(40_000)]
+        self.assertAlmostEqual(muestras.count(1) / len(muestras), 0.75, delta=0.01)
+
+    def test_pesos_invalidos(self):
+        for pesos in ([], [0, 0], [1, -1]):
+            with self.assertRaises(ValueError):
+                TablaAlias(pesos)
+
+    def test_especies_ponderadas_por_abundancia(self):
+        config = DataConfig()
+        muestreadores = Muestreadores.desde_config(config, ponderar_especies=True)
+        totales = np.array([especie["total"] for especie in config.especies.values()])
+
+        muestras = muestreadores.especies.muestrear_lote(100_000, np.random.default_rng(3))
+        mas_abundante = int(np.argmax(totales))
+        self.assertAlmostEqual(np.mean(muestras == mas_abundante), totales[mas_abundante] / totales.sum(), delta=0.01)
+
+        df = TreeDataGenerator(semilla=4, ponderar_especies=True).generar_dataset(5000)
+        nombre = config.especies[list(config.especies)[mas_abundante]]["nombre_comun"]
+        self.assertEqual(df["Especie"].value_counts().index[0], nombre)
+
+
+if __name__ == "__main__":
+    unittest.main()
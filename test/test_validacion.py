@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.data_generator import TreeDataGenerator
+from src import validacion
+from src.data_writer import escribir
+from src.validacion import VERIFICACIONES, main, sigau_a_enteros, validar, validar_bloques
+
+
+class TestValidacion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = TreeDataGenerator(semilla=31).generar_dataset(1200)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def bloques(self, df, tamano):
+        return [df.iloc[i : i + tamano] for i in range(0, len(df), tamano)]
+
+    def test_dataset_generado_es_valido(self):
+        ruta_csv = os.path.join(self.temp_dir.name, "arboles.csv")
+        ruta_parquet = os.path.join(self.temp_dir.name, "particionado")
+        escribir(self.bloques(self.df, 500), ruta_csv, reportar=None)
+        escribir(
+            TreeDataGenerator(semilla=31).generar_por_bloques(1200, 500, compacto=True),
+            ruta_parquet,
+            "parquet",
+            particionar_por=["Localidad"],
+            reportar=None,
+        )
+
+        for ruta, procesos in ((ruta_csv, None), (ruta_parquet, 1), (ruta_parquet, 2)):
+            with self.subTest(ruta=ruta, procesos=procesos):
+                reporte = validar(ruta, procesos=procesos, tamano_bloque=300)
+                self.assertEqual(reporte.filas, 1200)
+                self.assertTrue(reporte.valido, reporte.a_dict())
+                self.assertEqual(list(reporte.resumen().index), VERIFICACIONES)
+
+        registros = TreeDataGenerator(semilla=31).generar_dataset(300, motor="registros")
+        self.assertTrue(validar_bloques([registros]).valido)
+
+    def test_detecta_cada_violacion(self):
+        df = self.df.copy()
+        ids = df["ID"].to_numpy()
+        localidad = df["Localidad"].to_numpy()
+
+        df.loc[0, "PAP"] = 1e6
+        df.loc[1, "DAP"] += 1
+        df.loc[2, "Riesgo"] = "Muy Alto" if df.loc[2, "Riesgo"] != "Muy Alto" else "Bajo"
+        df.loc[3, "Estado Copa"] = 0
+        df.loc[4, "Especie"] = "Especie inventada"
+        df.loc[5, "SIGAU"] = "123"
+        # Otra fila con la misma localidad para que solo falle la unicidad
+        duplicada = int(np.flatnonzero((localidad == localidad[6]) & (ids != ids[6]))[-1])
+        df.loc[duplicada, "SIGAU"] = df.loc[6, "SIGAU"]
+        otra = int(np.flatnonzero(localidad != localidad[7])[0])
+        df.loc[7, "SIGAU"] = df.loc[otra, "SIGAU"][:2] + df.loc[7, "SIGAU"][2:]
+        df.loc[8, ["Latitud", "Longitud"]] = df.loc[otra, ["Latitud", "Longitud"]].to_numpy()
+        df.loc[9, "Altura Comercial"] = df.loc[9, "Altura Total"] + 1
+
+        ruta = os.path.join(self.temp_dir.name, "partes")
+        os.makedirs(ruta)
+        for i, bloque in enumerate(self.bloques(df, 400)):
+            bloque.to_csv(os.path.join(ruta, f"part-{i:05d}.csv"), index=False)
+
+        reporte = validar(ruta, procesos=2, tamano_bloque=150)
+        esperado = {
+            "pap_fuera_de_rango": [ids[0]],
+            "dap_formula": [ids[0], ids[1]],
+            "perimetro_basal_formula": [ids[0]],
+            "riesgo": [ids[2]],
+            "estados_tratamiento": [ids[3]],
+            "especie_desconocida": [ids[4]],
+            "sigau_formato": [ids[5]],
+            "sigau_duplicado": [df.loc[6, "SIGAU"]],
+            "sigau_prefijo": [ids[7]],
+            "coordenada_fuera_de_localidad": [ids[8]],
+            "altura_comercial_fuera_de_rango": [ids[9]],
+        }
+        self.assertFalse(reporte.valido)
+        self.assertEqual(reporte.filas, 1200)
+        self.assertEqual(reporte.a_dict()["ejemplos"], esperado)
+        self.assertEqual(reporte.a_dict()["violaciones"], {v: len(e) for v, e in esperado.items()})
+
+        # Varios volcados por parte y varios tramos de cubetas dan el mismo reporte
+        with mock.patch.multiple(validacion, VOLCADO_SIGAU=100, GRUPO_SIGAU=200):
+            self.assertEqual(validar(ruta, procesos=1, tamano_bloque=150).a_dict(), reporte.a_dict())
+
+        ausente = os.path.join(self.temp_dir.name, "no_existe")
+        with self.assertRaises(FileNotFoundError):
+            validar(ausente)
+        with self.assertRaises(ValueError):
+            validar_bloques([df.drop(columns=["SIGAU"])])
+        self.assertEqual(main([ruta, "--sin-coordenadas"]), 1)
+
+    def test_sigau_a_enteros(self):
+        sigau = pd.Series(["01000000000042", "1900000000000", "190000000000000", "0100000000004a", None])
+        np.testing.assert_array_equal(sigau_a_enteros(sigau), [10**12 + 42, -1, -1, -1, -1])
+
+
+if __name__ == "__main__":
+    unittest.main()